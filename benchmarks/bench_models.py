@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Model benchmark: memory per service and (de)serialization time at fleet scale."""
+
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+# Add project path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from autostartx.models import ServiceInfo, ServiceStatus
+
+FLEET_SIZES = [10000, 100000]
+
+
+@dataclass
+class LegacyServiceInfo:
+    """The previous plain dataclass with hand-written (de)serializers, for comparison."""
+
+    id: str
+    name: str
+    command: str
+    status: ServiceStatus = ServiceStatus.STOPPED
+    pid: Optional[int] = None
+    auto_restart: bool = True
+    auto_start: bool = False
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    restart_count: int = 0
+    max_restart_attempts: int = 3
+    restart_delay: int = 5
+    working_dir: str = ""
+    env_vars: Dict[str, str] = field(default_factory=dict)
+    version: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary format."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "command": self.command,
+            "status": self.status.value,
+            "pid": self.pid,
+            "auto_restart": self.auto_restart,
+            "auto_start": self.auto_start,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "restart_count": self.restart_count,
+            "max_restart_attempts": self.max_restart_attempts,
+            "restart_delay": self.restart_delay,
+            "working_dir": self.working_dir,
+            "env_vars": self.env_vars,
+            "version": self.version,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LegacyServiceInfo":
+        """Create instance from dictionary."""
+        data = data.copy()
+        if "status" in data:
+            data["status"] = ServiceStatus(data["status"])
+        if "auto_start" not in data:
+            data["auto_start"] = False
+        return cls(**data)
+
+
+def make_payload(size: int) -> str:
+    """Serialized fleet as stored on disk; one service in ten sets env vars."""
+    services = [
+        ServiceInfo(
+            id=f"{i:08x}",
+            name=f"service-{i}",
+            command=f"python worker.py --shard {i}",
+            working_dir="/srv/app",
+            env_vars={"SHARD": str(i)} if i % 10 == 0 else {},
+        ).to_dict()
+        for i in range(size)
+    ]
+    return json.dumps(services)
+
+
+def measure(cls, payload: str):
+    """Return (bytes per service, load seconds, dump seconds) for a model class."""
+    records = json.loads(payload)
+    gc.collect()
+    start = time.perf_counter()
+    services = [cls.from_dict(record) for record in records]
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for service in services:
+        service.to_dict()
+    dump_time = time.perf_counter() - start
+    del services
+
+    # Memory retained by the loaded services once the parsed JSON is gone
+    gc.collect()
+    tracemalloc.start()
+    records = json.loads(payload)
+    services = [cls.from_dict(record) for record in records]
+    del records
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return retained / len(services), load_time, dump_time
+
+
+def main():
+    """Run the benchmark and print a table."""
+    print(f"{'services':>10} {'model':>8} {'bytes/svc':>10} {'load':>10} {'to_dict':>10}")
+    for size in FLEET_SIZES:
+        payload = make_payload(size)
+        for label, cls in (("legacy", LegacyServiceInfo), ("slotted", ServiceInfo)):
+            per_service, load_time, dump_time = measure(cls, payload)
+            print(
+                f"{size:>10} {label:>8} {per_service:>10.0f} "
+                f"{load_time * 1000:>7.1f} ms {dump_time * 1000:>7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Monitor benchmark: crash-to-restart latency and idle CPU by exit detection mode and engine."""
+
+import contextlib
+import io
+import os
+import signal
+import sys
+import tempfile
+import time
+
+# Add project path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from autostartx.async_monitor import AsyncServiceMonitor
+from autostartx.models import ServiceStatus
+from autostartx.monitor import ServiceMonitor
+from autostartx.service_manager import ServiceManager
+
+CRASHES = 5
+RESTART_DELAY = 1
+CHECK_INTERVAL = 5
+TIMEOUT = 30
+IDLE_SERVICES = 50
+IDLE_SECONDS = 10
+MODES = ["polling", "SIGCHLD", "pidfd", "asyncio"]
+
+
+def wait_for_restart(manager: ServiceManager, service_id: str, old_pid: int) -> float:
+    """Wait until the service runs under a new PID; return the time it took."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < TIMEOUT:
+        service = manager.storage.get_service(service_id)
+        if service.status == ServiceStatus.RUNNING and service.pid not in (None, old_pid):
+            return time.perf_counter() - start
+        time.sleep(0.005)
+    raise RuntimeError("service was not restarted")
+
+
+def start_monitor(manager: ServiceManager, mode: str) -> ServiceMonitor:
+    """Start a monitor that detects exits the given way (asyncio: the asyncio engine)."""
+    if mode == "asyncio":
+        monitor = AsyncServiceMonitor(manager)
+        monitor._check_interval = CHECK_INTERVAL
+        monitor.start_monitoring()
+        return monitor
+
+    monitor = ServiceMonitor(manager)
+    monitor._check_interval = CHECK_INTERVAL
+    if mode != "SIGCHLD":
+        # As if the services were not our children, e.g. after a daemon restart
+        manager.process_manager.reaper.install = lambda: False
+    if mode != "pidfd":
+        monitor.exit_watcher._supported = False
+    monitor.start_monitoring()
+    return monitor
+
+
+def measure_latency(mode: str):
+    """Crash a monitored service repeatedly; return restart latencies in seconds."""
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["HOME"] = home
+        os.environ["XDG_RUNTIME_DIR"] = os.path.join(home, "run")
+        manager = ServiceManager()
+        service = manager.add_service(name="victim", command="sleep 600", working_dir=home)
+        manager.update_service(service.id, _configure)
+        manager.start_service(service.id)
+        monitor = start_monitor(manager, mode)
+
+        latencies = []
+        try:
+            for _ in range(CRASHES):
+                pid = manager.storage.get_service(service.id).pid
+                os.kill(pid, signal.SIGKILL)
+                latencies.append(wait_for_restart(manager, service.id, pid))
+        finally:
+            monitor.stop_monitoring()
+            manager.stop_service(service.id, force=True)
+        return latencies
+
+
+def measure_idle_cpu(mode: str) -> float:
+    """CPU seconds the monitor uses while IDLE_SERVICES services keep running."""
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["HOME"] = home
+        os.environ["XDG_RUNTIME_DIR"] = os.path.join(home, "run")
+        manager = ServiceManager()
+        services = manager.import_services(
+            [{"name": f"idle-{i}", "command": "sleep 600"} for i in range(IDLE_SERVICES)],
+            start=True,
+        )
+        monitor = start_monitor(manager, mode)
+        try:
+            # Let the first full check register the watches
+            time.sleep(1)
+            start = time.process_time()
+            time.sleep(IDLE_SECONDS)
+            return time.process_time() - start
+        finally:
+            monitor.stop_monitoring()
+            for service in services:
+                manager.stop_service(service.id, force=True)
+
+
+def _configure(service) -> None:
+    """Restart after RESTART_DELAY seconds every time, without giving up."""
+    service.restart_delay = RESTART_DELAY
+    service.restart_backoff = 1.0
+    service.restart_jitter = 0.0
+    service.max_restart_attempts = CRASHES * 2
+
+
+def main():
+    """Run the benchmark and print a table."""
+    print(f"Crash -> running again (restart_delay={RESTART_DELAY}s, interval={CHECK_INTERVAL}s)")
+    print(f"{'detection':>12} {'mean':>10} {'max':>10}")
+    for mode in MODES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            latencies = measure_latency(mode)
+        mean = sum(latencies) / len(latencies)
+        print(f"{mode:>12} {mean:>8.2f} s {max(latencies):>8.2f} s")
+
+    print(f"\nMonitor CPU over {IDLE_SECONDS}s with {IDLE_SERVICES} idle services")
+    for mode in MODES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cpu = measure_idle_cpu(mode)
+        print(f"{mode:>12} {cpu * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Tick cost benchmark: per-service psutil calls versus one process snapshot."""
+
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+
+# Add project path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from autostartx.process_manager import ProcessInfo, ProcessSnapshot
+
+FLEET_SIZES = [100, 1000]
+TICKS = 5
+
+
+def per_service_tick(pids) -> None:
+    """Status and health checks as done before: several psutil calls per service."""
+    for pid in pids:
+        if psutil.pid_exists(pid):
+            psutil.Process(pid).is_running()
+        info = ProcessInfo(pid)
+        if info.exists:
+            _ = (info.status, info.cpu_percent, info.memory_info, info.create_time)
+
+
+def snapshot_tick(pids, previous):
+    """The same checks against a single snapshot."""
+    snapshot = ProcessSnapshot.take(previous)
+    for pid in pids:
+        if snapshot.is_running(pid):
+            entry = snapshot.get(pid)
+            _ = (entry.status, snapshot.cpu_percent(pid), entry.rss, entry.create_time)
+    return snapshot
+
+
+def main():
+    """Run the benchmark and print a table."""
+    print(f"Mean tick cost ({len(psutil.pids())} processes on this system before spawning)")
+    print(f"{'services':>10} {'per-service':>14} {'snapshot':>14}")
+    for size in FLEET_SIZES:
+        processes = [subprocess.Popen(["sleep", "600"]) for _ in range(size)]
+        pids = [process.pid for process in processes]
+        try:
+            start = time.perf_counter()
+            for _ in range(TICKS):
+                per_service_tick(pids)
+            per_service = (time.perf_counter() - start) / TICKS
+
+            previous = None
+            start = time.perf_counter()
+            for _ in range(TICKS):
+                previous = snapshot_tick(pids, previous)
+            snapshot = (time.perf_counter() - start) / TICKS
+        finally:
+            for process in processes:
+                process.kill()
+                process.wait()
+        print(f"{size:>10} {per_service * 1000:>11.1f} ms {snapshot * 1000:>11.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
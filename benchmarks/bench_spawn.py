@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Spawn benchmark: time to start N services at once, per launch path.
+
+The posix_spawn path only applies to services whose working directory is the
+daemon's own; the benchmark runs from the services' directory so it is taken.
+Services added elsewhere (the add command records the directory they were added
+from) start through the Popen path.
+"""
+
+import contextlib
+import io
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from autostartx.config import ConfigManager
+from autostartx.models import ServiceInfo
+from autostartx.process_manager import ProcessManager
+
+CONCURRENT_STARTS = [1, 100, 1000]
+WORKERS = 8
+PATHS = ["legacy", "spec + Popen", "spec + posix_spawn"]
+PATH_LABELS = ["legacy", "spec + Popen", "posix_spawn, same cwd"]
+
+
+def legacy_start(manager: ProcessManager, service: ServiceInfo) -> int:
+    """Start a service the way it was done before launch specs; returns the PID."""
+    log_path = manager.config_manager.get_service_log_path(service.id)
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    with open(log_path, "a", encoding="utf-8") as log_file:
+        log_file.write(f"\n=== Service started: {time.strftime('%Y-%m-%d %H:%M:%S')} ===\n")
+        log_file.flush()
+        env = os.environ.copy()
+        env.update(service.env_vars)
+        process = subprocess.Popen(
+            shlex.split(service.command),
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            cwd=service.working_dir or os.getcwd(),
+            env=env,
+            start_new_session=True,
+        )
+    manager.reaper.track(service.id, process)
+    return process.pid
+
+
+def measure(path: str, count: int, home: str) -> float:
+    """Start count services on WORKERS threads; return seconds until all were spawned."""
+    manager = ProcessManager(ConfigManager(os.path.join(home, "config.toml")))
+    manager.use_posix_spawn = path == "spec + posix_spawn"
+    services = [
+        ServiceInfo(id=f"svc-{i}", name=f"svc-{i}", command="sleep 600", working_dir=home)
+        for i in range(count)
+    ]
+
+    def start(service: ServiceInfo) -> int:
+        if path == "legacy":
+            return legacy_start(manager, service)
+        manager.start_service(service)
+        return service.pid
+
+    # Specs are built when a service is added or first started, not per restart
+    for service in services:
+        manager.launch_spec(service)
+
+    started_at = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(WORKERS) as pool:
+            pids = [*pool.map(start, services)]
+    elapsed = time.perf_counter() - started_at
+
+    for pid in pids:
+        os.killpg(pid, signal.SIGKILL)
+    while manager.reaper.reap() or any(manager.reaper.is_tracked(pid) for pid in pids):
+        time.sleep(0.01)
+    return elapsed
+
+
+def main():
+    """Run the benchmark and print a table."""
+    with tempfile.TemporaryDirectory() as home:
+        # posix_spawn is only used when no directory change is needed
+        os.chdir(home)
+        print(f"Concurrent starts on {WORKERS} workers")
+        print(f"{'services':>10} " + " ".join(f"{label:>22}" for label in PATH_LABELS))
+        for count in CONCURRENT_STARTS:
+            times = [measure(path, count, home) for path in PATHS]
+            print(f"{count:>10} " + " ".join(f"{t * 1000:>19.1f} ms" for t in times))
+        print("Services in another directory than the daemon's take the Popen path.")
+
+
+if __name__ == "__main__":
+    main()
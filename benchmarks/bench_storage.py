@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Storage benchmark: per-update cost by backend, with and without split runtime state,
+and indexed lookups at fleet scale."""
+
+import os
+import sys
+import tempfile
+import time
+
+# Add project path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from autostartx.config import ConfigManager
+from autostartx.models import ServiceInfo, ServiceStatus
+from autostartx.storage import ServiceStorage
+
+FLEET_SIZES = [10, 1000, 10000]
+BACKENDS = ["json", "sqlite", "journal", "sharded"]
+UPDATES = 50
+LOOKUP_FLEET_SIZE = 10000
+LOOKUPS = 1000
+
+
+def make_storage(temp_dir: str, backend: str, size: int, split: bool = True) -> ServiceStorage:
+    """Create a storage populated with `size` services."""
+    config_manager = ConfigManager(os.path.join(temp_dir, "config.toml"))
+    config_manager.config.data_dir = os.path.join(temp_dir, "data")
+    config_manager.config.log_dir = os.path.join(temp_dir, "logs")
+    config_manager.config.runtime_dir = os.path.join(temp_dir, "run")
+    config_manager.config.storage_backend = backend
+    config_manager.config.split_runtime_state = split
+
+    storage = ServiceStorage(config_manager)
+    for i in range(size):
+        service_id = f"{i:08x}"
+        storage._services[service_id] = ServiceInfo(
+            id=service_id, name=f"service-{i}", command=f"sleep {i}", working_dir="/tmp"
+        )
+    storage.save_services()
+    storage.load_services()
+    return storage
+
+
+def bench_updates(storage: ServiceStorage) -> float:
+    """Return mean seconds per single-service status update."""
+    services = storage.get_all_services()
+    start = time.perf_counter()
+    for i in range(UPDATES):
+        service = services[i % len(services)]
+        service.update_status(ServiceStatus.RUNNING if i % 2 else ServiceStatus.STOPPED)
+        storage.update_service(service)
+    return (time.perf_counter() - start) / UPDATES
+
+
+def bench_lookups(storage: ServiceStorage) -> None:
+    """Compare indexed lookups with the linear scans they replaced."""
+    services = storage.get_all_services()
+    names = [services[i * 7 % len(services)].name for i in range(LOOKUPS)]
+    prefixes = [services[i * 13 % len(services)].id[:7] for i in range(LOOKUPS)]
+
+    def linear_by_name(name):
+        return next((s for s in storage._services.values() if s.name == name), None)
+
+    def linear_by_prefix(prefix):
+        return [s for s in storage._services.values() if s.id.startswith(prefix)]
+
+    def linear_by_status(status):
+        return [s for s in storage._services.values() if s.status == status]
+
+    cases = [
+        ("find_service(name)", lambda i: storage.find_service(names[i]),
+         lambda i: linear_by_name(names[i])),
+        ("ID prefix", lambda i: storage.get_services_by_prefix(prefixes[i]),
+         lambda i: linear_by_prefix(prefixes[i])),
+        ("by status", lambda i: storage.get_services_by_status(ServiceStatus.RUNNING),
+         lambda i: linear_by_status(ServiceStatus.RUNNING)),
+    ]
+
+    print(f"\nLookups over {LOOKUP_FLEET_SIZE} services (mean per call)")
+    print(f"{'lookup':>20} {'indexed':>14} {'linear scan':>14}")
+    for label, indexed, linear in cases:
+        timings = []
+        for func in (indexed, linear):
+            start = time.perf_counter()
+            for i in range(LOOKUPS):
+                func(i)
+            timings.append((time.perf_counter() - start) / LOOKUPS)
+        print(f"{label:>20} " + " ".join(f"{t * 1e6:>11.2f} us" for t in timings))
+
+
+def main():
+    """Run the benchmark and print a table."""
+    for split in (True, False):
+        layout = "split runtime state" if split else "runtime state in the definitions"
+        print(f"\nSingle-service update cost ({layout})")
+        print(f"{'services':>10} " + " ".join(f"{backend:>14}" for backend in BACKENDS))
+        for size in FLEET_SIZES:
+            row = []
+            for backend in BACKENDS:
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    storage = make_storage(temp_dir, backend, size, split)
+                    row.append(bench_updates(storage))
+                    storage.backend.close()
+            print(f"{size:>10} " + " ".join(f"{cost * 1000:>11.3f} ms" for cost in row))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        storage = make_storage(temp_dir, "sqlite", LOOKUP_FLEET_SIZE)
+        bench_lookups(storage)
+        storage.backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,7 @@ def main():
     echo_service = manager.add_service(
         name="demo-echo",
         command="echo 'Hello from Autostartx!'",
-        auto_restart=False,  # echo 命令运行完就退出，不需要重启
+        restart_on="on-failure",  # echo 命令正常退出后不再重启，仅在失败时重启
     )
     print(f"   服务已添加: {echo_service.name} ({echo_service.id})")
 
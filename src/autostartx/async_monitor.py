@@ -0,0 +1,385 @@
+"""Service monitor running on an asyncio event loop."""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import ensure_private_dir
+from .monitor import ServiceMonitor
+from .probes import AsyncProbeScheduler
+from .service_manager import ServiceManager
+from .watchers import ProcessExit
+
+# Seconds between removals of expired rotated service logs
+LOG_CLEANUP_INTERVAL = 3600
+
+
+class LoopWake(threading.Event):
+    """A wake event that also calls back into an event loop when set.
+
+    Stands in for the threading.Event that SIGCHLD, notify sockets and
+    probes set to wake the threaded monitor, so they need no changes.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._callback: Optional[Callable[[], None]] = None
+
+    def attach(
+        self,
+        loop: Optional[asyncio.AbstractEventLoop],
+        callback: Optional[Callable[[], None]],
+    ) -> None:
+        """Call callback on loop whenever the event is set (None: stop doing so)."""
+        self._loop = loop
+        self._callback = callback
+
+    def set(self) -> None:
+        """Set the event and schedule the callback."""
+        super().set()
+        loop, callback = self._loop, self._callback
+        if loop is not None and callback is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(callback)
+
+
+class LoopPidfdWatcher:
+    """PidfdWatcher's interface, with the pidfds registered on an event loop.
+
+    watch() may be called from any thread once attach() has been called;
+    exits are read by the loop, which sets `wake`.
+    """
+
+    def __init__(self, wake: threading.Event):
+        self.wake = wake
+        self._supported = hasattr(os, "pidfd_open")
+        self._fd_by_pid: Dict[int, int] = {}
+        self._exits: List[ProcessExit] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def supported(self) -> bool:
+        """Whether pidfds are available; if not, watch() always returns False."""
+        return self._supported
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Register pidfds on loop from now on."""
+        self._loop = loop
+
+    def watch(self, service_id: str, pid: int) -> bool:
+        """Start watching a process; returns False if it cannot be watched."""
+        if not self._supported or self._loop is None:
+            return False
+        with self._lock:
+            if pid in self._fd_by_pid:
+                return True
+
+        try:
+            fd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return False
+        except OSError as e:
+            print(f"Warning: pidfd unavailable ({e}), falling back to polling")
+            self._supported = False
+            return False
+
+        with self._lock:
+            self._fd_by_pid[pid] = fd
+        self._loop.call_soon_threadsafe(self._loop.add_reader, fd, self._on_exit, service_id, pid)
+        return True
+
+    def is_watched(self, pid: int) -> bool:
+        """Whether the process is being watched."""
+        with self._lock:
+            return pid in self._fd_by_pid
+
+    def unwatch(self, pid: int) -> None:
+        """Stop watching a process."""
+        with self._lock:
+            fd = self._fd_by_pid.pop(pid, None)
+        if fd is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._forget, fd)
+
+    def drain(self) -> List[ProcessExit]:
+        """Return and clear the exits seen since the last call."""
+        with self._lock:
+            exits, self._exits = self._exits, []
+        return exits
+
+    def close(self) -> None:
+        """Close every pidfd (on the loop)."""
+        with self._lock:
+            fds = [*self._fd_by_pid.values()]
+            self._fd_by_pid.clear()
+        for fd in fds:
+            self._forget(fd)
+
+    def _on_exit(self, service_id: str, pid: int) -> None:
+        """Loop: a watched process exited."""
+        with self._lock:
+            fd = self._fd_by_pid.pop(pid, None)
+            if fd is None:
+                return
+            self._exits.append(ProcessExit(service_id, pid, None))
+        self._forget(fd)
+        self.wake.set()
+
+    def _forget(self, fd: int) -> None:
+        """Loop: unregister and close a pidfd."""
+        asyncio.get_running_loop().remove_reader(fd)
+        os.close(fd)
+
+
+class AsyncServiceMonitor(ServiceMonitor):
+    """Service monitor whose events all go through one asyncio event loop.
+
+    Process exits (pidfds and SIGCHLD), restart timers, liveness probes,
+    periodic checks, log cleanup and a control socket share the loop in a
+    single thread. Work that blocks on psutil or storage runs on one
+    executor thread, so it never overlaps, just like in the threaded
+    monitor whose handlers it reuses.
+    """
+
+    def __init__(self, service_manager: ServiceManager):
+        super().__init__(service_manager)
+        # Everything that woke the threaded loop now calls back into this one
+        self._wake = LoopWake()
+        service_manager.process_manager.reaper.wake = self._wake
+        service_manager.notify.wake = self._wake
+        self.exit_watcher: LoopPidfdWatcher = LoopPidfdWatcher(self._wake)
+        self.probes: AsyncProbeScheduler = AsyncProbeScheduler(
+            self._wake, service_manager.config_manager.config.max_probe_workers
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._check_requested: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+        self._wake_running = False
+        self._restart_timer: Optional[asyncio.TimerHandle] = None
+        self._next_restart: Optional[float] = None
+
+    def start_monitoring(self) -> None:
+        """Start monitoring."""
+        if self._monitoring:
+            return
+
+        self._monitoring = True
+        self._ready.clear()
+        # React to exits of our own children at once instead of at the next check
+        self.service_manager.process_manager.reaper.install()
+        self._monitor_thread = threading.Thread(
+            target=asyncio.run, args=(self._run(),), daemon=True
+        )
+        self._monitor_thread.start()
+        self._ready.wait(timeout=10)
+        print("🔍 Service monitoring started (asyncio)")
+
+    def stop_monitoring(self) -> None:
+        """Stop monitoring."""
+        self._monitoring = False
+        loop, stopped = self._loop, self._stopped
+        if loop is not None and stopped is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(stopped.set)
+        if self._monitor_thread and self._monitor_thread.is_alive():
+            self._monitor_thread.join(timeout=10)
+        self._discard_pending()
+        self.service_manager.notify.close()
+        print("⏹️ Service monitoring stopped")
+
+    def request_check(self) -> None:
+        """Check all services now instead of at the next interval."""
+        loop, check_requested = self._loop, self._check_requested
+        if loop is not None and check_requested is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(check_requested.set)
+
+    def status(self) -> Dict[str, Any]:
+        """What the monitor is doing, as reported on the control socket."""
+        services = self.service_manager.storage.get_all_services()
+        return {
+            "engine": "asyncio",
+            "services": len(services),
+            "auto_restart": sum(1 for service in services if service.auto_restart),
+            "pending_restarts": len(self._pending_restarts),
+            "all_watched": self._all_watched,
+        }
+
+    async def _run(self) -> None:
+        """Loop thread: serve events until stop_monitoring()."""
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(1, thread_name_prefix="monitor")
+        stopped = asyncio.Event()
+        check_requested = asyncio.Event()
+        self._executor, self._stopped, self._check_requested = executor, stopped, check_requested
+        self._loop = loop
+        self._wake.attach(loop, self._on_wake)
+        self.exit_watcher.attach(loop)
+        self.probes.attach(loop)
+
+        server = await self._start_control_server()
+        tasks = [
+            loop.create_task(self._check_periodically(check_requested)),
+            loop.create_task(self._clean_logs_periodically()),
+        ]
+        self._ready.set()
+        try:
+            await stopped.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._restart_timer is not None:
+                self._restart_timer.cancel()
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+                self._remove_control_socket()
+            self.exit_watcher.close()
+            self.probes.close()
+            executor.shutdown(wait=True)
+            self._wake.attach(None, None)
+
+    async def _blocking(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run blocking monitor work on the executor, then re-arm the restart timer."""
+
+        def job() -> Any:
+            try:
+                return fn(*args)
+            finally:
+                self._next_restart = self._restart_heap[0][0] if self._restart_heap else None
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self._arm_restart_timer()
+
+    def _arm_restart_timer(self) -> None:
+        """Fire _restart_due() when the earliest pending restart is due."""
+        if self._restart_timer is not None:
+            self._restart_timer.cancel()
+            self._restart_timer = None
+        if self._next_restart is not None:
+            delay = max(0.0, self._next_restart - time.monotonic())
+            loop = asyncio.get_running_loop()
+            self._restart_timer = loop.call_later(delay, self._spawn, self._restart_due)
+
+    def _spawn(self, fn: Callable[[], None]) -> None:
+        """Run blocking work in the background, logging what it raises."""
+
+        async def run() -> None:
+            try:
+                await self._blocking(fn)
+            except Exception as e:
+                print(f"Error occurred while monitoring services: {e}")
+
+        asyncio.get_running_loop().create_task(run())
+
+    def _on_wake(self) -> None:
+        """Loop: an exit, failed probe or notification arrived; handle it once."""
+        if self._wake_running:
+            return  # Handled again when the running pass ends, the event is still set
+        self._wake_running = True
+        asyncio.get_running_loop().create_task(self._handle_wake())
+
+    async def _handle_wake(self) -> None:
+        """Handle events until no more arrive in the meantime."""
+        try:
+            while self._wake.is_set() and self._monitoring:
+                self._wake.clear()
+                await self._blocking(self._handle_events)
+        except Exception as e:
+            print(f"Error occurred while monitoring services: {e}")
+        finally:
+            self._wake_running = False
+
+    async def _check_periodically(self, check_requested: asyncio.Event) -> None:
+        """Task: full checks every interval, on request, or when storage changed."""
+        storage = self.service_manager.storage
+        last_check = float("-inf")
+        while True:
+            try:
+                if (
+                    time.monotonic() >= self._next_check(last_check)
+                    or check_requested.is_set()
+                    or await self._blocking(storage.has_changed)
+                ):
+                    check_requested.clear()
+                    await self._blocking(self._check_services)
+                    last_check = time.monotonic()
+            except Exception as e:
+                print(f"Error occurred while monitoring services: {e}")
+                last_check = time.monotonic()
+
+            next_check = self._next_check(last_check)
+            timeout = max(0.0, min(self._check_interval, next_check - time.monotonic()))
+            try:
+                await asyncio.wait_for(check_requested.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _clean_logs_periodically(self) -> None:
+        """Task: remove rotated service logs past their retention time.
+
+        Services write straight to their log files, so there is no output
+        to pump; keeping the log directory in bounds is the loop's part.
+        """
+        from .logger import LogManager
+
+        log_manager = None
+        while True:
+            await asyncio.sleep(LOG_CLEANUP_INTERVAL)
+            if log_manager is None:
+                log_manager = LogManager(self.service_manager.config_manager)
+            await self._blocking(log_manager.cleanup_old_logs)
+
+    async def _start_control_server(self) -> Optional[asyncio.AbstractServer]:
+        """Listen on the control socket; None if it cannot be created."""
+        path = self.service_manager.config_manager.get_control_socket_path()
+        try:
+            ensure_private_dir(os.path.dirname(path))
+            return await asyncio.start_unix_server(self._serve_control, path)
+        except OSError as e:
+            print(f"Warning: Failed to create control socket {path}: {e}")
+            return None
+
+    def _remove_control_socket(self) -> None:
+        """Unlink the control socket file."""
+        try:
+            os.unlink(self.service_manager.config_manager.get_control_socket_path())
+        except OSError:
+            pass
+
+    async def _serve_control(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer one command per line with one JSON line.
+
+        Commands: "ping", "status" and "check" (check all services now).
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("utf-8", errors="replace").strip()
+                reply: Dict[str, Any]
+                if command == "ping":
+                    reply = {"ok": True}
+                elif command == "status":
+                    reply = {"ok": True, **await self._blocking(self.status)}
+                elif command == "check":
+                    self.request_check()
+                    reply = {"ok": True}
+                else:
+                    reply = {"ok": False, "error": f"Unknown command '{command}'"}
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,570 @@
+"""Pluggable persistence backends for service data."""
+
+import glob
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from .config import ConfigManager
+
+# A change set maps service ID to its serialized record, or None for removal
+ChangeSet = Dict[str, Optional[Dict[str, Any]]]
+
+
+class StorageBackend(ABC):
+    """Base class for service data backends."""
+
+    name = ""
+    # Lazy backends can list services and load them one at a time
+    supports_lazy_load = False
+
+    def __init__(self, config_manager: ConfigManager):
+        self.config_manager = config_manager
+
+    @abstractmethod
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Load all service records keyed by service ID."""
+
+    @abstractmethod
+    def apply(self, changes: ChangeSet) -> None:
+        """Persist a set of upserted or removed service records."""
+
+    def load_index(self) -> Dict[str, str]:
+        """Load the service name for every service ID without loading the records."""
+        return {service_id: record["name"] for service_id, record in self.load().items()}
+
+    def load_one(self, service_id: str) -> Optional[Dict[str, Any]]:
+        """Load a single service record."""
+        return self.load().get(service_id)
+
+    def record_runtime(self, records: Dict[str, Dict[str, Any]]) -> None:  # noqa: B027
+        """Observe runtime state kept outside the backend, for history and status indexes."""
+
+    def has_changed(self) -> bool:
+        """Whether another process modified the data since our last load or write."""
+        return False
+
+    def close(self) -> None:  # noqa: B027
+        """Release backend resources."""
+
+    def _migrate_json(self, target: str) -> None:
+        """Import a legacy services.json into this (empty) backend and set it aside."""
+        json_path = self.config_manager.get_services_db_path()
+        if not os.path.exists(json_path):
+            return
+
+        with open(json_path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.apply(data)
+        os.replace(json_path, json_path + ".migrated")
+        print(f"Migrated {len(data)} service(s) from {json_path} to {target}")
+
+
+class JsonBackend(StorageBackend):
+    """Single services.json file holding every service record."""
+
+    name = "json"
+
+    def __init__(self, config_manager: ConfigManager):
+        super().__init__(config_manager)
+        self.path = config_manager.get_services_db_path()
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._stat_key: Optional[Tuple[int, int, int]] = None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Load service records from file."""
+        self._stat_key = _stat_key(self.path)
+        if self._stat_key is None:
+            self._records = {}
+            return {}
+
+        with open(self.path, encoding="utf-8") as f:
+            self._records = json.load(f)
+        return dict(self._records)
+
+    def apply(self, changes: ChangeSet) -> None:
+        """Merge changes into the record mirror and atomically replace the file."""
+        for service_id, record in changes.items():
+            if record is None:
+                self._records.pop(service_id, None)
+            else:
+                self._records[service_id] = record
+
+        atomic_write_json(self.path, self._records, indent=2)
+        self._stat_key = _stat_key(self.path)
+
+    def has_changed(self) -> bool:
+        """Compare inode, mtime and size with the file we last loaded or wrote."""
+        return _stat_key(self.path) != self._stat_key
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite database in WAL mode with one row per service.
+
+    The indexed status column follows runtime state kept outside the rows too,
+    so status queries work with either layout. Status-only updates leave the
+    definitions version alone, so other processes don't reload for them.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, config_manager: ConfigManager):
+        super().__init__(config_manager)
+        self.path = config_manager.get_services_sqlite_path()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS services ("
+            "id TEXT PRIMARY KEY, name TEXT NOT NULL, status TEXT, data TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_services_name ON services(name)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_services_status ON services(status)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('definitions_version', 0)")
+        self._conn.commit()
+        self._data_version = self._get_data_version()
+        self._definitions_version = self._get_definitions_version()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Load service records, migrating services.json on first run."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM services").fetchone()
+        if not count:
+            self._migrate_json(self.path)
+        rows = self._conn.execute("SELECT id, data FROM services").fetchall()
+        self._data_version = self._get_data_version()
+        self._definitions_version = self._get_definitions_version()
+        return {service_id: json.loads(data) for service_id, data in rows}
+
+    def query(
+        self, status: Optional[str] = None, name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Load service records filtered by status and/or name."""
+        sql = "SELECT data FROM services"
+        clauses = []
+        params = []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if name is not None:
+            clauses.append("name = ?")
+            params.append(name)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return [json.loads(data) for (data,) in self._conn.execute(sql, params)]
+
+    def apply(self, changes: ChangeSet) -> None:
+        """Upsert or delete only the changed rows."""
+        upserts = []
+        deletes = []
+        for service_id, record in changes.items():
+            if record is None:
+                deletes.append((service_id,))
+            else:
+                upserts.append(
+                    (
+                        service_id,
+                        record.get("name", ""),
+                        record.get("status"),
+                        json.dumps(record, ensure_ascii=False),
+                    )
+                )
+
+        with self._conn:
+            if upserts:
+                # Definitions without a status leave the runtime status in place
+                self._conn.executemany(
+                    "INSERT INTO services (id, name, status, data) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET name = excluded.name, "
+                    "status = COALESCE(excluded.status, status), data = excluded.data",
+                    upserts,
+                )
+            if deletes:
+                self._conn.executemany("DELETE FROM services WHERE id = ?", deletes)
+            self._conn.execute(
+                "UPDATE meta SET value = value + 1 WHERE key = 'definitions_version'"
+            )
+        self._definitions_version = self._get_definitions_version()
+
+    def record_runtime(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Keep the status column in step with runtime state stored elsewhere."""
+        updates = [
+            (record["status"], service_id, record["status"])
+            for service_id, record in records.items()
+            if "status" in record
+        ]
+        if not updates:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE services SET status = ? WHERE id = ? AND status IS NOT ?", updates
+            )
+
+    def has_changed(self) -> bool:
+        """Whether another connection changed the definitions since our last load."""
+        data_version = self._get_data_version()
+        if data_version == self._data_version:
+            return False
+        if self._get_definitions_version() != self._definitions_version:
+            return True
+        # Only statuses moved, which the runtime store reports by itself
+        self._data_version = data_version
+        return False
+
+    def close(self) -> None:
+        """Close database connection."""
+        self._conn.close()
+
+    def _get_data_version(self) -> int:
+        """Get the SQLite data version, bumped by other connections' commits."""
+        (version,) = self._conn.execute("PRAGMA data_version").fetchone()
+        return int(version)
+
+    def _get_definitions_version(self) -> int:
+        """Get the counter bumped by every write of service records."""
+        (version,) = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'definitions_version'"
+        ).fetchone()
+        return int(version)
+
+
+class JournalBackend(StorageBackend):
+    """services.json snapshot plus an append-only journal of field deltas.
+
+    Each write appends one line per changed service, e.g.
+    ``{"ts": 1700000000.0, "id": "ab12cd34", "set": {"status": "running", "pid": 42}}``
+    or ``{"ts": ..., "id": ..., "del": true}``. Runtime state stored outside the
+    backend is journalled as ``"rt"`` entries, which only feed history(). Once the journal holds
+    ``journal_compact_threshold`` records it is folded into the snapshot and
+    archived, keeping ``journal_history_segments`` old segments for post-mortems.
+    """
+
+    name = "journal"
+
+    def __init__(self, config_manager: ConfigManager):
+        super().__init__(config_manager)
+        self.snapshot_path = config_manager.get_services_db_path()
+        self.journal_path = config_manager.get_services_journal_path()
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._journal_entries = 0
+        # Byte length of the journal's valid prefix; a torn final line is cut on next write
+        self._journal_size = 0
+        self._stat_keys: Tuple[Optional[Tuple[int, int, int]], ...] = (None, None)
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Load the snapshot and replay the journal on top of it."""
+        self._stat_keys = self._get_stat_keys()
+        self._records = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                self._records = json.load(f)
+
+        self._journal_entries = 0
+        self._journal_size = 0
+        for entry, end_offset in self._read_journal(self.journal_path):
+            self._replay(entry)
+            self._journal_entries += 1
+            self._journal_size = end_offset
+        return dict(self._records)
+
+    def apply(self, changes: ChangeSet) -> None:
+        """Append field deltas for the changed services, compacting when the journal is full."""
+        now = time.time()
+        lines = []
+        for service_id, record in changes.items():
+            previous = self._records.get(service_id)
+            if record is None:
+                if previous is None:
+                    continue
+                entry: Dict[str, Any] = {"ts": now, "id": service_id, "del": True}
+            else:
+                delta = {
+                    key: value
+                    for key, value in record.items()
+                    if previous is None or previous.get(key, _MISSING) != value
+                }
+                if not delta:
+                    continue
+                entry = {"ts": now, "id": service_id, "set": delta}
+            self._replay(entry)
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        self._append_entries(lines)
+
+    def record_runtime(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Journal runtime state changes for history."""
+        now = time.time()
+        self._append_entries(
+            [
+                json.dumps({"ts": now, "id": service_id, "rt": record}, ensure_ascii=False) + "\n"
+                for service_id, record in records.items()
+            ]
+        )
+
+    def compact(self) -> None:
+        """Fold the journal into a new snapshot and archive the journal segment."""
+        atomic_write_json(self.snapshot_path, self._records, indent=2)
+        if os.path.exists(self.journal_path):
+            os.replace(self.journal_path, f"{self.journal_path}.{time.time_ns()}")
+        self._journal_entries = 0
+        self._journal_size = 0
+
+        keep = self.config_manager.config.journal_history_segments
+        segments = self._archived_segments()
+        for old_segment in segments[: max(len(segments) - keep, 0)]:
+            try:
+                os.unlink(old_segment)
+            except OSError:
+                pass
+        self._stat_keys = self._get_stat_keys()
+
+    def history(self, service_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get journal records, oldest first, from archived segments and the live journal."""
+        records = []
+        for path in self._archived_segments() + [self.journal_path]:
+            for entry, _ in self._read_journal(path):
+                if service_id is None or entry.get("id") == service_id:
+                    records.append(entry)
+        return records
+
+    def status_history(self, service_id: str) -> List[Tuple[float, str]]:
+        """Get (timestamp, status) transitions recorded for a service."""
+        transitions: List[Tuple[float, str]] = []
+        for entry in self.history(service_id):
+            fields = entry.get("set") or entry.get("rt") or {}
+            if "status" in fields and (not transitions or transitions[-1][1] != fields["status"]):
+                transitions.append((entry["ts"], fields["status"]))
+        return transitions
+
+    def has_changed(self) -> bool:
+        """Compare snapshot and journal stat keys with our last load or write."""
+        return self._get_stat_keys() != self._stat_keys
+
+    def _replay(self, entry: Dict[str, Any]) -> None:
+        """Apply one journal entry to the in-memory records."""
+        service_id = entry["id"]
+        if "rt" in entry:
+            return
+        if entry.get("del"):
+            self._records.pop(service_id, None)
+        else:
+            record = dict(self._records.get(service_id, {}))
+            record.update(entry["set"])
+            self._records[service_id] = record
+
+    def _append_entries(self, lines: List[str]) -> None:
+        """Append journal lines, compacting when the journal is full."""
+        if lines:
+            self._append(lines)
+
+        if self._journal_entries >= self.config_manager.config.journal_compact_threshold:
+            self.compact()
+        self._stat_keys = self._get_stat_keys()
+
+    def _append(self, lines: List[str]) -> None:
+        """Append lines to the journal and fsync them."""
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        with open(self.journal_path, "ab") as f:
+            if f.tell() != self._journal_size:
+                # Drop a partial line left by a crash mid-append
+                f.truncate(self._journal_size)
+                f.seek(self._journal_size)
+            data = "".join(lines).encode("utf-8")
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_size += len(data)
+        self._journal_entries += len(lines)
+
+    def _read_journal(self, path: str) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """Yield (entry, end offset) for each complete, valid journal line."""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            offset = 0
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    break  # Torn write
+                try:
+                    entry = json.loads(raw_line)
+                except ValueError:
+                    break
+                offset += len(raw_line)
+                yield entry, offset
+
+    def _archived_segments(self) -> List[str]:
+        """Get archived journal segments, oldest first."""
+        segments = glob.glob(glob.escape(self.journal_path) + ".*")
+        return sorted(segments, key=lambda path: int(path.rsplit(".", 1)[1]))
+
+    def _get_stat_keys(self) -> Tuple[Optional[Tuple[int, int, int]], ...]:
+        """Change tokens for the snapshot and the journal."""
+        return (_stat_key(self.snapshot_path), _stat_key(self.journal_path))
+
+
+class ShardedBackend(StorageBackend):
+    """One small file per service plus a lightweight ID -> name index.
+
+    An update rewrites only the changed services' files, so writers touching
+    different services never rewrite each other's data, and a lookup by ID
+    opens a single file.
+    """
+
+    name = "sharded"
+    supports_lazy_load = True
+
+    def __init__(self, config_manager: ConfigManager):
+        super().__init__(config_manager)
+        self.shard_dir = config_manager.get_services_shard_dir()
+        self.index_path = os.path.join(self.shard_dir, "index.json")
+        self._index: Dict[str, str] = {}
+        self._dir_mtime: Optional[int] = None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Load every shard, reading files in parallel."""
+        if not os.path.isdir(self.shard_dir):
+            self._migrate_json(self.shard_dir)
+        self._dir_mtime = self._get_dir_mtime()
+        try:
+            service_ids = [
+                name[: -len(".json")]
+                for name in os.listdir(self.shard_dir)
+                if name.endswith(".json") and name != "index.json" and not name.startswith(".")
+            ]
+        except FileNotFoundError:
+            service_ids = []
+
+        with ThreadPoolExecutor(max_workers=min(32, len(service_ids) or 1)) as executor:
+            shards = dict(zip(service_ids, executor.map(self._read_shard, service_ids)))
+        records = {service_id: record for service_id, record in shards.items() if record}
+        self._index = {service_id: record["name"] for service_id, record in records.items()}
+        return records
+
+    def load_index(self) -> Dict[str, str]:
+        """Load the ID -> name index, rebuilding it from the shards if missing."""
+        if not os.path.isdir(self.shard_dir):
+            self._migrate_json(self.shard_dir)
+        self._dir_mtime = self._get_dir_mtime()
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self._index = json.load(f)
+        except FileNotFoundError:
+            self.load()
+            if os.path.isdir(self.shard_dir):
+                atomic_write_json(self.index_path, self._index)
+        return dict(self._index)
+
+    def load_one(self, service_id: str) -> Optional[Dict[str, Any]]:
+        """Load a single shard."""
+        return self._read_shard(service_id)
+
+    def apply(self, changes: ChangeSet) -> None:
+        """Rewrite or delete the changed shards, updating the index on add/remove."""
+        index_changed = False
+        for service_id, record in changes.items():
+            if record is None:
+                try:
+                    os.unlink(self._shard_path(service_id))
+                except FileNotFoundError:
+                    pass
+                index_changed |= self._index.pop(service_id, None) is not None
+            else:
+                atomic_write_json(self._shard_path(service_id), record, indent=2)
+                if self._index.get(service_id) != record.get("name"):
+                    self._index[service_id] = record.get("name", "")
+                    index_changed = True
+
+        if index_changed:
+            atomic_write_json(self.index_path, self._index)
+        self._dir_mtime = self._get_dir_mtime()
+
+    def has_changed(self) -> bool:
+        """Directory mtime changes whenever a shard is renamed in or unlinked."""
+        return self._get_dir_mtime() != self._dir_mtime
+
+    def _read_shard(self, service_id: str) -> Optional[Dict[str, Any]]:
+        """Read one shard, or None if it does not exist or is unreadable."""
+        try:
+            with open(self._shard_path(service_id), encoding="utf-8") as f:
+                record: Dict[str, Any] = json.load(f)
+                return record
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            print(f"Warning: Failed to load service {service_id}: {e}")
+            return None
+
+    def _shard_path(self, service_id: str) -> str:
+        """Get shard path for a service."""
+        return os.path.join(self.shard_dir, f"{service_id}.json")
+
+    def _get_dir_mtime(self) -> Optional[int]:
+        """Get shard directory mtime."""
+        try:
+            return os.stat(self.shard_dir).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = None) -> None:
+    """Write JSON via temp file, fsync and rename so readers never see a partial file."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Persist the rename itself
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int, int]]:
+    """Cheap change token for a file: (inode, mtime_ns, size)."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+_MISSING = object()
+
+BACKENDS: Dict[str, Type[StorageBackend]] = {
+    JsonBackend.name: JsonBackend,
+    SQLiteBackend.name: SQLiteBackend,
+    JournalBackend.name: JournalBackend,
+    ShardedBackend.name: ShardedBackend,
+}
+
+
+def create_backend(config_manager: ConfigManager) -> StorageBackend:
+    """Create the storage backend selected in configuration."""
+    backend_name = config_manager.config.storage_backend
+    try:
+        backend_class = BACKENDS[backend_name]
+    except KeyError:
+        raise ValueError(f"Unknown storage backend '{backend_name}'") from None
+    return backend_class(config_manager)
@@ -2,9 +2,11 @@
 
 import os
 import platform
+import signal
 import subprocess
 import sys
 import time
+from typing import Callable, Collection, Dict, List, Optional, Tuple
 
 import click
 from rich.console import Console
@@ -15,8 +17,10 @@ from rich.text import Text
 from . import __version__
 from .daemon import AutostartxDaemon
 from .interactive import confirm_action, select_service
-from .models import ServiceStatus
+from .manifest import MANIFEST_FORMATS, detect_format, dump_manifest, load_manifest
+from .models import RESTART_MODES, ServiceInfo, ServiceStatus
 from .monitor import AutoRestartManager
+from .process_manager import OperationResult
 from .service_manager import ServiceManager
 
 console = Console()
@@ -36,6 +40,51 @@ def _get_service_identifier(manager, id, name, filter_status=None, prompt="Pleas
     return service_identifier
 
 
+def _resolve_services(
+    manager: ServiceManager,
+    names: Tuple[str, ...],
+    all_services: bool,
+    statuses: Collection[ServiceStatus],
+) -> List[ServiceInfo]:
+    """Services given by ID or name, or with --all every service in one of statuses."""
+    if all_services:
+        return [s for s in manager.list_services() if s.status in statuses]
+
+    services: Dict[str, ServiceInfo] = {}
+    for service_identifier in names:
+        service = manager.get_service(service_identifier)
+        if service:
+            services[service.id] = service
+        else:
+            console.print(f"❌ Service not found: {service_identifier}", style="red")
+    return [*services.values()]
+
+
+def _run_bulk(
+    services: List[ServiceInfo],
+    run: Callable[[List[str]], Dict[str, OperationResult]],
+    verb: str,
+) -> None:
+    """Run a bulk operation, printing per-service and total timings."""
+    if not services:
+        console.print("No services to process")
+        return
+
+    started_at = time.monotonic()
+    results = run([service.id for service in services])
+    elapsed = time.monotonic() - started_at
+
+    succeeded = 0
+    for service in services:
+        result = results[service.id]
+        if result.success:
+            succeeded += 1
+            console.print(f"✅ {service.name} ({result.elapsed:.2f}s)")
+        else:
+            console.print(f"❌ {service.name} failed ({result.elapsed:.2f}s)", style="red")
+    console.print(f"🎯 {verb} {succeeded}/{len(services)} service(s) in {elapsed:.2f}s")
+
+
 def check_systemd_support():
     """Check if the system supports systemd."""
     if platform.system() != "Linux":
@@ -73,9 +122,46 @@ def cli(ctx, config):
 @click.argument("command")
 @click.option("--name", help="Service name")
 @click.option("--no-auto-restart", is_flag=True, help="Disable auto restart")
+@click.option(
+    "--restart-on",
+    type=click.Choice(RESTART_MODES),
+    help="Which exits are restarted [default: restart_on from config]",
+)
+@click.option(
+    "--success-exit-code",
+    "success_exit_codes",
+    type=int,
+    multiple=True,
+    help="Exit code besides 0 that counts as a clean exit (repeatable)",
+)
 @click.option("--working-dir", help="Working directory")
+@click.option(
+    "--ready",
+    "ready_check",
+    default="",
+    help="Readiness probe: tcp:[host:]port, http(s)://..., exec:<command> or log:<regex>",
+)
+@click.option("--ready-timeout", default=30, show_default=True, help="Seconds to wait for ready")
+@click.option("--live", "live_check", default="", help="Liveness probe, same forms as --ready")
+@click.option("--live-interval", default=30, show_default=True, help="Seconds between probes")
+@click.option("--notify", is_flag=True, help="Service speaks sd_notify (READY=1 marks it ready)")
+@click.option("--watchdog", default=0, help="Restart if no WATCHDOG=1 for this many seconds")
 @click.pass_context
-def add(ctx, command, name, no_auto_restart, working_dir):
+def add(
+    ctx,
+    command,
+    name,
+    no_auto_restart,
+    restart_on,
+    success_exit_codes,
+    working_dir,
+    ready_check,
+    ready_timeout,
+    live_check,
+    live_interval,
+    notify,
+    watchdog,
+):
     """Add new service."""
     manager = ServiceManager(ctx.obj.get("config_path"))
 
@@ -92,11 +178,19 @@ def add(ctx, command, name, no_auto_restart, working_dir):
             command=command,
             auto_restart=auto_restart,
             working_dir=working_dir,
+            ready_check=ready_check,
+            ready_timeout=ready_timeout,
+            live_check=live_check,
+            live_interval=live_interval,
+            notify=notify or watchdog > 0,
+            watchdog_sec=watchdog,
+            restart_on=restart_on or "",
+            success_exit_codes=success_exit_codes,
         )
 
         console.print(f"✅ Service added: {service.name} ({service.id})")
         console.print(f"Command: {service.command}")
-        console.print(f"Auto restart: {'Enabled' if service.auto_restart else 'Disabled'}")
+        console.print(f"Auto restart: {_format_auto_restart(service)}")
 
         # Ask if start immediately
         try:
@@ -116,6 +210,53 @@ def add(ctx, command, name, no_auto_restart, working_dir):
         sys.exit(1)
 
 
+@cli.command("import")
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(MANIFEST_FORMATS), help="Manifest format")
+@click.option("--start", is_flag=True, help="Start imported services")
+@click.option("--workers", type=int, help="Parallel starts [default: max_parallel_operations]")
+@click.pass_context
+def import_services(
+    ctx: click.Context, manifest: str, fmt: Optional[str], start: bool, workers: Optional[int]
+) -> None:
+    """Import services from a TOML or JSON manifest."""
+    manager = ServiceManager(ctx.obj.get("config_path"))
+
+    try:
+        entries = load_manifest(manifest, fmt)
+        services = manager.import_services(entries)
+    except ValueError as e:
+        console.print(f"❌ Error: {e}", style="red")
+        sys.exit(1)
+    except Exception as e:
+        console.print(f"❌ Failed to import services: {e}", style="red")
+        sys.exit(1)
+
+    console.print(f"✅ Imported {len(services)} service(s) from {manifest}")
+
+    if start and services:
+        _run_bulk(services, lambda ids: manager.start_many(ids, workers), "Started")
+
+
+@cli.command()
+@click.argument("output", required=False, type=click.Path(dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(MANIFEST_FORMATS), help="Manifest format")
+@click.pass_context
+def export(ctx: click.Context, output: Optional[str], fmt: Optional[str]) -> None:
+    """Export service definitions as a TOML or JSON manifest."""
+    manager = ServiceManager(ctx.obj.get("config_path"))
+    services = manager.storage.get_all_services()
+    content = dump_manifest(services, fmt or detect_format(output or ""))
+
+    if not output:
+        click.echo(content, nl=False)
+        return
+
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(content)
+    console.print(f"✅ Exported {len(services)} service(s) to {output}")
+
+
 @cli.command()
 @click.option("--status", is_flag=True, help="Show detailed status")
 @click.pass_context
@@ -167,8 +308,9 @@ def list(ctx, status):
 @cli.command()
 @click.option("--id", help="Service ID")
 @click.option("--name", help="Service name")
+@click.option("--history", is_flag=True, help="Show recent unexpected exits and restarts")
 @click.pass_context
-def status(ctx, id, name):
+def status(ctx, id, name, history):
     """Show service status."""
     manager = ServiceManager(ctx.obj.get("config_path"))
 
@@ -193,9 +335,27 @@ def status(ctx, id, name):
     status_text.append(f"Name: {service.name}")
     status_text.append(f"Command: {service.command}")
     status_text.append(f"Status: {service.status.value}")
-    status_text.append(f"Auto restart: {'Enabled' if service.auto_restart else 'Disabled'}")
+    status_text.append(f"Auto restart: {_format_auto_restart(service)}")
     status_text.append(f"Restart count: {service.restart_count}")
+    policy = service.restart_policy
+    window = f"{policy.window}s" if policy.window > 0 else "ever"
+    status_text.append(
+        f"Restart policy: {policy.initial_delay}s x{policy.multiplier} up to "
+        f"{policy.max_delay}s, at most {policy.max_restarts} per {window}"
+    )
+    if service.last_exit_code is not None:
+        status_text.append(f"Last exit code: {service.last_exit_code}")
     status_text.append(f"Working directory: {service.working_dir}")
+    if service.ready_check:
+        status_text.append(f"Readiness probe: {service.ready_check}")
+    if service.live_check:
+        status_text.append(f"Liveness probe: {service.live_check} (every {service.live_interval}s)")
+    if service.watchdog_sec:
+        status_text.append(f"Watchdog: {service.watchdog_sec}s")
+    if service.notify_status:
+        status_text.append(f"Service status: {service.notify_status}")
+    if service.time_to_ready is not None:
+        status_text.append(f"Time to ready: {service.time_to_ready:.2f}s")
 
     if process_info:
         status_text.append(f"Process ID: {process_info['pid']}")
@@ -223,15 +383,76 @@ def status(ctx, id, name):
     )
     console.print(panel)
 
+    if history:
+        _print_restart_history(service)
+
+
+def _format_auto_restart(service: ServiceInfo) -> str:
+    """Whether and on which exits a service is restarted."""
+    if not service.auto_restart:
+        return "Disabled"
+    text = f"Enabled (on {service.restart_on})"
+    if service.success_exit_codes:
+        codes = ", ".join(_format_exit_code(code) for code in service.success_exit_codes)
+        text += f", clean exit codes: 0, {codes}"
+    return text
+
+
+def _print_restart_history(service: ServiceInfo) -> None:
+    """Print a service's recent unexpected exits, newest first."""
+    records = [*service.restart_history] if service.restart_history else []
+    if not records:
+        console.print("No unexpected exits recorded")
+        return
+
+    table = Table(title=f"Restart History - {service.name}")
+    table.add_column("Exited", style="dim")
+    table.add_column("Exit", justify="right")
+    table.add_column("Uptime", justify="right")
+    table.add_column("Restarted After", justify="right")
+    for record in reversed(records):
+        table.add_row(
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.exited_at)),
+            _format_exit_code(record.exit_code),
+            f"{record.uptime:.1f}s",
+            "-" if record.time_to_restart is None else f"{record.time_to_restart:.1f}s",
+        )
+    console.print(table)
+
+
+def _format_exit_code(exit_code: Optional[int]) -> str:
+    """Exit code, or the signal name for processes killed by a signal."""
+    if exit_code is None:
+        return "?"
+    if exit_code < 0:
+        try:
+            return signal.Signals(-exit_code).name
+        except ValueError:
+            return f"signal {-exit_code}"
+    return str(exit_code)
+
 
 @cli.command()
+@click.argument("services", nargs=-1)
 @click.option("--id", help="Service ID")
 @click.option("--name", help="Service name")
+@click.option("--all", "all_services", is_flag=True, help="Start all stopped services")
+@click.option("--workers", type=int, help="Parallel starts [default: max_parallel_operations]")
 @click.pass_context
-def start(ctx, id, name):
-    """Start service."""
+def start(ctx, services, id, name, all_services, workers):
+    """Start service, or several given by ID/name or --all in parallel."""
     manager = ServiceManager(ctx.obj.get("config_path"))
 
+    if services or all_services:
+        targets = _resolve_services(
+            manager,
+            services,
+            all_services,
+            (ServiceStatus.STOPPED, ServiceStatus.FAILED, ServiceStatus.CRASH_LOOP),
+        )
+        _run_bulk(targets, lambda ids: manager.start_many(ids, workers), "Started")
+        return
+
     service_identifier = _get_service_identifier(
         manager, id, name, filter_status=ServiceStatus.STOPPED, prompt="Please select service to start"
     )
@@ -245,14 +466,26 @@ def start(ctx, id, name):
 
 
 @cli.command()
+@click.argument("services", nargs=-1)
 @click.option("--id", help="Service ID")
 @click.option("--name", help="Service name")
 @click.option("--force", is_flag=True, help="Force stop")
+@click.option("--all", "all_services", is_flag=True, help="Stop all running services")
 @click.pass_context
-def stop(ctx, id, name, force):
-    """Stop service."""
+def stop(ctx, services, id, name, force, all_services):
+    """Stop service, or several given by ID/name or --all at once."""
     manager = ServiceManager(ctx.obj.get("config_path"))
 
+    if services or all_services:
+        targets = _resolve_services(
+            manager,
+            services,
+            all_services,
+            (ServiceStatus.RUNNING, ServiceStatus.STARTING, ServiceStatus.PAUSED),
+        )
+        _run_bulk(targets, lambda ids: manager.stop_many(ids, force), "Stopped")
+        return
+
     service_identifier = _get_service_identifier(
         manager, id, name, filter_status=ServiceStatus.RUNNING, prompt="Please select service to stop"
     )
@@ -266,14 +499,22 @@ def stop(ctx, id, name, force):
 
 
 @cli.command()
+@click.argument("services", nargs=-1)
 @click.option("--id", help="Service ID")
 @click.option("--name", help="Service name")
 @click.option("--force", is_flag=True, help="Force restart")
+@click.option("--all", "all_services", is_flag=True, help="Restart all services")
+@click.option("--workers", type=int, help="Parallel restarts [default: max_parallel_operations]")
 @click.pass_context
-def restart(ctx, id, name, force):
-    """Restart service."""
+def restart(ctx, services, id, name, force, all_services, workers):
+    """Restart service, or several given by ID/name or --all in parallel."""
     manager = ServiceManager(ctx.obj.get("config_path"))
 
+    if services or all_services:
+        targets = _resolve_services(manager, services, all_services, tuple(ServiceStatus))
+        _run_bulk(targets, lambda ids: manager.restart_many(ids, force, workers), "Restarted")
+        return
+
     service_identifier = _get_service_identifier(
         manager, id, name, prompt="Please select service to restart"
     )
@@ -722,8 +963,7 @@ WantedBy=default.target
 
             for service in services:
                 if service.auto_restart and not getattr(service, 'auto_start', False):
-                    service.auto_start = True
-                    manager.storage.update_service(service)
+                    manager.update_service(service.id, lambda s: setattr(s, "auto_start", True))
                     auto_start_count += 1
 
             if auto_start_count > 0:
@@ -754,8 +994,7 @@ WantedBy=default.target
 
             for service in services:
                 if getattr(service, 'auto_start', False):
-                    service.auto_start = False
-                    manager.storage.update_service(service)
+                    manager.update_service(service.id, lambda s: setattr(s, "auto_start", False))
                     auto_start_count += 1
 
             if auto_start_count > 0:
@@ -869,6 +1108,7 @@ def _get_status_style(status: ServiceStatus) -> str:
         ServiceStatus.PAUSED: "yellow",
         ServiceStatus.FAILED: "bright_red",
         ServiceStatus.STARTING: "cyan",
+        ServiceStatus.CRASH_LOOP: "magenta",
     }
     return styles.get(status, "white")
 
@@ -1,6 +1,8 @@
 """Configuration management module."""
 
 import os
+import stat
+import tempfile
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
@@ -8,6 +10,45 @@ from typing import Optional
 import toml
 
 
+def _default_runtime_dir() -> str:
+    """Runtime state directory, on tmpfs where available."""
+    xdg_runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if xdg_runtime_dir:
+        return os.path.join(xdg_runtime_dir, "autostartx")
+    return os.path.join(tempfile.gettempdir(), f"autostartx-{os.getuid()}")
+
+
+def ensure_private_dir(path: str) -> None:
+    """Create a directory only we can use, or check that the existing one is such.
+
+    The runtime directory may fall back to a predictable path in the shared
+    temp dir, which another user could have created (or symlinked) first.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by another user")
+    mode = stat.S_IMODE(st.st_mode)
+    if mode & 0o022:
+        raise PermissionError(f"{path} is writable by other users (mode {mode:o})")
+    if mode & 0o077:
+        # Left readable by older versions, which created it with the umask's mode
+        os.chmod(path, 0o700)
+
+
+# Restart policy settings, named like the service fields they default
+RESTART_POLICY_SETTINGS = (
+    "restart_on",
+    "restart_backoff",
+    "restart_max_delay",
+    "restart_jitter",
+    "restart_reset_after",
+    "restart_window",
+)
+
+
 @dataclass
 class Config:
     """Configuration class."""
@@ -19,8 +60,24 @@ class Config:
 
     # Service configuration
     auto_restart: bool = True
+    restart_on: str = "always"  # always, on-failure, on-abnormal or never
     restart_delay: int = 5
-    max_restart_attempts: int = 3
+    max_restart_attempts: int = 3  # Within restart_window seconds (0: ever)
+    restart_backoff: float = 2.0  # Restart delay multiplier per crash in a row
+    restart_max_delay: int = 300
+    restart_jitter: float = 0.1  # Randomize restart delays by this fraction
+    restart_reset_after: int = 600  # Uptime after which the backoff starts over
+    restart_window: int = 3600
+    stop_timeout: int = 5  # Grace period before stopped services are killed
+    max_parallel_operations: int = 8  # Services started/stopped at once by bulk operations
+    max_probe_workers: int = 16  # Liveness probes run at once by the monitor
+    monitor_engine: str = "threaded"  # threaded or asyncio
+
+    # Storage configuration
+    storage_backend: str = "json"  # json, sqlite, journal or sharded
+    journal_compact_threshold: int = 1000
+    journal_history_segments: int = 5
+    split_runtime_state: bool = True  # Keep pid/status out of the service definitions
 
     # UI configuration
     interactive_mode: bool = True
@@ -34,6 +91,7 @@ class Config:
     log_dir: str = field(
         default_factory=lambda: str(Path.home() / ".local" / "share" / "autostartx" / "logs")
     )
+    runtime_dir: str = field(default_factory=_default_runtime_dir)
 
 
 class ConfigManager:
@@ -82,6 +140,31 @@ class ConfigManager:
                 self.config.max_restart_attempts = services.get(
                     "max_restart_attempts", self.config.max_restart_attempts
                 )
+                for key in RESTART_POLICY_SETTINGS:
+                    setattr(self.config, key, services.get(key, getattr(self.config, key)))
+                self.config.stop_timeout = services.get("stop_timeout", self.config.stop_timeout)
+                self.config.max_parallel_operations = services.get(
+                    "max_parallel_operations", self.config.max_parallel_operations
+                )
+                self.config.max_probe_workers = services.get(
+                    "max_probe_workers", self.config.max_probe_workers
+                )
+                self.config.monitor_engine = services.get(
+                    "monitor_engine", self.config.monitor_engine
+                )
+
+            if "storage" in config_data:
+                storage = config_data["storage"]
+                self.config.storage_backend = storage.get("backend", self.config.storage_backend)
+                self.config.journal_compact_threshold = storage.get(
+                    "journal_compact_threshold", self.config.journal_compact_threshold
+                )
+                self.config.journal_history_segments = storage.get(
+                    "journal_history_segments", self.config.journal_history_segments
+                )
+                self.config.split_runtime_state = storage.get(
+                    "split_runtime_state", self.config.split_runtime_state
+                )
 
             if "ui" in config_data:
                 ui = config_data["ui"]
@@ -106,6 +189,17 @@ class ConfigManager:
                 "auto_restart": self.config.auto_restart,
                 "restart_delay": self.config.restart_delay,
                 "max_restart_attempts": self.config.max_restart_attempts,
+                **{key: getattr(self.config, key) for key in RESTART_POLICY_SETTINGS},
+                "stop_timeout": self.config.stop_timeout,
+                "max_parallel_operations": self.config.max_parallel_operations,
+                "max_probe_workers": self.config.max_probe_workers,
+                "monitor_engine": self.config.monitor_engine,
+            },
+            "storage": {
+                "backend": self.config.storage_backend,
+                "journal_compact_threshold": self.config.journal_compact_threshold,
+                "journal_history_segments": self.config.journal_history_segments,
+                "split_runtime_state": self.config.split_runtime_state,
             },
             "ui": {
                 "interactive_mode": self.config.interactive_mode,
@@ -123,6 +217,39 @@ class ConfigManager:
         """Get service database path."""
         return os.path.join(self.config.data_dir, "services.json")
 
+    def get_services_shard_dir(self) -> str:
+        """Get per-service storage directory."""
+        return os.path.join(self.config.data_dir, "services.d")
+
+    def get_services_journal_path(self) -> str:
+        """Get service state journal path."""
+        return os.path.join(self.config.data_dir, "services.journal")
+
+    def get_services_lock_path(self) -> str:
+        """Get service database lock file path."""
+        return os.path.join(self.config.data_dir, "services.lock")
+
+    def get_services_sqlite_path(self) -> str:
+        """Get SQLite service database path."""
+        return os.path.join(self.config.data_dir, "services.db")
+
+    def get_runtime_dir(self) -> str:
+        """Get runtime state directory."""
+        return self.config.runtime_dir
+
+    def ensure_runtime_dir(self) -> str:
+        """Get runtime state directory, created private to us; PermissionError if it isn't."""
+        ensure_private_dir(self.config.runtime_dir)
+        return self.config.runtime_dir
+
+    def get_notify_socket_path(self, service_id: str) -> str:
+        """Get a service's sd_notify socket path."""
+        return os.path.join(self.config.runtime_dir, "notify", f"{service_id}.sock")
+
+    def get_control_socket_path(self) -> str:
+        """Get the monitor's control socket path."""
+        return os.path.join(self.config.runtime_dir, "monitor.sock")
+
     def get_service_log_path(self, service_id: str) -> str:
         """Get service log path."""
         return os.path.join(self.config.log_dir, f"{service_id}.log")
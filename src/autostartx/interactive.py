@@ -64,6 +64,7 @@ def _get_status_color(status: str) -> str:
         "paused": "\033[33m",  # Yellow
         "failed": "\033[91m",  # Bright red
         "starting": "\033[36m",  # Cyan
+        "crash_loop": "\033[35m",  # Magenta
     }
     return colors.get(status, "")
 
@@ -0,0 +1,56 @@
+"""Service manifests: many service definitions in one TOML or JSON file."""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import toml
+
+from .models import ServiceInfo
+from .storage import SERVICE_FIELDS
+
+MANIFEST_FORMATS = ("toml", "json")
+
+
+def detect_format(path: str, default: str = "toml") -> str:
+    """Guess manifest format from the file extension."""
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    return extension if extension in MANIFEST_FORMATS else default
+
+
+def load_manifest(path: str, fmt: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Read service entries from a manifest file.
+
+    Accepts a top-level "services" list (TOML [[services]] tables) or, for
+    JSON, a bare list. Working directories are resolved against the
+    manifest's directory.
+    """
+    fmt = fmt or detect_format(path)
+    with open(path, encoding="utf-8") as f:
+        data = toml.load(f) if fmt == "toml" else json.load(f)
+
+    entries = data.get("services") if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not all(isinstance(e, dict) for e in entries):
+        raise ValueError(f"Manifest {path} must contain a list of services")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for entry in entries:
+        working_dir = entry.get("working_dir") or "."
+        if isinstance(working_dir, str):
+            entry["working_dir"] = os.path.normpath(os.path.join(base_dir, working_dir))
+    return entries
+
+
+def dump_manifest(services: List[ServiceInfo], fmt: str = "toml") -> str:
+    """Render services as a manifest that load_manifest() can read back."""
+    entries = []
+    for service in services:
+        data = service.definition_dict()
+        entry = {key: value for key, value in data.items() if key in SERVICE_FIELDS}
+        if not entry["env_vars"]:
+            del entry["env_vars"]
+        entries.append(entry)
+
+    if fmt == "json":
+        return json.dumps({"services": entries}, indent=2, ensure_ascii=False) + "\n"
+    return toml.dumps({"services": entries})
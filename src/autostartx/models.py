@@ -1,9 +1,34 @@
 """Data model definitions."""
 
+import math
+import random
+import signal
+import sys
 import time
-from dataclasses import dataclass, field
+from array import array
+from dataclasses import MISSING, dataclass, field, fields
 from enum import Enum
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
+
+if TYPE_CHECKING:
+    from _typeshed import DataclassInstance
 
 
 class ServiceStatus(Enum):
@@ -14,56 +39,420 @@ class ServiceStatus(Enum):
     PAUSED = "paused"
     FAILED = "failed"
     STARTING = "starting"
+    # Exited too often too quickly; no longer restarted until started by hand
+    CRASH_LOOP = "crash_loop"
+
+
+# Status by stored value; dict lookup is much cheaper than ServiceStatus(value)
+_STATUS_BY_VALUE: Dict[Any, ServiceStatus] = {
+    **{status.value: status for status in ServiceStatus},
+    **{status: status for status in ServiceStatus},
+}
+
+# Hot fields that change while a service runs; stored apart from the definition.
+# The restart history is not among them: it is kept across reboots.
+RUNTIME_FIELDS = (
+    "status",
+    "pid",
+    "pid_create_time",
+    "restart_count",
+    "updated_at",
+    "last_exit_code",
+    "time_to_ready",
+    "notify_status",
+    "backoff_attempt",
+    "recent_restarts",
+    "version",
+)
+
+# Shared read-only environment for the many services that set no variables
+EMPTY_ENV: Mapping[str, str] = MappingProxyType({})
+
+# Per-field conversions applied by the generated serializers, as expressions over {v}
+_DUMP_CONVERSIONS = {
+    "status": "{v}.value",
+    "env_vars": "{v} or {{}}",
+    "recent_restarts": "list({v})",
+    "success_exit_codes": "list({v})",
+    "restart_history": "None if {v} is None else {v}.to_list()",
+}
+_LOAD_CONVERSIONS = {
+    "status": "_STATUS_BY_VALUE[{v}]",
+    "recent_restarts": "tuple({v})",
+    "success_exit_codes": "tuple({v})",
+    "restart_history": "_load_history({v})",
+    # Many services share a working directory; keep one copy of the string
+    "working_dir": "_intern({v})",
+    "env_vars": "{v} or EMPTY_ENV",
+}
+
+_SERIALIZER_DOCS = {
+    "to_dict": "Convert to dictionary format.",
+    "definition_dict": "Convert the persistent service definition to dictionary format.",
+    "runtime_dict": "Convert the runtime state to dictionary format.",
+    "from_dict": "Create instance from dictionary, ignoring unknown keys.",
+}
+
+T = TypeVar("T", bound="DataclassInstance")
+
+# When a service that exits is restarted, named after systemd's Restart=:
+# "always"; "on-failure": unless it exited cleanly; "on-abnormal": only if
+# killed by a signal or stopped for missing a watchdog/liveness check; "never"
+RESTART_MODES = ("always", "on-failure", "on-abnormal", "never")
+
+# Signals that end a process cleanly, as in systemd; stored negated like exit codes
+_CLEAN_SIGNALS = frozenset(
+    -sig for sig in (signal.SIGHUP, signal.SIGINT, signal.SIGTERM, signal.SIGPIPE)
+)
+
+
+@dataclass(frozen=True)
+class RestartPolicy:
+    """When to restart a crashed service.
+
+    Delays grow from initial_delay by multiplier per crash up to max_delay,
+    randomized by +/- jitter (a fraction) so services that crashed together
+    do not restart in lockstep. A process that ran for reset_after seconds
+    starts the backoff over. At most max_restarts restarts are made within
+    any window seconds (0: ever); past that the service is given up on.
+    """
+
+    initial_delay: float = 5
+    multiplier: float = 2.0
+    max_delay: float = 300
+    jitter: float = 0.1
+    reset_after: float = 600
+    max_restarts: int = 3
+    window: float = 3600
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before the attempt-th restart (from 0) of a crash streak."""
+        # Capped exponent: the delay tops out long before, and floats would overflow
+        delay = min(self.initial_delay * self.multiplier ** min(attempt, 64), self.max_delay)
+        return max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def recent(self, restarts: Tuple[float, ...], now: float) -> Tuple[float, ...]:
+        """The restart times that still fall within the window."""
+        if self.window <= 0:
+            return restarts
+        return tuple(t for t in restarts if now - t < self.window)
+
+    def allows_restart(self, restarts: Tuple[float, ...], now: float) -> bool:
+        """Whether another restart fits within the window."""
+        return len(self.recent(restarts, now)) < self.max_restarts
+
+
+# Exits kept per service by RestartHistory
+HISTORY_SIZE = 16
+
+# Stands for an unknown exit code in RestartHistory's int array
+_NO_EXIT_CODE = -(2**31)
+
+
+class RestartRecord(NamedTuple):
+    """One unexpected exit of a service."""
+
+    exited_at: float
+    # Negative: killed by that signal; None if the process was not our child
+    exit_code: Optional[int]
+    # Seconds the process had been running
+    uptime: float
+    # Seconds until it was running again; None if it was not restarted (yet)
+    time_to_restart: Optional[float]
+
+
+class RestartHistory:
+    """The last exits of a service, in a ring buffer.
+
+    Records are spread over four fixed-size typed arrays rather than kept
+    as objects, so a full history costs a few hundred bytes per service.
+    """
+
+    __slots__ = ("_exited_at", "_exit_codes", "_uptimes", "_restart_times", "_next", "_count")
+
+    def __init__(self, capacity: int = HISTORY_SIZE):
+        self._exited_at = array("d", [0.0]) * capacity
+        self._exit_codes = array("i", [0]) * capacity
+        self._uptimes = array("d", [0.0]) * capacity
+        # NaN: not restarted
+        self._restart_times = array("d", [math.nan]) * capacity
+        self._next = 0
+        self._count = 0
+
+    @property
+    def capacity(self) -> int:
+        """How many exits are kept."""
+        return len(self._exited_at)
+
+    def __len__(self) -> int:
+        return self._count
 
+    def __iter__(self) -> Iterator[RestartRecord]:
+        """Records from oldest to newest."""
+        capacity = self.capacity
+        for offset in range(self._count):
+            yield self._record((self._next - self._count + offset) % capacity)
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RestartHistory):
+            return NotImplemented
+        return self.to_list() == other.to_list()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"RestartHistory({[*self]!r})"
+
+    def record_exit(self, exited_at: float, exit_code: Optional[int], uptime: float) -> None:
+        """Add an exit, dropping the oldest one when full."""
+        i = self._next
+        self._exited_at[i] = exited_at
+        self._exit_codes[i] = _NO_EXIT_CODE if exit_code is None else exit_code
+        self._uptimes[i] = uptime
+        self._restart_times[i] = math.nan
+        self._next = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def record_restart(self, seconds: float) -> None:
+        """Note how long after the latest exit the service ran again."""
+        if self._count:
+            self._restart_times[(self._next - 1) % self.capacity] = seconds
+
+    def latest(self) -> Optional[RestartRecord]:
+        """The most recent exit, if any."""
+        if not self._count:
+            return None
+        return self._record((self._next - 1) % self.capacity)
+
+    def exits_since(self, since: float) -> int:
+        """How many of the kept exits happened at or after since."""
+        return sum(1 for i in range(self._count) if self._exited_at[i] >= since)
+
+    def to_list(self) -> List[list]:
+        """Records as JSON-friendly rows, oldest first."""
+        return [[*record] for record in self]
+
+    @classmethod
+    def from_list(
+        cls, rows: Optional[List[list]], capacity: int = HISTORY_SIZE
+    ) -> Optional["RestartHistory"]:
+        """Rebuild a history from to_list() rows; None for no rows."""
+        if not rows:
+            return None
+        history = cls(capacity)
+        for exited_at, exit_code, uptime, time_to_restart in rows:
+            history.record_exit(exited_at, exit_code, uptime)
+            if time_to_restart is not None:
+                history.record_restart(time_to_restart)
+        return history
+
+    def _record(self, i: int) -> RestartRecord:
+        """The record in slot i."""
+        exit_code = self._exit_codes[i]
+        restart_time = self._restart_times[i]
+        return RestartRecord(
+            self._exited_at[i],
+            None if exit_code == _NO_EXIT_CODE else exit_code,
+            self._uptimes[i],
+            None if math.isnan(restart_time) else restart_time,
+        )
+
+
+def _slotted(cls: Type[T]) -> Type[T]:
+    """Recreate a dataclass with __slots__ (dataclass(slots=True) needs Python 3.10)."""
+    names = tuple(f.name for f in fields(cls))
+    namespace = {
+        key: value
+        for key, value in cls.__dict__.items()
+        if key not in names and key not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names
+    metaclass: Any = type(cls)
+    return cast(Type[T], metaclass(cls.__name__, cls.__bases__, namespace))
+
+
+def _with_serializers(cls: Type[T]) -> Type[T]:
+    """Generate straight-line to_dict/from_dict style methods for a dataclass.
+
+    Avoids the per-call dict copies, **kwargs call and enum construction of
+    hand-written versions; from_dict ignores unknown keys.
+    """
+    namespace: Dict[str, Any] = {
+        "_STATUS_BY_VALUE": _STATUS_BY_VALUE,
+        "EMPTY_ENV": EMPTY_ENV,
+        "_MISSING": MISSING,
+        "_new": object.__new__,
+        "_intern": sys.intern,
+        "_load_history": RestartHistory.from_list,
+    }
+
+    def dump_body(names: Iterable[str]) -> str:
+        items = []
+        for name in names:
+            expr = _DUMP_CONVERSIONS.get(name, "{v}").format(v=f"self.{name}")
+            items.append(f"        {name!r}: {expr},")
+        return "    return {\n" + "\n".join(items) + "\n    }\n"
+
+    all_names = [f.name for f in fields(cls)]
+    definition_names = [name for name in all_names if name not in RUNTIME_FIELDS]
+    source = "def to_dict(self):\n" + dump_body(all_names)
+    source += "def definition_dict(self):\n" + dump_body(definition_names)
+    source += "def runtime_dict(self):\n" + dump_body(RUNTIME_FIELDS)
+
+    lines = ["def from_dict(cls, data):", "    self = _new(cls)", "    get = data.get"]
+    for f in fields(cls):
+        load = _LOAD_CONVERSIONS.get(f.name, "{v}").format(v="v")
+        if f.default is MISSING and f.default_factory is MISSING:
+            lines.append(f"    v = data[{f.name!r}]")
+            lines.append(f"    self.{f.name} = {load}")
+            continue
+        if f.default is not MISSING:
+            namespace[f"_default_{f.name}"] = f.default
+            default = f"_default_{f.name}"
+        else:
+            namespace[f"_factory_{f.name}"] = f.default_factory
+            default = f"_factory_{f.name}()"
+        lines.append(f"    v = get({f.name!r}, _MISSING)")
+        lines.append(f"    self.{f.name} = {default} if v is _MISSING else {load}")
+    lines.append("    return self")
+    source += "\n".join(lines) + "\n"
+
+    exec(source, namespace)
+    for name, doc in _SERIALIZER_DOCS.items():
+        function = namespace[name]
+        function.__doc__ = doc
+        function.__qualname__ = f"{cls.__name__}.{name}"
+        setattr(cls, name, classmethod(function) if name == "from_dict" else function)
+    return cls
+
+
+@_slotted
+@_with_serializers
 @dataclass
 class ServiceInfo:
-    """Service information data class."""
+    """Service information data class.
+
+    Slotted to keep large fleets compact; to_dict(), definition_dict(),
+    runtime_dict() and from_dict() are generated from the fields.
+    """
 
     id: str
     name: str
     command: str
     status: ServiceStatus = ServiceStatus.STOPPED
     pid: Optional[int] = None
+    # Start time of that process; with the PID it survives PID reuse
+    pid_create_time: Optional[float] = None
     auto_restart: bool = True
+    # Which exits auto_restart restarts, one of RESTART_MODES
+    restart_on: str = "always"
+    # Exit codes besides 0 that count as a clean exit (negative: that signal)
+    success_exit_codes: Tuple[int, ...] = ()
     auto_start: bool = False  # Should this service start automatically on system boot
     created_at: float = field(default_factory=time.time)
     updated_at: float = field(default_factory=time.time)
     restart_count: int = 0
     max_restart_attempts: int = 3
     restart_delay: int = 5
+    # Backoff and window of restart_policy; see RestartPolicy
+    restart_backoff: float = 2.0
+    restart_max_delay: int = 300
+    restart_jitter: float = 0.1
+    restart_reset_after: int = 600
+    restart_window: int = 3600
+    # Exiting crash_loop_exits times within crash_loop_interval seconds is a
+    # crash loop: the service is marked CRASH_LOOP instead of restarted
+    crash_loop_exits: int = 4
+    crash_loop_interval: int = 60
+    # Seconds between SIGTERM and SIGKILL when stopping
+    stop_timeout: int = 5
+    # Readiness probe spec (see probes.parse_probe_spec); empty: ready once spawned
+    ready_check: str = ""
+    ready_timeout: int = 30
+    # Liveness probe run every live_interval seconds while running; failing
+    # live_failure_threshold times in a row restarts the service
+    live_check: str = ""
+    live_interval: int = 30
+    live_timeout: int = 5
+    live_failure_threshold: int = 3
+    # Speaks sd_notify: READY=1 marks it ready, WATCHDOG=1 heartbeats are
+    # expected every watchdog_sec seconds (0: no watchdog)
+    notify: bool = False
+    watchdog_sec: int = 0
     working_dir: str = ""
-    env_vars: Dict[str, str] = field(default_factory=dict)
-
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary format."""
-        return {
-            "id": self.id,
-            "name": self.name,
-            "command": self.command,
-            "status": self.status.value,
-            "pid": self.pid,
-            "auto_restart": self.auto_restart,
-            "auto_start": self.auto_start,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at,
-            "restart_count": self.restart_count,
-            "max_restart_attempts": self.max_restart_attempts,
-            "restart_delay": self.restart_delay,
-            "working_dir": self.working_dir,
-            "env_vars": self.env_vars,
-        }
+    env_vars: Mapping[str, str] = field(default_factory=lambda: EMPTY_ENV)
+    # Exit status of the last process that exited (negative: killed by that signal)
+    last_exit_code: Optional[int] = None
+    # Seconds the last start took until the readiness probe passed
+    time_to_ready: Optional[float] = None
+    # Last STATUS= the service sent over its notify socket
+    notify_status: Optional[str] = None
+    # Crashes in a row so far, which set the next restart delay
+    backoff_attempt: int = 0
+    # Times of the automatic restarts within the restart window
+    recent_restarts: Tuple[float, ...] = ()
+    # Unexpected exits, created on the first one
+    restart_history: Optional[RestartHistory] = None
+    # Bumped by storage on every write; stale copies fail compare-and-swap
+    version: int = 0
 
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> "ServiceInfo":
-        """Create instance from dictionary."""
-        data = data.copy()
-        if "status" in data:
-            data["status"] = ServiceStatus(data["status"])
-        # Handle missing auto_start field for backward compatibility
-        if "auto_start" not in data:
-            data["auto_start"] = False
-        return cls(**data)
+    # Generated by _with_serializers
+    to_dict: ClassVar[Callable[["ServiceInfo"], Dict[str, Any]]]
+    definition_dict: ClassVar[Callable[["ServiceInfo"], Dict[str, Any]]]
+    runtime_dict: ClassVar[Callable[["ServiceInfo"], Dict[str, Any]]]
+    from_dict: ClassVar[Callable[[Dict[str, Any]], "ServiceInfo"]]
+
+    @property
+    def restart_policy(self) -> RestartPolicy:
+        """The restart policy made up of this service's restart settings."""
+        return RestartPolicy(
+            initial_delay=self.restart_delay,
+            multiplier=self.restart_backoff,
+            max_delay=self.restart_max_delay,
+            jitter=self.restart_jitter,
+            reset_after=self.restart_reset_after,
+            max_restarts=self.max_restart_attempts,
+            window=self.restart_window,
+        )
+
+    def exited_cleanly(self, exit_code: Optional[int]) -> bool:
+        """Whether an exit status counts as success; None (unknown) does not."""
+        if exit_code is None:
+            return False
+        return exit_code == 0 or exit_code in _CLEAN_SIGNALS or exit_code in self.success_exit_codes
+
+    def should_restart(self, exit_code: Optional[int]) -> bool:
+        """Whether restart_on asks for a restart after this exit.
+
+        exit_code is None when the status is unknown: the process was not
+        our child, or it was stopped for missing its watchdog or liveness probe.
+        """
+        if self.restart_on == "never":
+            return False
+        if self.restart_on == "on-failure":
+            return not self.exited_cleanly(exit_code)
+        if self.restart_on == "on-abnormal":
+            return exit_code is None or (exit_code < 0 and not self.exited_cleanly(exit_code))
+        return True
+
+    def record_exit(self, exit_code: Optional[int], uptime: float) -> RestartHistory:
+        """Add an unexpected exit to the restart history."""
+        if self.restart_history is None:
+            self.restart_history = RestartHistory()
+        self.restart_history.record_exit(time.time(), exit_code, uptime)
+        return self.restart_history
+
+    def is_crash_looping(self) -> bool:
+        """Whether the exit just recorded completes a crash loop.
+
+        Only exits of the current crash streak count, so a service started
+        by hand gets a fresh chance.
+        """
+        if self.restart_history is None or self.crash_loop_exits <= 0:
+            return False
+        since = time.time() - self.crash_loop_interval
+        streak = self.backoff_attempt + 1  # The streak's earlier exits plus this one
+        return min(streak, self.restart_history.exits_since(since)) >= self.crash_loop_exits
 
     def update_status(self, status: ServiceStatus) -> None:
         """Update service status."""
@@ -1,11 +1,18 @@
 """Process monitoring and auto-restart service."""
 
+import heapq
 import threading
 import time
-from typing import Dict, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
 
-from .models import ServiceStatus
-from .service_manager import ServiceManager
+from .models import ServiceInfo, ServiceStatus
+from .probes import LivenessScheduler, ProbeScheduler
+from .service_manager import PROCESS_FIELDS, ServiceManager
+from .storage import ServiceConflictError
+from .watchers import ExitWatcher, PidfdWatcher, ProcessExit
 
 
 class ServiceMonitor:
@@ -14,8 +21,30 @@ class ServiceMonitor:
     def __init__(self, service_manager: ServiceManager):
         self.service_manager = service_manager
         self._monitoring = False
-        self._monitor_thread = None
+        self._monitor_thread: Optional[threading.Thread] = None
         self._check_interval = 5  # Check interval (seconds)
+        self._idle_check_interval = 60  # Check interval while every exit is watched
+        # Wakes the loop like SIGCHLD, for running services that are not our children
+        self.exit_watcher: ExitWatcher = PidfdWatcher(service_manager.process_manager.reaper.wake)
+        self._all_watched = False
+        # Liveness probes also wake the loop, when a service fails them
+        self.probes: LivenessScheduler = ProbeScheduler(
+            service_manager.process_manager.reaper.wake,
+            service_manager.config_manager.config.max_probe_workers,
+        )
+        # Crashed services waiting out their restart delay: a heap of
+        # (due time, service ID), and the service each ID is restarted as
+        self._restart_heap: List[Tuple[float, str]] = []
+        self._pending_restarts: Dict[str, Tuple[float, ServiceInfo]] = {}
+        # Restarts and stops of stuck services run on a worker pool, since they
+        # wait for readiness or stop_timeout; the loop handles their results
+        # (kind, service, success) when woken, and holds back exits of the
+        # services they are busy with (by service ID) until then
+        self._operations: Optional[ThreadPoolExecutor] = None
+        self._in_flight: Dict[str, Future] = {}
+        self._finished: List[Tuple[str, ServiceInfo, bool]] = []
+        self._finished_lock = threading.Lock()
+        self._held_exits: List[ProcessExit] = []
 
     def start_monitoring(self) -> None:
         """Start monitoring."""
@@ -23,6 +52,8 @@ class ServiceMonitor:
             return
 
         self._monitoring = True
+        # React to exits of our own children at once instead of at the next check
+        self.service_manager.process_manager.reaper.install()
         self._monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self._monitor_thread.start()
         print("🔍 Service monitoring started")
@@ -30,87 +61,415 @@ class ServiceMonitor:
     def stop_monitoring(self) -> None:
         """Stop monitoring."""
         self._monitoring = False
+        self.service_manager.process_manager.reaper.wake.set()
         if self._monitor_thread and self._monitor_thread.is_alive():
             self._monitor_thread.join(timeout=10)
+        self._discard_pending()
+        self.exit_watcher.close()
+        self.probes.close()
+        self.service_manager.notify.close()
         print("⏹️ Service monitoring stopped")
 
     def _monitor_loop(self) -> None:
-        """Main monitoring loop."""
+        """Main monitoring loop.
+
+        Checks all services every interval, and handles exits in between as
+        soon as SIGCHLD or a pidfd wakes the loop. While every running service
+        is watched that way, full checks slow down to the idle interval and
+        only a cheap check for changes by other processes remains. The loop
+        never sleeps for a restart delay; it wakes when the next one is due.
+        """
+        wake = self.service_manager.process_manager.reaper.wake
+        storage = self.service_manager.storage
+        last_check = float("-inf")
         while self._monitoring:
             try:
-                self._check_services()
-                time.sleep(self._check_interval)
+                if time.monotonic() >= self._next_check(last_check) or storage.has_changed():
+                    self._check_services()
+                    last_check = time.monotonic()
+                next_check = self._next_check(last_check)
+                timeout = min(self._check_interval, next_check - time.monotonic())
+                if self._restart_heap:
+                    timeout = min(timeout, self._restart_heap[0][0] - time.monotonic())
+                if wake.wait(max(0.0, timeout)):
+                    wake.clear()
+                    self._handle_events()
+                self._restart_due()
             except Exception as e:
                 print(f"Error occurred while monitoring services: {e}")
                 time.sleep(self._check_interval)
 
+    def _next_check(self, last_check: float) -> float:
+        """When the next full check is due; later while every exit is watched."""
+        if self._all_watched:
+            return last_check + self._idle_check_interval
+        return last_check + self._check_interval
+
+    def _discard_pending(self) -> None:
+        """Drop pending restarts and results; operations already running finish unheeded."""
+        self._restart_heap.clear()
+        self._pending_restarts.clear()
+        for future in self._in_flight.values():
+            future.cancel()
+        if self._operations is not None:
+            self._operations.shutdown(wait=False)
+            self._operations = None
+        self._in_flight.clear()
+        with self._finished_lock:
+            self._finished.clear()
+        self._held_exits.clear()
+
+    def _handle_events(self) -> None:
+        """What the loop does when woken."""
+        self._handle_finished()
+        self._handle_exits()
+        self._handle_unhealthy()
+        self._handle_notifications()
+
+    def _handle_exits(self) -> None:
+        """Collect exited processes, record exit codes and restart crashed services."""
+        watched = self.exit_watcher.drain()
+        # Reaped after draining, so children whose pidfd fired are reaped with their exit code
+        exits = self.service_manager.process_manager.reaper.reap()
+        reaped = {child.pid for child in exits}
+        exits += [child for child in watched if child.pid not in reaped]
+        exits += self._held_exits
+        self._held_exits = []
+        if not exits:
+            return
+
+        storage = self.service_manager.storage
+        process_manager = self.service_manager.process_manager
+        with storage.batch():
+            for child in exits:
+                # Being restarted or stopped: handled once that has finished
+                if child.service_id in self._in_flight:
+                    self._held_exits.append(child)
+                    continue
+                service = storage.get_service(child.service_id)
+                # Stopped on purpose, or the exited process was already replaced
+                if not service or not service.pid:
+                    continue
+                if service.pid != child.pid and process_manager.is_service_running(service):
+                    continue
+
+                print(f"[DEBUG] Service {service.name} exited (code: {child.exit_code})")
+                if child.exit_code is not None:
+                    service.last_exit_code = child.exit_code
+                if service.status == ServiceStatus.RUNNING and service.auto_restart:
+                    self._handle_service_crash(service, child.exit_code)
+                else:
+                    service.pid = None
+                    if service.status == ServiceStatus.RUNNING:
+                        service.update_status(ServiceStatus.STOPPED)
+                    storage.update_service(service)
+
+    def _handle_unhealthy(self) -> None:
+        """Restart services whose liveness probe failed too often in a row."""
+        failed = self.probes.drain_failures()
+        if not failed:
+            return
+
+        storage = self.service_manager.storage
+        with storage.batch():
+            for service_id in failed:
+                service = storage.get_service(service_id)
+                if not service or service.status != ServiceStatus.RUNNING or not service.pid:
+                    continue
+                if service_id in self._in_flight:
+                    continue
+
+                print(
+                    f"⚠️ Service {service.name} failed its liveness probe "
+                    f"{service.live_failure_threshold} time(s) in a row"
+                )
+                self._restart_stuck(service)
+
+    def _handle_notifications(self) -> None:
+        """Act on sd_notify messages: READY=1, STATUS= and missed watchdogs."""
+        notify = self.service_manager.notify
+        events = notify.drain_events()
+        if not events:
+            return
+
+        storage = self.service_manager.storage
+        with storage.batch():
+            for event in events:
+                service = storage.get_service(event.service_id)
+                state = notify.state(event.service_id)
+                if not service or not service.pid or state is None:
+                    continue
+                if event.service_id in self._in_flight:
+                    continue
+
+                if event.kind == "ready" and service.status == ServiceStatus.STARTING:
+                    # Started by another process that left the socket to us
+                    service.time_to_ready = time.time() - service.updated_at
+                    service.update_status(ServiceStatus.RUNNING)
+                    print(f"✅ Service {service.name} reported ready")
+                elif event.kind == "status" and service.notify_status != state.status:
+                    service.notify_status = state.status
+                elif event.kind == "watchdog" and service.status == ServiceStatus.RUNNING:
+                    print(f"⚠️ Service {service.name} missed its watchdog")
+                    self._restart_stuck(service)
+                    continue
+                else:
+                    continue
+                storage.update_service(service)
+
+    def _restart_stuck(self, service: ServiceInfo) -> None:
+        """Stop a process that is alive but unresponsive, then restart it as after a crash.
+
+        Stopping waits up to stop_timeout, so it runs on the worker pool; the
+        crash is handled once it has finished.
+        """
+        if not service.auto_restart:
+            return
+        stop = self.service_manager.process_manager.stop_service
+        self._submit("stop", service, lambda: stop(service))
+
     def _check_services(self) -> None:
         """Check all service statuses."""
-        services = self.service_manager.list_services()
+        # Crash handling inside the tick shares its batch, so a tick writes at most once
+        with self.service_manager.storage.batch():
+            # Without SIGCHLD (not the main thread) exits are only collected here
+            self._handle_events()
+            # Stored state: list_services() would already mark crashed services stopped
+            services = self.service_manager.storage.get_all_services()
+            snapshot = self.service_manager.process_manager.snapshot()
+            unwatched = 0
 
-        for service in services:
-            # Only monitor services that should be running and have auto-restart enabled
-            if not service.auto_restart:
-                continue
-
-            # Check process status
-            if service.status == ServiceStatus.RUNNING and service.pid:
-                print(f"[DEBUG] Checking service {service.name} (PID: {service.pid})")
-                
-                if not self.service_manager.process_manager.is_process_running(service.pid):
-                    # Process unexpectedly exited, needs restart
-                    print(f"[WARNING] Service {service.name} process check failed, initiating restart")
-                    self._handle_service_crash(service)
-                else:
-                    print(f"[DEBUG] Service {service.name} process check OK")
+            for service in services:
+                # Being restarted or stopped on the worker pool
+                if service.id in self._in_flight:
+                    unwatched += 1
+                    continue
 
-            elif service.status == ServiceStatus.STARTING:
-                # Check if startup timed out
-                if time.time() - service.updated_at > 30:  # 30 second startup timeout
-                    service.update_status(ServiceStatus.FAILED)
-                    self.service_manager.storage.update_service(service)
-                    print(f"⚠️ Service {service.name} startup timeout")
+                # Only monitor services that should be running and have auto-restart enabled
+                if not service.auto_restart:
+                    self.service_manager._update_service_status(service, snapshot)
+                    continue
+
+                # Check process status
+                if service.status == ServiceStatus.RUNNING and service.pid:
+                    print(f"[DEBUG] Checking service {service.name} (PID: {service.pid})")
+
+                    process_manager = self.service_manager.process_manager
+                    if not process_manager.is_service_running(service, snapshot):
+                        # Process unexpectedly exited; our own child is reaped with its code
+                        exit_code = process_manager.reaper.exit_code(service.pid)
+                        print(
+                            f"[WARNING] Service {service.name} process check failed "
+                            f"(code: {exit_code})"
+                        )
+                        if exit_code is not None:
+                            service.last_exit_code = exit_code
+                        self._handle_service_crash(service, exit_code)
+                    else:
+                        print(f"[DEBUG] Service {service.name} process check OK")
+
+                    if service.status == ServiceStatus.RUNNING and not self._watch(service):
+                        unwatched += 1
+
+                elif service.status == ServiceStatus.STARTING:
+                    unwatched += 1
+                    # Check if startup timed out
+                    if time.time() - service.updated_at > service.ready_timeout:
+                        service.update_status(ServiceStatus.FAILED)
+                        self.service_manager.storage.update_service(service)
+                        print(f"⚠️ Service {service.name} startup timeout")
+
+            self._all_watched = unwatched == 0
+            self.probes.sync(services, lambda s: self.service_manager.build_probe(s, s.live_check))
+            self._sync_notify(services)
+
+    def _sync_notify(self, services: List[ServiceInfo]) -> None:
+        """Hold the notify sockets of running sd_notify services, once their starter let go."""
+        notify = self.service_manager.notify
+        wanted = set()
+        for service in services:
+            if (
+                service.notify
+                and service.pid
+                and service.status in (ServiceStatus.RUNNING, ServiceStatus.STARTING)
+            ):
+                wanted.add(service.id)
+                notify.listen(
+                    service.id,
+                    service.watchdog_sec,
+                    running=service.status == ServiceStatus.RUNNING,
+                )
+        for service_id in set(notify.listening()) - wanted:
+            notify.forget(service_id)
+
+    def _watch(self, service: ServiceInfo) -> bool:
+        """Make sure the service's exit wakes the loop; False if it must be polled.
+
+        Our own children are watched too: SIGCHLD goes to whichever thread
+        spawned the child, and only wakes the loop once the main thread gets
+        around to running the handler.
+        """
+        if service.pid is None:
+            return False
+        return self.exit_watcher.watch(service.id, service.pid)
+
+    def _handle_service_crash(self, service, exit_code: Optional[int] = None) -> None:
+        """Handle service crash; exit_code is known when our child was reaped.
+
+        Called within the monitor tick's storage batch, so the status updates
+        below are written once when the tick ends.
+        """
+        service.pid = None
+        if not service.should_restart(exit_code):
+            # A clean exit is the end of the job; anything else is a failure
+            clean = service.exited_cleanly(exit_code)
+            print(
+                f"{'⏹️' if clean else '❌'} Service {service.name} exited "
+                f"(code: {exit_code}), not restarting it (restart on: {service.restart_on})"
+            )
+            service.update_status(ServiceStatus.STOPPED if clean else ServiceStatus.FAILED)
+            self.service_manager.storage.update_service(service)
+            return
 
-    def _handle_service_crash(self, service) -> None:
-        """Handle service crash."""
         print(f"⚠️ Detected unexpected exit of service {service.name}")
 
         # Update status
-        service.pid = None
         service.update_status(ServiceStatus.STOPPED)
 
-        # Check restart attempt limit
-        if service.restart_count >= service.max_restart_attempts:
+        # A process that ran long enough ends the crash streak
+        now = time.time()
+        policy = service.restart_policy
+        uptime = now - service.pid_create_time if service.pid_create_time else 0.0
+        if uptime >= policy.reset_after:
+            service.backoff_attempt = 0
+
+        service.record_exit(exit_code, uptime)
+        if service.is_crash_looping():
             print(
-                f"❌ Service {service.name} reached maximum restart attempts "
-                f"({service.max_restart_attempts})"
+                f"🔁 Service {service.name} exited {service.crash_loop_exits} times within "
+                f"{service.crash_loop_interval}s, not restarting it (crash loop)"
             )
-            service.update_status(ServiceStatus.FAILED)
+            service.update_status(ServiceStatus.CRASH_LOOP)
             self.service_manager.storage.update_service(service)
             return
 
-        # Wait for restart delay
-        if service.restart_delay > 0:
+        # Check the restart limit of the window
+        service.recent_restarts = policy.recent(service.recent_restarts, now)
+        if not policy.allows_restart(service.recent_restarts, now):
+            window = f"{policy.window}s" if policy.window > 0 else "its lifetime"
             print(
-                f"⏳ Waiting {service.restart_delay} seconds before restarting "
-                f"service {service.name}"
+                f"❌ Service {service.name} reached maximum restart attempts "
+                f"({service.max_restart_attempts} within {window})"
             )
-            time.sleep(service.restart_delay)
-
-        # Attempt restart
-        print(f"🔄 Restarting service {service.name} (attempt {service.restart_count + 1})")
+            service.update_status(ServiceStatus.FAILED)
+            self.service_manager.storage.update_service(service)
+            return
 
-        service.update_status(ServiceStatus.STARTING)
+        # Restarted by the loop once the delay has passed, without blocking it
+        delay = policy.delay(service.backoff_attempt)
+        service.backoff_attempt += 1
+        due = time.monotonic() + delay
+        self._pending_restarts[service.id] = (due, service)
+        heapq.heappush(self._restart_heap, (due, service.id))
+        if delay > 0:
+            print(f"⏳ Restarting service {service.name} in {delay:.1f} seconds")
         self.service_manager.storage.update_service(service)
 
-        if self.service_manager.process_manager.start_service(service):
-            service.increment_restart_count()
-            print(f"✅ Service {service.name} restarted successfully")
-        else:
-            service.update_status(ServiceStatus.FAILED)
-            print(f"❌ Service {service.name} restart failed")
+    def _restart_due(self) -> None:
+        """Restart the crashed services whose restart delay has passed, on the worker pool."""
+        now = time.monotonic()
+        due: List[ServiceInfo] = []
+        while self._restart_heap and self._restart_heap[0][0] <= now:
+            when, service_id = heapq.heappop(self._restart_heap)
+            pending = self._pending_restarts.get(service_id)
+            # Skip entries superseded by a later crash of the same service
+            if pending is not None and pending[0] == when:
+                del self._pending_restarts[service_id]
+                due.append(pending[1])
+        if not due:
+            return
 
-        self.service_manager.storage.update_service(service)
+        storage = self.service_manager.storage
+        restarting = []
+        with storage.batch():
+            for service in due:
+                # The user may have stopped or changed the service while it waited
+                if not storage.is_current(service):
+                    print(f"⏭️ Service {service.name} was changed meanwhile, skipping restart")
+                    continue
+
+                print(f"🔄 Restarting service {service.name} (attempt {service.restart_count + 1})")
+                service.update_status(ServiceStatus.STARTING)
+                storage.update_service(service)
+                restarting.append(service)
+
+        launch = self.service_manager._launch
+        start = self.service_manager.process_manager.start_service
+        for service in restarting:
+            # Launched on a copy: readers keep seeing STARTING until the result is recorded
+            service = replace(service)
+            self._submit("restart", service, partial(launch, service, start))
+
+    def _submit(self, kind: str, service: ServiceInfo, operation: Callable[[], bool]) -> None:
+        """Run a restart or stop on the worker pool; _handle_finished() takes its result."""
+        if self._operations is None:
+            self._operations = ThreadPoolExecutor(
+                self.service_manager.config_manager.config.max_parallel_operations,
+                thread_name_prefix="monitor",
+            )
+        wake = self.service_manager.process_manager.reaper.wake
+
+        def run() -> None:
+            try:
+                success = operation()
+            except Exception as e:
+                print(f"Error: Operation on service {service.id} failed: {e}")
+                success = False
+            with self._finished_lock:
+                self._finished.append((kind, service, success))
+            wake.set()
+
+        self._in_flight[service.id] = self._operations.submit(run)
+
+    def _handle_finished(self) -> None:
+        """Record the restarts and stops that finished on the worker pool."""
+        with self._finished_lock:
+            finished, self._finished = self._finished, []
+        if not finished:
+            return
+
+        storage = self.service_manager.storage
+        with storage.batch():
+            for kind, service, success in finished:
+                self._in_flight.pop(service.id, None)
+                try:
+                    if kind == "stop":
+                        # The user may have stopped or changed the service meanwhile
+                        if storage.is_current(service):
+                            self._handle_service_crash(service)
+                        else:
+                            print(f"⏭️ Service {service.name} was changed meanwhile, not restarting")
+                        continue
+
+                    if success:
+                        service.increment_restart_count()
+                        service.recent_restarts = (*service.recent_restarts, time.time())
+                        history = service.restart_history
+                        latest = history.latest() if history is not None else None
+                        if history is not None and latest is not None:
+                            history.record_restart(time.time() - latest.exited_at)
+                        if not self._watch(service):
+                            self._all_watched = False
+                        print(f"✅ Service {service.name} restarted successfully")
+                    else:
+                        service.update_status(ServiceStatus.FAILED)
+                        print(f"❌ Service {service.name} restart failed")
+                    self.service_manager._save_service(
+                        service,
+                        PROCESS_FIELDS + ("restart_count", "recent_restarts", "restart_history"),
+                    )
+                except (ServiceConflictError, ValueError) as e:
+                    print(f"Warning: Could not record result for service {service.name}: {e}")
 
 
 class AutoRestartManager:
@@ -118,8 +477,14 @@ class AutoRestartManager:
 
     def __init__(self, config_path: str = None):
         self.service_manager = ServiceManager(config_path)
-        self.monitor = ServiceMonitor(self.service_manager)
+        if self.service_manager.config_manager.config.monitor_engine == "asyncio":
+            from .async_monitor import AsyncServiceMonitor
+
+            self.monitor: ServiceMonitor = AsyncServiceMonitor(self.service_manager)
+        else:
+            self.monitor = ServiceMonitor(self.service_manager)
         self._running = False
+        self._stopped = threading.Event()
 
     def start(self) -> None:
         """Start auto-restart manager."""
@@ -132,14 +497,17 @@ class AutoRestartManager:
         self._auto_recover_services()
 
         self._running = True
+        self._stopped.clear()
 
         try:
             # Start monitoring
             self.monitor.start_monitoring()
 
-            # Main loop
+            # The monitor does the work. Python runs signal handlers only on this
+            # thread, and SIGCHLD for a restarted child goes to the thread that
+            # spawned it, so wake up regularly to let the SIGCHLD handler run
             while self._running:
-                time.sleep(1)
+                self._stopped.wait(1)
 
         except KeyboardInterrupt:
             print("\nReceived interrupt signal, shutting down...")
@@ -151,87 +519,66 @@ class AutoRestartManager:
         print("🔄 Checking for services to auto-recover...")
 
         try:
-            services = self.service_manager.list_services()
+            storage = self.service_manager.storage
+            # Raw stored state: list_services() would already mark dead services stopped
+            services = storage.get_all_services()
+            snapshot = self.service_manager.process_manager.snapshot()
             recovery_candidates = []
 
+            if storage.runtime_reset:
+                print("🆕 Runtime state is from a previous boot, all services are stopped")
+
             for service in services:
                 # Find services that should be auto-recovered:
                 # 1. Have auto_restart enabled
                 # 2. Either:
-                #    - Status is RUNNING but process doesn't exist (daemon restart scenario)
-                #    - Status is STOPPED but was previously running (system restart scenario)
-                #    - Service has auto_start=True (explicitly marked for boot startup)
-                should_recover = False
-
+                #    - Runtime state says running but the process is gone (daemon restart)
+                #    - Marked auto_start and no runtime state this boot (system restart)
                 if not service.auto_restart:
                     continue
 
-                # Case 1: Service marked as RUNNING but process doesn't exist
-                if (service.status == ServiceStatus.RUNNING and
-                    service.pid and
-                    not self.service_manager.process_manager.is_process_running(service.pid)):
-                    should_recover = True
-
-                # Case 2: Service is STOPPED but has restart history (was running before)
-                # This handles system restart where all processes are killed
-                elif (service.status == ServiceStatus.STOPPED and
-                      service.restart_count > 0):
-                    should_recover = True
-
-                # Case 3: Service was manually started and is currently stopped
-                # Check if service has been started before (has created_at < updated_at)
-                elif (service.status == ServiceStatus.STOPPED and
-                      service.updated_at > service.created_at + 60):  # 60 seconds buffer
-                    should_recover = True
-
-                # Case 4: Service has auto_start=True (explicitly marked for boot startup)
-                elif (service.status == ServiceStatus.STOPPED and
-                      getattr(service, 'auto_start', False)):
-                    should_recover = True
-
-                if should_recover:
-                    recovery_candidates.append(service)
+                # Case 1: Service recorded as running but process doesn't exist
+                if (
+                    service.status in (ServiceStatus.RUNNING, ServiceStatus.STARTING)
+                    and service.pid
+                    and not self.service_manager.process_manager.is_service_running(
+                        service, snapshot
+                    )
+                ):
+                    recovery_candidates.append((service, "(process died)"))
+
+                # Case 2: Service marked for boot startup that nothing has touched since boot
+                elif (
+                    service.auto_start
+                    and service.status == ServiceStatus.STOPPED
+                    and not storage.has_runtime_state(service.id)
+                ):
+                    recovery_candidates.append((service, "(marked for auto-start)"))
 
             if not recovery_candidates:
                 print("✅ No services need recovery")
                 return
 
             print(f"🔧 Found {len(recovery_candidates)} service(s) to recover:")
-            for service in recovery_candidates:
-                status_reason = ""
-                if service.status == ServiceStatus.RUNNING:
-                    status_reason = "(process died)"
-                elif service.restart_count > 0:
-                    status_reason = "(has restart history)"
-                elif getattr(service, 'auto_start', False):
-                    status_reason = "(marked for auto-start)"
-                else:
-                    status_reason = "(was previously active)"
+            for service, status_reason in recovery_candidates:
                 print(f"   - {service.name} {status_reason}")
 
-            # Recover services
+            # Recover services in parallel; starting one replaces its dead PID
             recovered_count = 0
             failed_count = 0
+            results = self.service_manager.start_many(
+                [service.id for service, _ in recovery_candidates]
+            )
 
-            for service in recovery_candidates:
-                print(f"🔄 Recovering service: {service.name}")
-
-                # Reset service state
-                service.pid = None
-                service.update_status(ServiceStatus.STOPPED)
-                self.service_manager.storage.update_service(service)
-
-                # Attempt to start the service
-                if self.service_manager.start_service(service.id):
-                    print(f"✅ Successfully recovered: {service.name}")
+            for service, _ in recovery_candidates:
+                result = results[service.id]
+                if result.success:
+                    print(f"✅ Successfully recovered: {service.name} ({result.elapsed:.2f}s)")
                     recovered_count += 1
                 else:
                     print(f"❌ Failed to recover: {service.name}")
                     failed_count += 1
 
-                # Small delay between recoveries
-                time.sleep(1)
-
             print(f"🎯 Recovery complete: {recovered_count} succeeded, {failed_count} failed")
 
         except Exception as e:
@@ -246,6 +593,7 @@ class AutoRestartManager:
 
         print("🛑 Stopping auto-restart manager...")
         self._running = False
+        self._stopped.set()
         self.monitor.stop_monitoring()
         print("✅ Auto-restart manager stopped")
 
@@ -258,7 +606,13 @@ class AutoRestartManager:
             "total_services": len(services),
             "running_services": len([s for s in services if s.status == ServiceStatus.RUNNING]),
             "failed_services": len([s for s in services if s.status == ServiceStatus.FAILED]),
+            "crash_looping_services": len(
+                [s for s in services if s.status == ServiceStatus.CRASH_LOOP]
+            ),
             "auto_restart_enabled": len([s for s in services if s.auto_restart]),
+            "storage_updates": self.service_manager.storage.stats.updates,
+            "storage_flushes": self.service_manager.storage.stats.flushes,
+            "storage_conflicts": self.service_manager.storage.stats.conflicts,
         }
 
         return status_info
@@ -266,11 +620,13 @@ class AutoRestartManager:
     def get_service_health(self) -> List[Dict[str, any]]:
         """Get service health status."""
         services = self.service_manager.list_services()
+        # The snapshot list_services() checked the statuses against
+        process_manager = self.service_manager.process_manager
+        snapshot = process_manager.last_snapshot
         health_info = []
 
         for service in services:
-            status_info = self.service_manager.get_service_status(service.id)
-            process_info = status_info.get("process") if status_info else None
+            process_info = process_manager.get_process_info(service, snapshot)
 
             health = {
                 "id": service.id,
@@ -0,0 +1,298 @@
+"""sd_notify protocol support: a notification socket per service."""
+
+import os
+import select
+import socket
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .config import ensure_private_dir
+from .probes import Probe
+
+# Largest notification datagram read; systemd's limit is the same order
+MAX_MESSAGE_SIZE = 4096
+
+
+def parse_notify(data: bytes) -> Dict[str, str]:
+    """Parse a notification: newline-separated KEY=VALUE assignments."""
+    message = {}
+    for line in data.decode("utf-8", errors="replace").split("\n"):
+        key, sep, value = line.partition("=")
+        if sep and key:
+            message[key] = value
+    return message
+
+
+class NotifyEvent(NamedTuple):
+    """Something a service told us, or a watchdog it missed."""
+
+    service_id: str
+    kind: str  # "ready", "status", "stopping" or "watchdog"
+
+
+@dataclass
+class NotifyState:
+    """What a service has notified since it was (re)started."""
+
+    ready: bool = False
+    ready_at: Optional[float] = None
+    status: Optional[str] = None
+    # Watchdog period in seconds (0: off) and when the next heartbeat is due
+    watchdog: float = 0.0
+    watchdog_deadline: Optional[float] = None
+
+
+class NotifyServer:
+    """Receives sd_notify datagrams (READY=1, WATCHDOG=1, STATUS=...) from services.
+
+    Each service gets its own unix datagram socket, passed to it as
+    NOTIFY_SOCKET; one thread sleeps in epoll on all of them and also
+    enforces watchdog deadlines. Notable events are queued for
+    drain_events() and set `wake`.
+    """
+
+    def __init__(self, socket_path: Callable[[str], str], wake: threading.Event):
+        self.socket_path = socket_path
+        self.wake = wake
+        # fd -> (service ID, socket), and service ID -> fd
+        self._sockets: Dict[int, Tuple[str, socket.socket]] = {}
+        self._fd_by_id: Dict[str, int] = {}
+        self._states: Dict[str, NotifyState] = {}
+        self._events: List[NotifyEvent] = []
+        self._lock = threading.Lock()
+        self._epoll: Optional[select.epoll] = None
+        self._thread: Optional[threading.Thread] = None
+        self._control_fds: Optional[Tuple[int, int]] = None
+
+    def listen(self, service_id: str, watchdog: float = 0, running: bool = False) -> bool:
+        """Bind the service's socket unless another process holds it; True if we do.
+
+        running: the service is already up (adopted from another process),
+        so it counts as ready and its watchdog starts now.
+        """
+        with self._lock:
+            if service_id in self._fd_by_id:
+                self._states[service_id].watchdog = watchdog
+                return True
+
+        path = self.socket_path(service_id)
+        if self._in_use(path):
+            return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_NONBLOCK)
+        try:
+            ensure_private_dir(os.path.dirname(path))
+            sock.bind(path)
+        except OSError as e:
+            sock.close()
+            print(f"Warning: Failed to bind notify socket {path}: {e}")
+            return False
+
+        with self._lock:
+            self._start()
+            self._sockets[sock.fileno()] = (service_id, sock)
+            self._fd_by_id[service_id] = sock.fileno()
+            state = NotifyState(watchdog=watchdog)
+            if running:
+                state.ready = True
+                state.ready_at = time.monotonic()
+                self._arm(state)
+            self._states[service_id] = state
+            assert self._epoll is not None
+            self._epoll.register(sock.fileno(), select.EPOLLIN)
+        self._poke()
+        return True
+
+    def is_listening(self, service_id: str) -> bool:
+        """Whether this process holds the service's socket."""
+        with self._lock:
+            return service_id in self._fd_by_id
+
+    def listening(self) -> List[str]:
+        """IDs of the services whose sockets this process holds."""
+        with self._lock:
+            return list(self._fd_by_id)
+
+    def reset(self, service_id: str) -> None:
+        """Forget what the previous process said, for a restart."""
+        with self._lock:
+            state = self._states.get(service_id)
+            if state is not None:
+                self._states[service_id] = NotifyState(watchdog=state.watchdog)
+
+    def state(self, service_id: str) -> Optional[NotifyState]:
+        """A copy of what the service has notified, if we hold its socket."""
+        with self._lock:
+            state = self._states.get(service_id)
+            return replace(state) if state is not None else None
+
+    def forget(self, service_id: str) -> None:
+        """Close and remove the service's socket."""
+        with self._lock:
+            fd = self._fd_by_id.pop(service_id, None)
+            if fd is not None:
+                self._close(fd)
+
+    def drain_events(self) -> List[NotifyEvent]:
+        """Return and clear the events since the last call."""
+        with self._lock:
+            events, self._events = self._events, []
+        return events
+
+    def close(self) -> None:
+        """Stop the thread and remove every socket."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            assert self._control_fds is not None
+            os.write(self._control_fds[1], b"q")
+            thread.join(timeout=5)
+
+        with self._lock:
+            for fd in list(self._sockets):
+                self._close(fd)
+            self._fd_by_id.clear()
+            if self._epoll is not None:
+                self._epoll.close()
+                self._epoll = None
+            if self._control_fds is not None:
+                for fd in self._control_fds:
+                    os.close(fd)
+                self._control_fds = None
+
+    def _in_use(self, path: str) -> bool:
+        """Whether another process listens on path; removes a stale socket file."""
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            probe.connect(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return False
+        finally:
+            probe.close()
+
+    def _start(self) -> None:
+        """Create the epoll set and its thread on first use (caller holds the lock)."""
+        if self._thread is not None:
+            return
+        self._epoll = select.epoll()
+        self._control_fds = os.pipe()
+        self._epoll.register(self._control_fds[0], select.EPOLLIN)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _poke(self) -> None:
+        """Make the thread recompute its watchdog timeout."""
+        with self._lock:
+            if self._control_fds is not None:
+                os.write(self._control_fds[1], b"w")
+
+    def _run(self) -> None:
+        """Thread: read notifications and fire missed watchdogs."""
+        epoll, control_fds = self._epoll, self._control_fds
+        assert epoll is not None and control_fds is not None
+        control_fd = control_fds[0]
+        while True:
+            with self._lock:
+                deadlines = [
+                    s.watchdog_deadline
+                    for s in self._states.values()
+                    if s.watchdog_deadline is not None
+                ]
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else -1
+
+            events = epoll.poll(timeout)
+            notable = False
+            with self._lock:
+                for fd, _ in events:
+                    if fd == control_fd:
+                        if b"q" in os.read(control_fd, 64):
+                            return
+                        continue
+                    entry = self._sockets.get(fd)
+                    if entry is not None:
+                        notable |= self._receive(*entry)
+                notable |= self._check_watchdogs()
+            if notable:
+                self.wake.set()
+
+    def _receive(self, service_id: str, sock: socket.socket) -> bool:
+        """Read pending datagrams of one service (caller holds the lock)."""
+        state = self._states[service_id]
+        notable = False
+        while True:
+            try:
+                data = sock.recv(MAX_MESSAGE_SIZE)
+            except OSError:  # Drained (EAGAIN)
+                return notable
+            message = parse_notify(data)
+
+            if "WATCHDOG_USEC" in message and message["WATCHDOG_USEC"].isdigit():
+                state.watchdog = int(message["WATCHDOG_USEC"]) / 1_000_000
+                self._arm(state)
+            if message.get("READY") == "1" and not state.ready:
+                state.ready = True
+                state.ready_at = time.monotonic()
+                self._arm(state)
+                self._events.append(NotifyEvent(service_id, "ready"))
+                notable = True
+            if "STATUS" in message:
+                state.status = message["STATUS"]
+                self._events.append(NotifyEvent(service_id, "status"))
+                notable = True
+            if message.get("STOPPING") == "1":
+                state.watchdog_deadline = None
+                self._events.append(NotifyEvent(service_id, "stopping"))
+                notable = True
+            if message.get("WATCHDOG") == "1":
+                self._arm(state)
+            elif message.get("WATCHDOG") == "trigger":
+                state.watchdog_deadline = None
+                self._events.append(NotifyEvent(service_id, "watchdog"))
+                notable = True
+
+    def _check_watchdogs(self) -> bool:
+        """Queue an event for each service past its watchdog deadline (caller holds the lock)."""
+        now = time.monotonic()
+        fired = False
+        for service_id, state in self._states.items():
+            if state.watchdog_deadline is not None and state.watchdog_deadline <= now:
+                state.watchdog_deadline = None
+                self._events.append(NotifyEvent(service_id, "watchdog"))
+                fired = True
+        return fired
+
+    def _arm(self, state: NotifyState) -> None:
+        """Expect the next heartbeat one watchdog period from now."""
+        if state.watchdog > 0 and state.ready:
+            state.watchdog_deadline = time.monotonic() + state.watchdog
+        else:
+            state.watchdog_deadline = None
+
+    def _close(self, fd: int) -> None:
+        """Unregister, close and unlink one socket (caller holds the lock)."""
+        service_id, sock = self._sockets.pop(fd)
+        self._states.pop(service_id, None)
+        assert self._epoll is not None
+        self._epoll.unregister(fd)
+        path = sock.getsockname()
+        sock.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+class NotifyProbe(Probe):
+    """Passes once the service has sent READY=1."""
+
+    def __init__(self, is_ready: Callable[[], bool]):
+        self.is_ready = is_ready
+
+    def check(self, timeout: float) -> bool:
+        """Look whether READY=1 arrived."""
+        return self.is_ready()
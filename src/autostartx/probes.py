@@ -0,0 +1,501 @@
+"""Service probes: checks that a service is up, once started and while it runs."""
+
+import asyncio
+import heapq
+import os
+import random
+import re
+import shlex
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from .models import ServiceInfo, ServiceStatus
+
+PROBE_KINDS = ("tcp", "http", "exec", "log")
+
+
+def parse_probe_spec(spec: str) -> Tuple[str, str]:
+    """Split a probe spec into (kind, target), raising ValueError if invalid.
+
+    Specs are "tcp:[host:]port", "http://..." or "https://...",
+    "exec:<command>" and "log:<regex>".
+    """
+    if spec.startswith(("http://", "https://")):
+        return "http", spec
+
+    kind, _, target = spec.partition(":")
+    if kind not in PROBE_KINDS or not target:
+        raise ValueError(
+            f"Invalid probe '{spec}', expected tcp:[host:]port, http(s)://..., "
+            "exec:<command> or log:<regex>"
+        )
+    if kind == "tcp":
+        port = target.rpartition(":")[2]
+        if not port.isdigit() or not 0 < int(port) < 65536:
+            raise ValueError(f"Invalid port in probe '{spec}'")
+    elif kind == "exec":
+        try:
+            if not shlex.split(target):
+                raise ValueError(f"Empty command in probe '{spec}'")
+        except ValueError as e:
+            raise ValueError(f"Invalid command in probe '{spec}': {e}") from e
+    elif kind == "log":
+        try:
+            re.compile(target)
+        except re.error as e:
+            raise ValueError(f"Invalid pattern in probe '{spec}': {e}") from e
+    return kind, target
+
+
+class Probe(ABC):
+    """A single check, repeated until it passes or time runs out."""
+
+    @abstractmethod
+    def check(self, timeout: float) -> bool:
+        """Run the check once; must return within about timeout seconds."""
+
+
+class TcpProbe(Probe):
+    """Passes once a TCP port accepts connections."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+
+    def check(self, timeout: float) -> bool:
+        """Try to connect to the port."""
+        try:
+            with socket.create_connection((self.host, self.port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+
+
+class HttpProbe(Probe):
+    """Passes once a GET request answers with a status below 400."""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def check(self, timeout: float) -> bool:
+        """Send a GET request."""
+        try:
+            with urllib.request.urlopen(self.url, timeout=timeout) as response:
+                status: int = response.status
+                return status < 400
+        except (urllib.error.URLError, OSError, ValueError):
+            return False
+
+
+class ExecProbe(Probe):
+    """Passes once a command exits with status 0."""
+
+    def __init__(self, command: str, cwd: Optional[str] = None, env: Optional[Dict] = None):
+        self.args = shlex.split(command)
+        self.cwd = cwd
+        self.env = env
+
+    def check(self, timeout: float) -> bool:
+        """Run the command."""
+        try:
+            result = subprocess.run(
+                self.args,
+                cwd=self.cwd,
+                env=self.env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=timeout,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        return result.returncode == 0
+
+
+class LogProbe(Probe):
+    """Passes once a line matching a regex is appended to the service log.
+
+    Only output written after the probe was created counts, and the "==="
+    marker lines autostartx writes itself are skipped.
+    """
+
+    def __init__(self, log_path: str, pattern: str):
+        self.log_path = log_path
+        self.pattern = re.compile(pattern)
+        try:
+            self._offset = os.path.getsize(log_path)
+        except OSError:
+            self._offset = 0
+        self._partial = ""
+
+    def check(self, timeout: float) -> bool:
+        """Scan log output appended since the previous check."""
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return False
+
+        self._offset += len(data)
+        text = self._partial + data.decode("utf-8", errors="replace")
+        *lines, self._partial = text.split("\n")
+        return any(not line.startswith("===") and self.pattern.search(line) for line in lines)
+
+
+def build_probe(
+    spec: str,
+    log_path: str,
+    cwd: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> Probe:
+    """Create a probe from its spec; exec probes run in cwd with env."""
+    kind, target = parse_probe_spec(spec)
+    if kind == "tcp":
+        host, _, port = target.rpartition(":")
+        return TcpProbe(host or "127.0.0.1", int(port))
+    if kind == "http":
+        return HttpProbe(target)
+    if kind == "exec":
+        return ExecProbe(target, cwd, env)
+    return LogProbe(log_path, target)
+
+
+def wait_for(
+    probe: Probe,
+    timeout: float,
+    alive: Callable[[], bool] = lambda: True,
+    interval: float = 0.05,
+    max_interval: float = 0.5,
+) -> Optional[float]:
+    """Repeat a probe until it passes; returns seconds taken, or None on timeout.
+
+    Checks start every interval seconds and back off to max_interval; gives
+    up early once alive() reports that the process has exited.
+    """
+    started_at = time.monotonic()
+    deadline = started_at + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        if probe.check(min(remaining, max(1.0, max_interval))):
+            return time.monotonic() - started_at
+        if not alive():
+            return None
+        time.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+        interval = min(interval * 2, max_interval)
+
+
+@dataclass
+class _ScheduledProbe:
+    """A service's liveness probe and its state in the scheduler."""
+
+    probe: Probe
+    # Identifies the configuration and process being probed
+    key: Tuple
+    interval: float
+    timeout: float
+    threshold: int
+    failures: int = 0
+    running: bool = False
+    # The latest check handed to the worker pool
+    future: Optional[Future] = None
+
+
+def _shutdown(executor: ThreadPoolExecutor, entries: Iterable[_ScheduledProbe]) -> None:
+    """Cancel the entries' queued checks and let the workers exit, without waiting.
+
+    Like shutdown(cancel_futures=True), which needs Python 3.9.
+    """
+    for entry in entries:
+        if entry.future is not None:
+            entry.future.cancel()
+    executor.shutdown(wait=False)
+
+
+def _plan_probes(
+    current: Dict[str, _ScheduledProbe],
+    services: Iterable[ServiceInfo],
+    build: Callable[[ServiceInfo], Probe],
+) -> Tuple[List[str], Dict[str, _ScheduledProbe]]:
+    """Work out which probes to drop and which to (re)create.
+
+    Returns the IDs whose probe goes away, and new probes by service ID
+    for running services whose probe is missing or out of date.
+    """
+    wanted = {}
+    for service in services:
+        if service.live_check and service.status == ServiceStatus.RUNNING and service.pid:
+            wanted[service.id] = service
+
+    removed = [service_id for service_id in current if service_id not in wanted]
+    added = {}
+    for service_id, service in wanted.items():
+        key = (
+            service.live_check,
+            service.live_interval,
+            service.live_timeout,
+            service.live_failure_threshold,
+            service.pid,
+            service.pid_create_time,
+        )
+        entry = current.get(service_id)
+        if entry is not None and entry.key == key:
+            continue
+        try:
+            probe = build(service)
+        except ValueError as e:
+            print(f"Warning: Service {service.name} has an invalid liveness probe: {e}")
+            continue
+        added[service_id] = _ScheduledProbe(
+            probe,
+            key,
+            max(service.live_interval, 1),
+            service.live_timeout,
+            max(service.live_failure_threshold, 1),
+        )
+    return removed, added
+
+
+class LivenessScheduler(Protocol):
+    """What the monitor needs from a scheduler of liveness probes."""
+
+    def sync(
+        self, services: Iterable[ServiceInfo], build: Callable[[ServiceInfo], Probe]
+    ) -> None: ...
+
+    def is_scheduled(self, service_id: str) -> bool: ...
+
+    def drain_failures(self) -> List[str]: ...
+
+    def close(self) -> None: ...
+
+
+class ProbeScheduler:
+    """Runs periodic liveness probes of many services on a pool of worker threads.
+
+    Probes wait in a heap ordered by due time; first runs are spread at
+    random over each interval, so services started together are not all
+    probed at once, and a slow endpoint only ties up its own worker. When a
+    service fails threshold checks in a row, its ID is queued for
+    drain_failures() and `wake` is set.
+    """
+
+    def __init__(self, wake: threading.Event, max_workers: int = 16):
+        self.wake = wake
+        self._max_workers = max_workers
+        self._probes: Dict[str, _ScheduledProbe] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._failed: List[str] = []
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def sync(self, services: Iterable[ServiceInfo], build: Callable[[ServiceInfo], Probe]) -> None:
+        """Probe exactly the running services that have a liveness probe.
+
+        Probes of services whose probe settings or process changed start
+        over; build() creates a service's probe.
+        """
+        with self._lock:
+            removed, added = _plan_probes(self._probes, services, build)
+            for service_id in removed:
+                del self._probes[service_id]
+
+            now = time.monotonic()
+            for service_id, entry in added.items():
+                self._probes[service_id] = entry
+                heapq.heappush(
+                    self._heap, (now + random.uniform(0, entry.interval), id(entry), service_id)
+                )
+            self._start()
+        self._changed.set()
+
+    def is_scheduled(self, service_id: str) -> bool:
+        """Whether the service is being probed."""
+        with self._lock:
+            return service_id in self._probes
+
+    def drain_failures(self) -> List[str]:
+        """Return and clear the IDs of services that failed their probe."""
+        with self._lock:
+            failed, self._failed = self._failed, []
+        return failed
+
+    def close(self) -> None:
+        """Stop scheduling probes; checks already running are abandoned."""
+        with self._lock:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+            executor, self._executor = self._executor, None
+            entries = [*self._probes.values()]
+        self._changed.set()
+        if thread is not None:
+            thread.join(timeout=5)
+        if executor is not None:
+            _shutdown(executor, entries)
+
+    def _start(self) -> None:
+        """Create the worker pool and scheduler thread on first use (caller holds the lock)."""
+        if self._thread is not None or self._stopped or not self._probes:
+            return
+        self._executor = ThreadPoolExecutor(self._max_workers, thread_name_prefix="probe")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Scheduler thread: hand due probes to the workers, sleep until the next one."""
+        executor = self._executor
+        assert executor is not None
+        while True:
+            with self._lock:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    due, entry_id, service_id = heapq.heappop(self._heap)
+                    entry = self._probes.get(service_id)
+                    if entry is None or id(entry) != entry_id:
+                        continue  # Removed or replaced since it was scheduled
+                    next_due = max(due + entry.interval, now)
+                    heapq.heappush(self._heap, (next_due, entry_id, service_id))
+                    # A check still running past its interval is not started twice
+                    if not entry.running:
+                        entry.running = True
+                        entry.future = executor.submit(self._check, service_id, entry)
+                timeout = self._heap[0][0] - now if self._heap else None
+            self._changed.wait(timeout)
+            self._changed.clear()
+
+    def _check(self, service_id: str, entry: _ScheduledProbe) -> None:
+        """Worker: run one check and count consecutive failures."""
+        try:
+            healthy = entry.probe.check(entry.timeout)
+        except Exception as e:
+            print(f"Warning: Liveness probe of service {service_id} raised: {e}")
+            healthy = False
+
+        with self._lock:
+            entry.running = False
+            if self._probes.get(service_id) is not entry:
+                return
+            if healthy:
+                entry.failures = 0
+                return
+            entry.failures += 1
+            if entry.failures < entry.threshold:
+                return
+            # Probed again once the restarted process is synced in
+            del self._probes[service_id]
+            self._failed.append(service_id)
+        self.wake.set()
+
+
+class AsyncProbeScheduler:
+    """ProbeScheduler's interface, with each probe a task on an asyncio event loop.
+
+    Probe tasks only sleep on the loop; the checks themselves block, so
+    they run on a pool of max_workers threads. sync() may be called from
+    any thread once attach() has been called on the loop.
+    """
+
+    def __init__(self, wake: threading.Event, max_workers: int = 16):
+        self.wake = wake
+        self._max_workers = max_workers
+        self._probes: Dict[str, _ScheduledProbe] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._failed: List[str] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Run probe tasks on loop from now on."""
+        self._loop = loop
+
+    def sync(self, services: Iterable[ServiceInfo], build: Callable[[ServiceInfo], Probe]) -> None:
+        """Probe exactly the running services that have a liveness probe."""
+        with self._lock:
+            removed, added = _plan_probes(self._probes, services, build)
+            for service_id in removed:
+                del self._probes[service_id]
+            self._probes.update(added)
+        if removed or added:
+            assert self._loop is not None
+            self._loop.call_soon_threadsafe(self._reschedule, removed, added)
+
+    def is_scheduled(self, service_id: str) -> bool:
+        """Whether the service is being probed."""
+        with self._lock:
+            return service_id in self._probes
+
+    def drain_failures(self) -> List[str]:
+        """Return and clear the IDs of services that failed their probe."""
+        with self._lock:
+            failed, self._failed = self._failed, []
+        return failed
+
+    def close(self) -> None:
+        """Cancel every probe task (on the loop); checks already running are abandoned."""
+        with self._lock:
+            entries = [*self._probes.values()]
+            self._probes.clear()
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        if self._executor is not None:
+            _shutdown(self._executor, entries)
+            self._executor = None
+
+    def _reschedule(self, removed: List[str], added: Dict[str, _ScheduledProbe]) -> None:
+        """Loop: cancel the tasks of dropped or replaced probes, start the new ones."""
+        for service_id in [*removed, *added]:
+            task = self._tasks.pop(service_id, None)
+            if task is not None:
+                task.cancel()
+        if added and self._executor is None:
+            self._executor = ThreadPoolExecutor(self._max_workers, thread_name_prefix="probe")
+        loop = asyncio.get_running_loop()
+        for service_id, entry in added.items():
+            self._tasks[service_id] = loop.create_task(self._run(service_id, entry))
+
+    async def _run(self, service_id: str, entry: _ScheduledProbe) -> None:
+        """Task: check every interval, starting at a random offset, until the threshold."""
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        assert executor is not None
+        await asyncio.sleep(random.uniform(0, entry.interval))
+        while True:
+            started_at = loop.time()
+            try:
+                entry.future = executor.submit(entry.probe.check, entry.timeout)
+                healthy = await asyncio.wrap_future(entry.future)
+            except Exception as e:
+                print(f"Warning: Liveness probe of service {service_id} raised: {e}")
+                healthy = False
+
+            with self._lock:
+                if self._probes.get(service_id) is not entry:
+                    return
+                entry.failures = 0 if healthy else entry.failures + 1
+                failed = entry.failures >= entry.threshold
+                if failed:
+                    # Probed again once the restarted process is synced in
+                    del self._probes[service_id]
+                    self._failed.append(service_id)
+            if failed:
+                self._tasks.pop(service_id, None)
+                self.wake.set()
+                return
+            await asyncio.sleep(max(0.0, started_at + entry.interval - loop.time()))
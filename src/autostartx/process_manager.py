@@ -1,23 +1,63 @@
 """Process management module."""
 
 import os
+import shlex
+import shutil
 import signal
 import subprocess
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
 import psutil
 
 from .config import ConfigManager
 from .models import ServiceInfo, ServiceStatus
+from .watchers import Child, ChildReaper, SpawnedChild
+
+# Start times come from clock ticks since boot; allow for float rounding
+CREATE_TIME_TOLERANCE = 0.05
+
+# Seconds to wait for processes to die after SIGKILL
+KILL_TIMEOUT = 2
+
+# Seconds to wait for sudo to spawn the actual service process
+SUDO_CHILD_TIMEOUT = 2
+
+
+def same_start_time(actual: float, expected: Optional[float]) -> bool:
+    """Whether a process start time matches the recorded one (unknown matches anything)."""
+    if not expected or not actual:
+        return True
+    return abs(actual - expected) <= CREATE_TIME_TOLERANCE
+
+
+class OperationResult(NamedTuple):
+    """Outcome of one service in a bulk operation."""
+
+    success: bool
+    elapsed: float  # seconds
+
+
+class LaunchSpec(NamedTuple):
+    """Everything needed to start a service, worked out once per definition."""
+
+    argv: List[str]
+    # Resolved program path, None if it was not found on PATH
+    executable: Optional[str]
+    env: Dict[str, str]
+    # None: the current directory
+    cwd: Optional[str]
+    log_path: str
 
 
 class ProcessInfo:
     """Process information class."""
 
-    def __init__(self, pid: int):
+    def __init__(self, pid: int, process: Optional[psutil.Process] = None):
         self.pid = pid
-        self._process = psutil.Process(pid) if psutil.pid_exists(pid) else None
+        if process is None and psutil.pid_exists(pid):
+            process = psutil.Process(pid)
+        self._process = process
 
     @property
     def exists(self) -> bool:
@@ -92,154 +132,337 @@ class ProcessInfo:
             return not self.exists
 
 
+class ProcessEntry(NamedTuple):
+    """One process as seen by a ProcessSnapshot."""
+
+    pid: int
+    ppid: int
+    status: str
+    create_time: float
+    cpu_time: float  # user + system seconds
+    rss: int
+    vms: int
+
+
+class ProcessSnapshot:
+    """Every process on the system, read in a single pass over /proc.
+
+    Taken once per monitor tick or listing and shared by all status checks,
+    process tree walks and health reports, instead of several psutil calls
+    per service.
+    """
+
+    ATTRS = ["pid", "ppid", "status", "create_time", "cpu_times", "memory_info"]
+
+    def __init__(
+        self, entries: Dict[int, ProcessEntry], previous: Optional["ProcessSnapshot"] = None
+    ):
+        self.taken_at = time.monotonic()
+        self._entries = entries
+        self._children: Dict[int, List[int]] = {}
+        for entry in entries.values():
+            self._children.setdefault(entry.ppid, []).append(entry.pid)
+        # CPU times of the previous snapshot, for CPU usage between the two
+        self._previous_at = previous.taken_at if previous else None
+        self._previous_cpu: Dict[int, Tuple[float, float]] = (
+            {pid: (e.create_time, e.cpu_time) for pid, e in previous._entries.items()}
+            if previous
+            else {}
+        )
+
+    @classmethod
+    def take(cls, previous: Optional["ProcessSnapshot"] = None) -> "ProcessSnapshot":
+        """Read all processes; pass the previous snapshot to get CPU usage."""
+        entries = {}
+        for process in psutil.process_iter(cls.ATTRS, ad_value=None):
+            info = process.info
+            cpu_times = info["cpu_times"]
+            memory = info["memory_info"]
+            entries[info["pid"]] = ProcessEntry(
+                pid=info["pid"],
+                ppid=info["ppid"] or 0,
+                status=info["status"] or "",
+                create_time=info["create_time"] or 0.0,
+                cpu_time=cpu_times.user + cpu_times.system if cpu_times else 0.0,
+                rss=memory.rss if memory else 0,
+                vms=memory.vms if memory else 0,
+            )
+        return cls(entries, previous)
+
+    def get(self, pid: int) -> Optional[ProcessEntry]:
+        """Get a process, or None if it did not exist."""
+        return self._entries.get(pid)
+
+    def is_running(self, pid: int) -> bool:
+        """Whether the process existed and had not exited (zombies have)."""
+        entry = self._entries.get(pid)
+        return entry is not None and entry.status != psutil.STATUS_ZOMBIE
+
+    def children(self, pid: int, recursive: bool = False) -> List[int]:
+        """Get child PIDs, breadth first when recursive."""
+        result = list(self._children.get(pid, ()))
+        if recursive:
+            for child in result:
+                result.extend(self._children.get(child, ()))
+        return result
+
+    def cpu_percent(self, pid: int) -> float:
+        """CPU usage since the previous snapshot, 0.0 if there was none."""
+        entry = self._entries.get(pid)
+        previous = self._previous_cpu.get(pid)
+        if entry is None or previous is None or previous[0] != entry.create_time:
+            return 0.0
+        assert self._previous_at is not None
+        elapsed = self.taken_at - self._previous_at
+        return (entry.cpu_time - previous[1]) / elapsed * 100 if elapsed > 0 else 0.0
+
+
 class ProcessManager:
     """Process manager."""
 
     def __init__(self, config_manager: ConfigManager):
         self.config_manager = config_manager
+        # Children started by this process, reaped when they exit
+        self.reaper = ChildReaper()
+        self._last_snapshot: Optional[ProcessSnapshot] = None
+        # psutil handles by (PID, start time); reusing them keeps cpu_percent() sampling
+        self._process_cache: Dict[Tuple[int, Optional[float]], psutil.Process] = {}
+        # Launch specs by service ID, with the definition they were built from
+        self._launch_specs: Dict[str, Tuple[Tuple, LaunchSpec]] = {}
+        # os.posix_spawn cannot change directory, so it is only used for services
+        # whose working directory is already ours. The add command records one for
+        # every service, so most services start through Popen (a shell shim that
+        # changes directory first measured slower than Popen).
+        self.use_posix_spawn = hasattr(os, "posix_spawn")
+
+    @property
+    def last_snapshot(self) -> Optional[ProcessSnapshot]:
+        """The most recent process snapshot, if any."""
+        return self._last_snapshot
+
+    def snapshot(self) -> ProcessSnapshot:
+        """Take a process snapshot; CPU usage is measured since the last one."""
+        self._last_snapshot = ProcessSnapshot.take(self._last_snapshot)
+        # Drop handles of processes that have exited
+        for key in list(self._process_cache):
+            entry = self._last_snapshot.get(key[0])
+            if entry is None or not same_start_time(entry.create_time, key[1]):
+                self._process_cache.pop(key, None)
+        return self._last_snapshot
 
     def start_service(self, service: ServiceInfo) -> bool:
         """Start service."""
-        if service.pid and self.is_process_running(service.pid):
+        if service.pid and self.is_service_running(service):
             return False  # Process already running
 
         try:
-            # Get log file path
-            log_path = self.config_manager.get_service_log_path(service.id)
-            os.makedirs(os.path.dirname(log_path), exist_ok=True)
-
-            # Start process
-            with open(log_path, "a", encoding="utf-8") as log_file:
-                # Write startup log
-                log_file.write(f"\n=== Service started: {time.strftime('%Y-%m-%d %H:%M:%S')} ===\n")
-                log_file.flush()
-
-                # Parse command
-                cmd_parts = self._parse_command(service.command)
-
-                # Set environment variables
-                env = os.environ.copy()
-                env.update(service.env_vars)
-
-                # Start process
-                process = subprocess.Popen(
-                    cmd_parts,
-                    stdout=log_file,
-                    stderr=subprocess.STDOUT,
-                    cwd=service.working_dir or os.getcwd(),
-                    env=env,
-                    start_new_session=True,  # Create new process group
-                )
-
-                # Store the process PID
-                service.pid = process.pid
-                print(f"[DEBUG] Started service {service.name} with PID {process.pid}")
-
-                # For sudo commands, try to find the actual child process
-                if cmd_parts[0] == "sudo":
-                    time.sleep(0.5)  # Give time for child process to start
-                    try:
-                        parent_process = psutil.Process(process.pid)
-                        children = parent_process.children(recursive=True)
-                        if children:
-                            # Use the first child process as the actual service PID
-                            actual_pid = children[0].pid
-                            service.pid = actual_pid
-                            print(f"[DEBUG] Found child process PID {actual_pid} for sudo command")
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        # If we can't get child processes, use original PID
-                        pass
-
-                service.update_status(ServiceStatus.RUNNING)
-                return True
+            spec = self.launch_spec(service)
+            header = f"\n=== Service started: {time.strftime('%Y-%m-%d %H:%M:%S')} ===\n"
+            log_fd = self._open_log(spec.log_path)
+            try:
+                os.write(log_fd, header.encode("utf-8"))
+                process = self._spawn(spec, log_fd)
+            finally:
+                os.close(log_fd)
+
+            # Store the process identity and keep the handle to reap it
+            self._identify(service, process.pid)
+            self.reaper.track(service.id, process)
+            print(f"[DEBUG] Started service {service.name} with PID {process.pid}")
+
+            # For sudo commands, use the command sudo runs as the service PID
+            if spec.argv[0] == "sudo":
+                child = self._wait_for_child(process.pid)
+                if child is not None:
+                    self._identify(service, child.pid)
+                    print(f"[DEBUG] Found child process PID {child.pid} for sudo command")
+
+            # With a readiness probe or READY=1, the caller moves it on to RUNNING
+            service.time_to_ready = None
+            service.notify_status = None
+            service.update_status(
+                ServiceStatus.STARTING
+                if service.ready_check or service.notify
+                else ServiceStatus.RUNNING
+            )
+            return True
 
         except Exception as e:
             print(f"Failed to start service: {e}")
             service.update_status(ServiceStatus.FAILED)
             return False
 
-    def stop_service(self, service: ServiceInfo, force: bool = False) -> bool:
-        """Stop service."""
-        if not service.pid:
-            service.update_status(ServiceStatus.STOPPED)
-            return True
-
+    def launch_spec(self, service: ServiceInfo) -> LaunchSpec:
+        """The service's launch spec, rebuilt only when its definition changed."""
+        key = (
+            service.command,
+            service.working_dir,
+            tuple(service.env_vars.items()),
+            service.notify,
+            service.watchdog_sec,
+        )
+        cached = self._launch_specs.get(service.id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        argv = self._parse_command(service.command)
+        env = os.environ.copy()
+        env.update(service.env_vars)
+        if service.notify:
+            env["NOTIFY_SOCKET"] = self.config_manager.get_notify_socket_path(service.id)
+            if service.watchdog_sec > 0:
+                env["WATCHDOG_USEC"] = str(service.watchdog_sec * 1_000_000)
+
+        cwd = service.working_dir or None
+        executable: Optional[str]
+        if "/" in argv[0]:
+            executable = os.path.join(cwd, argv[0]) if cwd else argv[0]
+        else:
+            executable = shutil.which(argv[0], path=env.get("PATH", os.defpath))
+
+        log_path = self.config_manager.get_service_log_path(service.id)
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        spec = LaunchSpec(argv, executable, env, cwd, log_path)
+        self._launch_specs[service.id] = (key, spec)
+        return spec
+
+    def forget(self, service_id: str) -> None:
+        """Drop the cached launch spec of a removed service."""
+        self._launch_specs.pop(service_id, None)
+
+    def _open_log(self, log_path: str) -> int:
+        """Open a service log for appending, recreating its directory if removed."""
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
         try:
-            if not psutil.pid_exists(service.pid):
-                print(f"[DEBUG] Service {service.name} PID {service.pid} no longer exists")
-                service.pid = None
-                service.update_status(ServiceStatus.STOPPED)
-                return True
-
-            process = psutil.Process(service.pid)
-
-            # Get all child processes before terminating
-            children = []
-            try:
-                children = process.children(recursive=True)
-                print(f"[DEBUG] Found {len(children)} child processes for {service.name}")
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-
-            # Stop main process
-            if force:
-                process.kill()
-            else:
-                process.terminate()
-
-            # Wait for main process to stop
+            return os.open(log_path, flags, 0o644)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            return os.open(log_path, flags, 0o644)
+
+    def _spawn(self, spec: LaunchSpec, log_fd: int) -> Child:
+        """Start the process in a new session with output to log_fd."""
+        if (
+            self.use_posix_spawn
+            and spec.executable
+            and (spec.cwd is None or spec.cwd == os.getcwd())
+        ):
+            pid = os.posix_spawn(
+                spec.executable,
+                spec.argv,
+                spec.env,
+                file_actions=[
+                    (os.POSIX_SPAWN_DUP2, log_fd, 1),
+                    (os.POSIX_SPAWN_DUP2, log_fd, 2),
+                ],
+                setsid=True,  # Create new process group
+                setsigdef=(signal.SIGPIPE, signal.SIGXFSZ),
+            )
+            return SpawnedChild(pid)
+
+        return subprocess.Popen(
+            spec.argv,
+            stdout=log_fd,
+            stderr=subprocess.STDOUT,
+            cwd=spec.cwd or os.getcwd(),
+            env=spec.env,
+            start_new_session=True,  # Create new process group
+        )
+
+    def stop_service(
+        self, service: ServiceInfo, force: bool = False, snapshot: Optional[ProcessSnapshot] = None
+    ) -> bool:
+        """Stop service; a snapshot, if given, is used to find its child processes."""
+        return self.stop_services([service], force, snapshot)[service.id].success
+
+    def stop_services(
+        self,
+        services: List[ServiceInfo],
+        force: bool = False,
+        snapshot: Optional[ProcessSnapshot] = None,
+    ) -> Dict[str, OperationResult]:
+        """Stop services together, so the whole batch takes about the longest grace period.
+
+        Each service's process group is sent SIGTERM (SIGKILL if force) at
+        once, then all their processes are waited for concurrently. Processes
+        of a service still alive after its stop_timeout are killed.
+        """
+        started_at = time.monotonic()
+        sig = signal.SIGKILL if force else signal.SIGTERM
+        results: Dict[str, OperationResult] = {}
+        # Service ID -> (service, its processes, leader first)
+        pending: Dict[str, Tuple[ServiceInfo, List[psutil.Process]]] = {}
+
+        for service in services:
             try:
-                process.wait(timeout=5)
-            except psutil.TimeoutExpired:
-                print(f"[DEBUG] Process {service.pid} didn't stop gracefully, force killing")
-                process.kill()
-                process.wait(timeout=2)
-
-            # Stop any remaining child processes
-            for child in children:
-                try:
-                    if child.is_running():
-                        if force:
-                            child.kill()
-                        else:
-                            child.terminate()
-                        print(f"[DEBUG] Stopped child process {child.pid}")
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-
+                members = self._service_processes(service, snapshot)
+                if members:
+                    self._signal_group(members, sig)
+                    pending[service.id] = (service, members)
+                    continue
+                print(f"[DEBUG] Service {service.name} PID {service.pid} no longer exists")
+            except psutil.NoSuchProcess:
+                print(f"[DEBUG] Process {service.pid} already gone")
+            except Exception as e:
+                print(f"[ERROR] Failed to stop service {service.name}: {e}")
+                results[service.id] = OperationResult(False, time.monotonic() - started_at)
+                continue
             service.pid = None
             service.update_status(ServiceStatus.STOPPED)
-
-            # Write stop log
-            log_path = self.config_manager.get_service_log_path(service.id)
-            try:
-                with open(log_path, "a", encoding="utf-8") as log_file:
-                    log_file.write(
-                        f"\n=== Service stopped: {time.strftime('%Y-%m-%d %H:%M:%S')} ===\n"
+            results[service.id] = OperationResult(True, 0.0)
+
+        gone_at: Dict[psutil.Process, float] = {}
+        alive = [process for _, members in pending.values() for process in members]
+        killed: Dict[str, List[psutil.Process]] = {}
+
+        def on_gone(process: psutil.Process) -> None:
+            gone_at[process] = time.monotonic()
+
+        # Wait until each grace period runs out in turn, escalating the services it belongs to
+        for timeout in sorted({service.stop_timeout for service, _ in pending.values()}):
+            remaining = started_at + timeout - time.monotonic()
+            if alive and remaining > 0:
+                alive = self._wait_exited(alive, remaining, on_gone)
+            alive_set = set(alive)
+            for service, members in pending.values():
+                stragglers = [process for process in members if process in alive_set]
+                if service.stop_timeout == timeout and stragglers:
+                    print(
+                        f"[DEBUG] Service {service.name} did not stop within "
+                        f"{timeout}s, force killing"
                     )
-            except Exception:
-                pass  # Ignore log write errors
-
-            return True
-
-        except psutil.NoSuchProcess:
-            print(f"[DEBUG] Process {service.pid} already gone")
+                    self._signal_group(stragglers, signal.SIGKILL)
+                    killed[service.id] = stragglers
+
+        if killed:
+            stragglers = [process for members in killed.values() for process in members]
+            alive = self._wait_exited(stragglers, KILL_TIMEOUT, on_gone)
+        alive_set = set(alive)
+
+        for service_id, (service, members) in pending.items():
+            if any(process in alive_set for process in members):
+                print(f"[ERROR] Failed to stop service {service.name}: processes still running")
+                results[service_id] = OperationResult(False, time.monotonic() - started_at)
+                continue
+
+            if service_id in killed:
+                pids = ", ".join(str(process.pid) for process in killed[service_id])
+                print(f"Warning: Service {service.name} needed SIGKILL for PID(s) {pids}")
+            if service.pid is not None:
+                self._process_cache.pop((service.pid, service.pid_create_time), None)
             service.pid = None
             service.update_status(ServiceStatus.STOPPED)
-            return True
-        except Exception as e:
-            print(f"[ERROR] Failed to stop service {service.name}: {e}")
-            return False
+            elapsed = max(gone_at.get(process, started_at) for process in members) - started_at
+            results[service_id] = OperationResult(True, elapsed)
+            self._write_stop_log(service, killed.get(service_id, []))
+
+        return results
 
     def restart_service(self, service: ServiceInfo, force: bool = False) -> bool:
         """Restart service."""
-        # First stop
+        # First stop; it returns once the process has exited
         if not self.stop_service(service, force):
             return False
 
-        # Wait a moment
-        time.sleep(1)
-
         # Then start
         return self.start_service(service)
 
@@ -248,7 +471,7 @@ class ProcessManager:
         if not service.pid:
             return False
 
-        if not psutil.pid_exists(service.pid):
+        if not self._owns_pid(service):
             service.pid = None
             service.update_status(ServiceStatus.STOPPED)
             return False
@@ -266,7 +489,7 @@ class ProcessManager:
         if not service.pid:
             return False
 
-        if not psutil.pid_exists(service.pid):
+        if not self._owns_pid(service):
             service.pid = None
             service.update_status(ServiceStatus.STOPPED)
             return False
@@ -279,12 +502,38 @@ class ProcessManager:
         except (OSError, ProcessLookupError):
             return False
 
-    def get_process_info(self, service: ServiceInfo) -> Optional[Dict[str, Any]]:
-        """Get process information."""
+    def get_process_info(
+        self, service: ServiceInfo, snapshot: Optional[ProcessSnapshot] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get process information, from the snapshot if given."""
         if not service.pid:
             return None
 
-        process_info = ProcessInfo(service.pid)
+        if snapshot is not None:
+            entry = snapshot.get(service.pid)
+            if (
+                entry is None
+                or not snapshot.is_running(service.pid)
+                or not same_start_time(entry.create_time, service.pid_create_time)
+            ):
+                return None
+            return {
+                "pid": service.pid,
+                "status": entry.status,
+                "cpu_percent": snapshot.cpu_percent(service.pid),
+                "memory": {"rss": entry.rss, "vms": entry.vms},
+                "create_time": entry.create_time,
+            }
+
+        try:
+            process = self._get_process(service.pid, service.pid_create_time)
+        except psutil.Error:
+            process = None
+        if process is None:
+            return None
+
+        # The cached handle measures CPU usage since the previous call
+        process_info = ProcessInfo(service.pid, process)
         if not process_info.exists:
             return None
 
@@ -296,18 +545,47 @@ class ProcessManager:
             "create_time": process_info.create_time,
         }
 
-    def is_process_running(self, pid: int) -> bool:
-        """Check if process is running."""
+    def is_service_running(
+        self, service: ServiceInfo, snapshot: Optional[ProcessSnapshot] = None
+    ) -> bool:
+        """Check if the service's own process is running."""
+        if not service.pid:
+            return False
+        return self.is_process_running(service.pid, snapshot, service.pid_create_time)
+
+    def is_process_running(
+        self,
+        pid: int,
+        snapshot: Optional[ProcessSnapshot] = None,
+        create_time: Optional[float] = None,
+    ) -> bool:
+        """Check if process is running, according to the snapshot if given.
+
+        With create_time, a different process that reuses the PID does not
+        count. A snapshot must be taken after the PID was read from storage,
+        so that a process started meanwhile is in it.
+        """
+        if snapshot is not None:
+            entry = snapshot.get(pid)
+            if entry is None or not snapshot.is_running(pid):
+                print(
+                    f"[DEBUG] Process {pid} not running (status: {entry.status if entry else None})"
+                )
+                return False
+            if not same_start_time(entry.create_time, create_time):
+                print(f"[DEBUG] PID {pid} now belongs to another process")
+                return False
+            return True
+
         try:
-            if not psutil.pid_exists(pid):
+            process = self._get_process(pid, create_time)
+            if process is None:
                 print(f"[DEBUG] Process {pid} not found in system")
                 return False
 
-            process = psutil.Process(pid)
-
-            # Check if process is running
-            if not process.is_running():
-                print(f"[DEBUG] Process {pid} exists but not running (status: {process.status()})")
+            # An unreaped zombie has exited too
+            if process.status() == psutil.STATUS_ZOMBIE:
+                print(f"[DEBUG] Process {pid} exists but not running (status: zombie)")
                 return False
 
             print(f"[DEBUG] Process {pid} check passed - running normally")
@@ -325,9 +603,195 @@ class ProcessManager:
             # If we can't determine status, assume it's running to avoid false restarts
             return True
 
+    def _get_process(
+        self, pid: int, create_time: Optional[float] = None
+    ) -> Optional[psutil.Process]:
+        """Get a cached psutil handle, or None if the process is gone or not the one started."""
+        key = (pid, create_time)
+        process = self._process_cache.get(key)
+        if process is not None:
+            # is_running() compares start times, so it is safe against PID reuse
+            if process.is_running():
+                return process
+            self._process_cache.pop(key, None)
+            return None
+
+        try:
+            process = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            return None
+        if not same_start_time(process.create_time(), create_time):
+            print(f"[DEBUG] PID {pid} now belongs to another process")
+            return None
+        self._process_cache[key] = process
+        return process
+
+    def _owns_pid(self, service: ServiceInfo) -> bool:
+        """Whether the service PID still belongs to the process it started."""
+        if service.pid is None:
+            return False
+        try:
+            return self._get_process(service.pid, service.pid_create_time) is not None
+        except psutil.AccessDenied:
+            return True
+        except psutil.Error:
+            return False
+
+    def _identify(self, service: ServiceInfo, pid: int) -> None:
+        """Record the (PID, start time) identity of a service process and cache its handle."""
+        service.pid = pid
+        service.pid_create_time = None
+        try:
+            process = psutil.Process(pid)
+            service.pid_create_time = process.create_time()
+        except psutil.Error:
+            return
+        self._process_cache[(pid, service.pid_create_time)] = process
+
+    def has_exited(self, service: ServiceInfo) -> bool:
+        """Whether the service's process is gone; quiet, for polling while it starts."""
+        if not service.pid or self.reaper.exit_code(service.pid) is not None:
+            return True
+        try:
+            process = self._get_process(service.pid, service.pid_create_time)
+            return process is None or process.status() == psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            return True
+        except psutil.Error:
+            return False
+
+    def _wait_for_child(self, pid: int) -> Optional[psutil.Process]:
+        """Wait for a launcher such as sudo to spawn its child; None if it does not."""
+        deadline = time.monotonic() + SUDO_CHILD_TIMEOUT
+        delay = 0.005
+        try:
+            parent = psutil.Process(pid)
+            while True:
+                children = parent.children()
+                if children:
+                    return children[0]
+                if parent.status() == psutil.STATUS_ZOMBIE or time.monotonic() >= deadline:
+                    return None
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            # If we can't get child processes, use original PID
+            return None
+
+    def _service_processes(
+        self, service: ServiceInfo, snapshot: Optional[ProcessSnapshot] = None
+    ) -> List[psutil.Process]:
+        """Get the service's process and all its descendants, leader first."""
+        if not service.pid:
+            return []
+        process = self._get_process(service.pid, service.pid_create_time)
+        if process is None:
+            return []
+
+        try:
+            if snapshot is not None:
+                children = self._processes(snapshot.children(service.pid, recursive=True))
+            else:
+                children = process.children(recursive=True)
+            print(f"[DEBUG] Found {len(children)} child processes for {service.name}")
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            children = []
+        return [process, *children]
+
+    def _signal_group(self, processes: List[psutil.Process], sig: int) -> None:
+        """Signal the process group of the first process, and any others outside it.
+
+        Services run in their own session, so one killpg() reaches the whole
+        tree except descendants that moved to another group.
+        """
+        leader, others = processes[0], processes[1:]
+        pgid = None
+        try:
+            pgid = os.getpgid(leader.pid)
+        except OSError:
+            pass
+        if pgid is not None and pgid > 1 and pgid != os.getpgrp():
+            try:
+                os.killpg(pgid, sig)
+            except ProcessLookupError:
+                pass
+        else:
+            pgid = None
+            others = processes
+
+        for process in others:
+            try:
+                if pgid is None or os.getpgid(process.pid) != pgid:
+                    process.send_signal(sig)
+            except (OSError, psutil.Error):
+                pass
+
+    def _wait_exited(
+        self,
+        processes: List[psutil.Process],
+        timeout: float,
+        on_exit: Callable[[psutil.Process], None],
+    ) -> List[psutil.Process]:
+        """Wait for processes to exit, all at once; returns those still alive.
+
+        Like psutil.wait_procs(), but a zombie counts as exited rather than
+        as alive until its parent gets round to reaping it.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.005
+        alive = processes
+        while True:
+            still_alive = []
+            for process in alive:
+                if self._has_exited(process):
+                    on_exit(process)
+                else:
+                    still_alive.append(process)
+            alive = still_alive
+            remaining = deadline - time.monotonic()
+            if not alive or remaining <= 0:
+                return alive
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.1)
+
+    def _has_exited(self, process: psutil.Process) -> bool:
+        """Whether a process has exited, reaping it if it is our child."""
+        # The reaper alone collects its children, so their exit codes are kept
+        if self.reaper.is_tracked(process.pid):
+            return self.reaper.exit_code(process.pid) is not None
+        try:
+            if process.is_running() and process.status() != psutil.STATUS_ZOMBIE:
+                return False
+            process.wait(timeout=0)
+        except psutil.AccessDenied:
+            return False
+        except (psutil.NoSuchProcess, psutil.TimeoutExpired):
+            pass
+        return True
+
+    def _write_stop_log(self, service: ServiceInfo, killed: List[psutil.Process]) -> None:
+        """Append the stop marker to the service log."""
+        log_path = self.config_manager.get_service_log_path(service.id)
+        note = f" (SIGKILL: {', '.join(str(p.pid) for p in killed)})" if killed else ""
+        try:
+            with open(log_path, "a", encoding="utf-8") as log_file:
+                log_file.write(
+                    f"\n=== Service stopped: {time.strftime('%Y-%m-%d %H:%M:%S')}{note} ===\n"
+                )
+        except Exception:
+            pass  # Ignore log write errors
+
+    def _processes(self, pids: List[int]) -> List[psutil.Process]:
+        """Get psutil handles for the PIDs that still exist."""
+        processes = []
+        for pid in pids:
+            try:
+                processes.append(psutil.Process(pid))
+            except psutil.NoSuchProcess:
+                pass
+        return processes
+
     def _parse_command(self, command: str) -> List[str]:
         """Parse command string."""
         # Simple command parsing, supports quotes
-        import shlex
-
         return shlex.split(command)
@@ -0,0 +1,134 @@
+"""Runtime service state kept apart from persistent service definitions."""
+
+import json
+import os
+import shutil
+from typing import Any, Dict, Optional
+
+import psutil
+
+from .backends import atomic_write_json
+from .config import ConfigManager
+
+
+def get_boot_id() -> str:
+    """Identify the current boot of this machine."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return str(int(psutil.boot_time()))
+
+
+class RuntimeStateStore:
+    """Per-service runtime records (pid, status, ...) in the runtime directory.
+
+    The runtime directory normally lives on tmpfs ($XDG_RUNTIME_DIR), and its
+    records are tagged with the boot ID, so after a reboot every record is gone
+    and services are known not to be running instead of being guessed at.
+    """
+
+    def __init__(self, config_manager: ConfigManager):
+        self.config_manager = config_manager
+        self.runtime_dir = config_manager.get_runtime_dir()
+        self.state_dir = os.path.join(self.runtime_dir, "state")
+        self.boot_id_path = os.path.join(self.runtime_dir, "boot_id")
+        self.boot_changed = False
+        # File mtime per service ID as of our last load or write
+        self._mtimes: Dict[str, int] = {}
+        self._dir_mtime: Optional[int] = None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Load all runtime records keyed by service ID."""
+        self._mtimes = {}
+        records = self.load_changed()
+        return {service_id: record for service_id, record in records.items() if record}
+
+    def load_changed(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Load records written by others since our last look; None marks a removed record."""
+        self._dir_mtime = self._get_dir_mtime()
+        changed: Dict[str, Optional[Dict[str, Any]]] = {}
+        seen = set()
+        try:
+            entries = list(os.scandir(self.state_dir))
+        except FileNotFoundError:
+            entries = []
+
+        for entry in entries:
+            if not entry.name.endswith(".json") or entry.name.startswith("."):
+                continue
+            service_id = entry.name[: -len(".json")]
+            seen.add(service_id)
+            try:
+                mtime = entry.stat().st_mtime_ns
+                if self._mtimes.get(service_id) == mtime:
+                    continue
+                with open(entry.path, encoding="utf-8") as f:
+                    changed[service_id] = json.load(f)
+                self._mtimes[service_id] = mtime
+            except (OSError, ValueError) as e:
+                print(f"Warning: Failed to load runtime state {service_id}: {e}")
+
+        for service_id in set(self._mtimes) - seen:
+            del self._mtimes[service_id]
+            changed[service_id] = None
+        return changed
+
+    def save(self, service_id: str, record: Dict[str, Any]) -> None:
+        """Write one service's runtime record."""
+        path = self._record_path(service_id)
+        atomic_write_json(path, record)
+        self._mtimes[service_id] = os.stat(path).st_mtime_ns
+        self._dir_mtime = self._get_dir_mtime()
+
+    def remove(self, service_id: str) -> None:
+        """Delete one service's runtime record."""
+        try:
+            os.unlink(self._record_path(service_id))
+        except FileNotFoundError:
+            pass
+        self._mtimes.pop(service_id, None)
+        self._dir_mtime = self._get_dir_mtime()
+
+    def has_record(self, service_id: str) -> bool:
+        """Whether the service has runtime state from the current boot."""
+        return service_id in self._mtimes
+
+    def has_changed(self) -> bool:
+        """Whether records were added, replaced or removed since our last look."""
+        return self._get_dir_mtime() != self._dir_mtime
+
+    def check_boot(self) -> None:
+        """Discard runtime records left over from a previous boot.
+
+        Call with the storage lock held, so records are not discarded while
+        another process reads or writes them.
+        """
+        self.config_manager.ensure_runtime_dir()
+        boot_id = get_boot_id()
+        try:
+            with open(self.boot_id_path, encoding="utf-8") as f:
+                recorded = f.read().strip()
+        except OSError:
+            recorded = None
+
+        if recorded == boot_id:
+            return
+
+        # A first run has no previous boot to discard state from
+        self.boot_changed = recorded is not None
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(self.boot_id_path, "w", encoding="utf-8") as f:
+            f.write(boot_id + "\n")
+
+    def _record_path(self, service_id: str) -> str:
+        """Get runtime record path for a service."""
+        return os.path.join(self.state_dir, f"{service_id}.json")
+
+    def _get_dir_mtime(self) -> Optional[int]:
+        """Directory mtime changes whenever a record is renamed in or unlinked."""
+        try:
+            return os.stat(self.state_dir).st_mtime_ns
+        except FileNotFoundError:
+            return None
@@ -1,12 +1,26 @@
 """Service manager - core class integrating all functionality."""
 
+import os
 import time
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 from .config import ConfigManager
 from .models import ServiceInfo, ServiceStatus
-from .process_manager import ProcessManager
-from .storage import ServiceStorage
+from .notify import NotifyProbe, NotifyServer
+from .probes import Probe, build_probe, wait_for
+from .process_manager import OperationResult, ProcessManager, ProcessSnapshot
+from .storage import ServiceConflictError, ServiceStorage
+
+# Fields an operation on a running process is authoritative for
+PROCESS_FIELDS = (
+    "status",
+    "pid",
+    "pid_create_time",
+    "time_to_ready",
+    "notify_status",
+    "updated_at",
+)
 
 
 class ServiceManager:
@@ -16,6 +30,10 @@ class ServiceManager:
         self.config_manager = ConfigManager(config_path)
         self.storage = ServiceStorage(self.config_manager)
         self.process_manager = ProcessManager(self.config_manager)
+        # sd_notify sockets of the services this process starts or monitors
+        self.notify = NotifyServer(
+            self.config_manager.get_notify_socket_path, self.process_manager.reaper.wake
+        )
 
     def add_service(
         self,
@@ -24,6 +42,14 @@ class ServiceManager:
         auto_restart: bool = True,
         working_dir: str = "",
         env_vars: Optional[Dict[str, str]] = None,
+        ready_check: str = "",
+        ready_timeout: int = 30,
+        live_check: str = "",
+        live_interval: int = 30,
+        notify: bool = False,
+        watchdog_sec: int = 0,
+        restart_on: str = "",
+        success_exit_codes: Iterable[int] = (),
     ) -> ServiceInfo:
         """Add new service."""
         service = self.storage.add_service(
@@ -32,20 +58,81 @@ class ServiceManager:
             auto_restart=auto_restart,
             working_dir=working_dir,
             env_vars=env_vars,
+            ready_check=ready_check,
+            ready_timeout=ready_timeout,
+            live_check=live_check,
+            live_interval=live_interval,
+            notify=notify,
+            watchdog_sec=watchdog_sec,
+            restart_on=restart_on,
+            success_exit_codes=success_exit_codes,
         )
         return service
 
+    def import_services(
+        self,
+        entries: List[Dict[str, Any]],
+        start: bool = False,
+        max_workers: Optional[int] = None,
+    ) -> List[ServiceInfo]:
+        """Add many services with a single storage write, optionally starting them."""
+        services = self.storage.add_services(entries)
+        if start:
+            self.start_many([service.id for service in services], max_workers)
+        return services
+
+    def start_many(
+        self, service_ids: List[str], max_workers: Optional[int] = None
+    ) -> Dict[str, OperationResult]:
+        """Start services in parallel."""
+        return self._run_many(self.start_service, service_ids, max_workers)
+
+    def stop_many(self, service_ids: List[str], force: bool = False) -> Dict[str, OperationResult]:
+        """Stop services together; takes about as long as the slowest one."""
+        services: Dict[str, ServiceInfo] = {}
+        resolved: Dict[str, Optional[str]] = {}
+        for service_id_or_name in service_ids:
+            service = self.storage.find_service(service_id_or_name)
+            resolved[service_id_or_name] = service.id if service else None
+            if service:
+                services.setdefault(service.id, service)
+
+        for service in services.values():
+            self._announce_stop(service)
+        stopped = self.process_manager.stop_services(list(services.values()), force)
+        for service in services.values():
+            if stopped[service.id].success:
+                self._save_service(service, PROCESS_FIELDS)
+
+        return {
+            key: stopped[service_id] if service_id else OperationResult(False, 0.0)
+            for key, service_id in resolved.items()
+        }
+
+    def restart_many(
+        self, service_ids: List[str], force: bool = False, max_workers: Optional[int] = None
+    ) -> Dict[str, OperationResult]:
+        """Restart services in parallel."""
+        return self._run_many(lambda i: self.restart_service(i, force), service_ids, max_workers)
+
     def start_service(self, service_id_or_name: str) -> bool:
-        """Start service."""
+        """Start service; with a readiness probe, returns once it is ready."""
         service = self.storage.find_service(service_id_or_name)
         if not service:
             return False
 
-        success = self.process_manager.start_service(service)
+        success = self._launch(service, self.process_manager.start_service)
         if success:
             # Mark service as auto-startable when manually started
             service.auto_start = True
-            self.storage.update_service(service)
+            # Started by hand: the restart backoff and window start over
+            service.backoff_attempt = 0
+            service.recent_restarts = ()
+            self._save_service(
+                service, PROCESS_FIELDS + ("auto_start", "backoff_attempt", "recent_restarts")
+            )
+        elif service.status == ServiceStatus.FAILED:
+            self._save_service(service, PROCESS_FIELDS)
         return success
 
     def stop_service(self, service_id_or_name: str, force: bool = False) -> bool:
@@ -54,9 +141,10 @@ class ServiceManager:
         if not service:
             return False
 
+        self._announce_stop(service)
         success = self.process_manager.stop_service(service, force)
         if success:
-            self.storage.update_service(service)
+            self._save_service(service, PROCESS_FIELDS)
         return success
 
     def restart_service(self, service_id_or_name: str, force: bool = False) -> bool:
@@ -65,10 +153,13 @@ class ServiceManager:
         if not service:
             return False
 
-        success = self.process_manager.restart_service(service, force)
+        self._announce_stop(service)
+        success = self._launch(service, lambda s: self.process_manager.restart_service(s, force))
         if success:
             service.increment_restart_count()
-            self.storage.update_service(service)
+            self._save_service(service, PROCESS_FIELDS + ("restart_count",))
+        elif service.status == ServiceStatus.FAILED:
+            self._save_service(service, PROCESS_FIELDS)
         return success
 
     def pause_service(self, service_id_or_name: str) -> bool:
@@ -79,7 +170,7 @@ class ServiceManager:
 
         success = self.process_manager.pause_service(service)
         if success:
-            self.storage.update_service(service)
+            self._save_service(service, PROCESS_FIELDS)
         return success
 
     def resume_service(self, service_id_or_name: str) -> bool:
@@ -90,7 +181,7 @@ class ServiceManager:
 
         success = self.process_manager.resume_service(service)
         if success:
-            self.storage.update_service(service)
+            self._save_service(service, PROCESS_FIELDS)
         return success
 
     def remove_service(self, service_id_or_name: str, force: bool = False) -> bool:
@@ -108,19 +199,50 @@ class ServiceManager:
             if not self.stop_service(service.id, force=True):
                 return False
 
-        return self.storage.remove_service(service.id)
+        if not self.storage.remove_service(service.id):
+            return False
+        self.process_manager.forget(service.id)
+        return True
+
+    def update_service(
+        self,
+        service_id_or_name: str,
+        mutate: Callable[[ServiceInfo], None],
+        attempts: int = 3,
+    ) -> Optional[ServiceInfo]:
+        """Apply mutate to the latest version of a service and save it.
+
+        On a version conflict the service is re-read and mutate applied again.
+        Returns the saved service, or None if it does not exist or kept conflicting.
+        """
+        for _ in range(attempts):
+            service = self.storage.find_service(service_id_or_name)
+            if not service:
+                return None
+            mutate(service)
+            try:
+                self.storage.update_service(service)
+                return service
+            except ServiceConflictError:
+                continue
+
+        print(f"Warning: Gave up updating service {service_id_or_name} after {attempts} conflicts")
+        return None
 
     def get_service(self, service_id_or_name: str) -> Optional[ServiceInfo]:
         """Get service information."""
         return self.storage.find_service(service_id_or_name)
 
     def list_services(self) -> List[ServiceInfo]:
-        """Get all services list."""
+        """Get all services list, with statuses checked against one process snapshot."""
         services = self.storage.get_all_services()
+        # Taken after reading the services, so their processes are all in it
+        snapshot = self.process_manager.snapshot()
 
-        # Update service status
-        for service in services:
-            self._update_service_status(service)
+        # Update service status, writing all changes at once
+        with self.storage.batch():
+            for service in services:
+                self._update_service_status(service, snapshot)
 
         return services
 
@@ -176,25 +298,170 @@ class ServiceManager:
         except Exception:
             return False
 
-    def _update_service_status(self, service: ServiceInfo) -> None:
+    def _run_many(
+        self,
+        operation: Callable[[str], bool],
+        service_ids: List[str],
+        max_workers: Optional[int],
+    ) -> Dict[str, OperationResult]:
+        """Run an operation on each service using a bounded pool of worker threads.
+
+        At most max_workers (default: the max_parallel_operations setting)
+        services are handled at once, so wall time follows the slowest service
+        rather than the sum of all of them.
+        """
+        if not service_ids:
+            return {}
+
+        def timed(service_id: str) -> OperationResult:
+            started_at = time.monotonic()
+            try:
+                success = operation(service_id)
+            except Exception as e:
+                print(f"Error: Operation on service {service_id} failed: {e}")
+                success = False
+            return OperationResult(success, time.monotonic() - started_at)
+
+        workers = max_workers or self.config_manager.config.max_parallel_operations
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(service_ids)))) as executor:
+            return dict(zip(service_ids, executor.map(timed, service_ids)))
+
+    def build_probe(self, service: ServiceInfo, spec: str) -> Probe:
+        """Create a probe for the service; exec probes run in its directory and environment."""
+        return build_probe(
+            spec,
+            self.config_manager.get_service_log_path(service.id),
+            service.working_dir or None,
+            {**os.environ, **service.env_vars},
+        )
+
+    def _launch(self, service: ServiceInfo, start: Callable[[ServiceInfo], bool]) -> bool:
+        """Start a service's process with start(), then wait for its readiness probe.
+
+        The service stays STARTING until the probe passes, then becomes
+        RUNNING with its time to ready recorded. If the probe does not pass
+        within ready_timeout, or the process exits first, the service is
+        stopped and marked FAILED. The probe is created before the process
+        starts, so log output written right away is not missed.
+        """
+        probe: Optional[Probe] = None
+        if service.notify:
+            probe = self._notify_probe(service)
+        elif service.ready_check:
+            try:
+                probe = self.build_probe(service, service.ready_check)
+            except ValueError as e:
+                print(f"Error: Service {service.name} has an invalid readiness probe: {e}")
+                service.update_status(ServiceStatus.FAILED)
+                return False
+
+        if not start(service):
+            return False
+        if probe is None:
+            return True
+
+        self._save_service(service, PROCESS_FIELDS)
+        print(f"⏳ Waiting for service {service.name} to become ready ({service.ready_check})")
+        elapsed = wait_for(
+            probe, service.ready_timeout, lambda: not self.process_manager.has_exited(service)
+        )
+        if elapsed is not None:
+            service.time_to_ready = elapsed
+            state = self.notify.state(service.id)
+            if state is not None:
+                service.notify_status = state.status
+            service.update_status(ServiceStatus.RUNNING)
+            print(f"✅ Service {service.name} ready in {elapsed:.2f}s")
+            return True
+
+        print(f"❌ Service {service.name} did not become ready within {service.ready_timeout}s")
+        self.process_manager.stop_service(service)
+        service.update_status(ServiceStatus.FAILED)
+        return False
+
+    def _notify_probe(self, service: ServiceInfo) -> NotifyProbe:
+        """Probe for READY=1 on the service's notify socket.
+
+        If a running daemon holds the socket, it receives READY=1 and marks
+        the service RUNNING in storage, so that is what gets checked instead.
+        """
+        if self.notify.listen(service.id, service.watchdog_sec):
+            self.notify.reset(service.id)
+
+            def notified_ready() -> bool:
+                state = self.notify.state(service.id)
+                return state is not None and state.ready
+
+            return NotifyProbe(notified_ready)
+
+        def recorded_ready() -> bool:
+            latest = self.storage.get_service(service.id)
+            return (
+                latest is not None
+                and latest.status == ServiceStatus.RUNNING
+                and latest.pid == service.pid
+            )
+
+        return NotifyProbe(recorded_ready)
+
+    def _announce_stop(self, service: ServiceInfo) -> None:
+        """Record that a service is being stopped before its process is signalled.
+
+        A daemon that started the process sees it exit immediately, and must
+        not take that for a crash and restart it.
+        """
+        if service.status in (ServiceStatus.RUNNING, ServiceStatus.STARTING):
+            service.update_status(ServiceStatus.STOPPED)
+            self._save_service(service, ("status", "updated_at"))
+
+    def _save_service(self, service: ServiceInfo, fields: tuple) -> None:
+        """Save the result of a process operation.
+
+        The process was already started/stopped, so on a version conflict the
+        operation's fields are re-applied onto the latest version of the service.
+        """
+        try:
+            self.storage.update_service(service)
+        except ServiceConflictError:
+            values = {key: getattr(service, key) for key in fields}
+
+            def reapply(latest: ServiceInfo) -> None:
+                for key, value in values.items():
+                    setattr(latest, key, value)
+
+            self.update_service(service.id, reapply)
+
+    def _update_service_status(
+        self, service: ServiceInfo, snapshot: Optional[ProcessSnapshot] = None
+    ) -> None:
         """Update service status."""
         if service.pid:
-            if self.process_manager.is_process_running(service.pid):
+            if self.process_manager.is_service_running(service, snapshot):
                 # Process exists and status is not running, update status
-                if (
-                    service.status != ServiceStatus.RUNNING
-                    and service.status != ServiceStatus.PAUSED
+                # A STARTING service waits for its readiness probe instead
+                if service.status not in (
+                    ServiceStatus.RUNNING,
+                    ServiceStatus.PAUSED,
+                    ServiceStatus.STARTING,
                 ):
                     service.update_status(ServiceStatus.RUNNING)
                     self.storage.update_service(service)
             else:
-                # Process doesn't exist, update status
+                # Process doesn't exist; the exit code is known for our own children
+                exit_code = self.process_manager.reaper.exit_code(service.pid)
                 service.pid = None
-                service.update_status(ServiceStatus.STOPPED)
+                if exit_code is not None:
+                    service.last_exit_code = exit_code
+                failed = exit_code is not None and not service.exited_cleanly(exit_code)
+                service.update_status(ServiceStatus.FAILED if failed else ServiceStatus.STOPPED)
                 self.storage.update_service(service)
         else:
-            # No PID and status is not stopped, update status
-            if service.status != ServiceStatus.STOPPED:
+            # No PID: stopped, unless it failed or the monitor gave up restarting it
+            if service.status not in (
+                ServiceStatus.STOPPED,
+                ServiceStatus.FAILED,
+                ServiceStatus.CRASH_LOOP,
+            ):
                 service.update_status(ServiceStatus.STOPPED)
                 self.storage.update_service(service)
 
@@ -1,12 +1,157 @@
 """Service data storage management."""
 
-import json
+import bisect
+import fcntl
 import os
+import threading
 import uuid
-from typing import Dict, List, Optional
+from contextlib import contextmanager
+from dataclasses import MISSING, dataclass, fields
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from .config import ConfigManager
-from .models import ServiceInfo, ServiceStatus
+from .backends import create_backend
+from .config import RESTART_POLICY_SETTINGS, ConfigManager
+from .models import EMPTY_ENV, RESTART_MODES, RUNTIME_FIELDS, ServiceInfo, ServiceStatus
+from .probes import parse_probe_spec
+from .runtime_state import RuntimeStateStore
+
+# Fields storage manages itself; the rest may be given when adding services
+MANAGED_FIELDS = ("id", "created_at", "restart_history") + RUNTIME_FIELDS
+SERVICE_FIELDS = {f.name: f for f in fields(ServiceInfo) if f.name not in MANAGED_FIELDS}
+
+
+def validate_service_entry(entry: Dict[str, Any]) -> List[str]:
+    """Check a service definition given as a dict; returns a list of problems."""
+    errors = []
+    for key in ("name", "command"):
+        if not isinstance(entry.get(key), str) or not entry[key].strip():
+            errors.append(f"'{key}' must be a non-empty string")
+    for key, value in entry.items():
+        service_field = SERVICE_FIELDS.get(key)
+        if service_field is None:
+            errors.append(f"unknown field '{key}'")
+        elif key == "env_vars":
+            if not isinstance(value, dict) or not all(
+                isinstance(k, str) and isinstance(v, str) for k, v in value.items()
+            ):
+                errors.append("'env_vars' must map names to string values")
+        elif key == "restart_on":
+            if value not in RESTART_MODES:
+                errors.append(f"'restart_on' must be one of: {', '.join(RESTART_MODES)}")
+        elif key == "success_exit_codes":
+            if not isinstance(value, (list, tuple)) or not all(type(v) is int for v in value):
+                errors.append("'success_exit_codes' must be a list of integers")
+        elif key in ("ready_check", "live_check") and isinstance(value, str) and value:
+            try:
+                parse_probe_spec(value)
+            except ValueError as e:
+                errors.append(str(e))
+        elif service_field.default is not MISSING:
+            expected = type(service_field.default)
+            # Whole numbers are fine for float fields
+            if not isinstance(value, expected) and not (expected is float and type(value) is int):
+                errors.append(f"'{key}' must be of type {expected.__name__}")
+    return errors
+
+
+class ServiceConflictError(Exception):
+    """Raised when a service update is based on an outdated version."""
+
+
+@dataclass
+class StorageStats:
+    """Counters of logical service updates versus physical backend writes."""
+
+    updates: int = 0
+    flushes: int = 0
+    # Updates rejected because the service changed since it was read
+    conflicts: int = 0
+
+
+class ServiceIndex:
+    """Secondary indexes over stored services: name, status and sorted ID prefix."""
+
+    def __init__(self) -> None:
+        self._by_name: Dict[str, str] = {}
+        self._by_status: Dict[ServiceStatus, Set[str]] = {}
+        self._sorted_ids: List[str] = []
+        # Indexed (name, status) per service ID, so updates know what to unindex;
+        # status is None for services known by name only (not loaded yet)
+        self._entries: Dict[str, Tuple[str, Optional[ServiceStatus]]] = {}
+
+    def rebuild(self, services: Iterable[ServiceInfo]) -> None:
+        """Rebuild all indexes from scratch."""
+        self.rebuild_names({})
+        for service in services:
+            self._index(service.id, service.name, service.status)
+        self._sorted_ids = sorted(self._entries)
+
+    def rebuild_names(self, names: Dict[str, str]) -> None:
+        """Rebuild indexes from an ID -> name mapping, leaving statuses unknown."""
+        self._by_name = {}
+        self._by_status = {}
+        self._entries = {}
+        for service_id, name in names.items():
+            self._index(service_id, name, None)
+        self._sorted_ids = sorted(self._entries)
+
+    def add(self, service: ServiceInfo) -> None:
+        """Index a new service."""
+        self._index(service.id, service.name, service.status)
+        bisect.insort(self._sorted_ids, service.id)
+
+    def update(self, service: ServiceInfo) -> None:
+        """Re-index a service whose name or status may have changed."""
+        entry = self._entries.get(service.id)
+        if entry is None:
+            self.add(service)
+        elif entry != (service.name, service.status):
+            self._unindex(service.id)
+            self._index(service.id, service.name, service.status)
+
+    def remove(self, service_id: str) -> None:
+        """Remove a service from all indexes."""
+        if service_id not in self._entries:
+            return
+        self._unindex(service_id)
+        position = bisect.bisect_left(self._sorted_ids, service_id)
+        del self._sorted_ids[position]
+
+    def has_id(self, service_id: str) -> bool:
+        """Whether a service ID is indexed."""
+        return service_id in self._entries
+
+    def id_for_name(self, name: str) -> Optional[str]:
+        """Look up service ID by name."""
+        return self._by_name.get(name)
+
+    def ids_with_status(self, status: ServiceStatus) -> Set[str]:
+        """Look up service IDs by status."""
+        return self._by_status.get(status, set())
+
+    def ids_with_prefix(self, prefix: str) -> List[str]:
+        """Look up service IDs starting with prefix."""
+        position = bisect.bisect_left(self._sorted_ids, prefix)
+        matches = []
+        while position < len(self._sorted_ids) and self._sorted_ids[position].startswith(prefix):
+            matches.append(self._sorted_ids[position])
+            position += 1
+        return matches
+
+    def _index(self, service_id: str, name: str, status: Optional[ServiceStatus]) -> None:
+        """Add service to name and status indexes."""
+        self._entries[service_id] = (name, status)
+        self._by_name[name] = service_id
+        if status is not None:
+            self._by_status.setdefault(status, set()).add(service_id)
+
+    def _unindex(self, service_id: str) -> None:
+        """Remove service from name and status indexes."""
+        name, status = self._entries.pop(service_id)
+        if self._by_name.get(name) == service_id:
+            del self._by_name[name]
+        if status is not None:
+            self._by_status.get(status, set()).discard(service_id)
 
 
 class ServiceStorage:
@@ -15,46 +160,87 @@ class ServiceStorage:
     def __init__(self, config_manager: ConfigManager):
         self.config_manager = config_manager
         self.db_path = config_manager.get_services_db_path()
+        self.lock_path = config_manager.get_services_lock_path()
+        self.backend = create_backend(config_manager)
+        # Runtime state (pid, status, ...) lives apart from the definitions when split
+        self.runtime: Optional[RuntimeStateStore] = None
+        if config_manager.config.split_runtime_state:
+            self.runtime = RuntimeStateStore(config_manager)
         self._services: Dict[str, ServiceInfo] = {}
-        self.load_services()
+        # Lazy backends load services on first access; runtime records wait here until then
+        self._fully_loaded = False
+        self._unloaded_runtime: Dict[str, Dict[str, Any]] = {}
+        # Last persisted definition and runtime records, to write only what changed
+        self._definitions: Dict[str, Dict[str, Any]] = {}
+        self._runtime_records: Dict[str, Dict[str, Any]] = {}
+        self._index = ServiceIndex()
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_fd: Optional[int] = None
+        # Batches are per thread: {service_id: service} pending a flush
+        self._batch_state = threading.local()
+        self.stats = StorageStats()
+        with self._locked():
+            if self.runtime is not None:
+                self.runtime.check_boot()
+            self.load_services()
+            self._migrate_runtime_state()
+            if self.runtime_reset:
+                # Backends that index status saw the previous boot's runtime state too
+                self.backend.record_runtime(
+                    {
+                        service_id: service.runtime_dict()
+                        for service_id, service in self._services.items()
+                    }
+                )
+
+    @property
+    def runtime_reset(self) -> bool:
+        """Whether runtime state from a previous boot was discarded on startup."""
+        return self.runtime is not None and self.runtime.boot_changed
+
+    def has_runtime_state(self, service_id: str) -> bool:
+        """Whether the service's pid/status are known to be from the current boot.
+
+        Always False when runtime state is not split out, as it cannot be told apart.
+        """
+        return self.runtime is not None and self.runtime.has_record(service_id)
 
     def load_services(self) -> None:
-        """Load service data from file."""
-        if not os.path.exists(self.db_path):
-            self._services = {}
+        """Load service data from the storage backend.
+
+        Lazy backends only load the ID -> name index here; services are read on
+        first access.
+        """
+        self._services = {}
+        self._definitions = {}
+        self._runtime_records = {}
+        self._unloaded_runtime = {}
+        if self.backend.supports_lazy_load:
+            try:
+                names = self.backend.load_index()
+                self._unloaded_runtime = self.runtime.load() if self.runtime else {}
+            except Exception as e:
+                print(f"Warning: Failed to load service data: {e}")
+                names = {}
+            self._index.rebuild_names(names)
+            self._fully_loaded = False
             return
 
         try:
-            with open(self.db_path, encoding="utf-8") as f:
-                data = json.load(f)
-
-            self._services = {}
-            for service_id, service_data in data.items():
-                try:
-                    service = ServiceInfo.from_dict(service_data)
-                    self._services[service_id] = service
-                except Exception as e:
-                    print(f"Warning: Failed to load service {service_id}: {e}")
-
+            data = self.backend.load()
+            runtime = self.runtime.load() if self.runtime else {}
+            self._add_loaded(data, runtime)
         except Exception as e:
             print(f"Warning: Failed to load service data: {e}")
             self._services = {}
 
-    def save_services(self) -> None:
-        """Save service data to file."""
-        try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-
-            data = {}
-            for service_id, service in self._services.items():
-                data[service_id] = service.to_dict()
-
-            with open(self.db_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+        self._index.rebuild(self._services.values())
+        self._fully_loaded = True
 
-        except Exception as e:
-            print(f"Error: Failed to save service data: {e}")
+    def save_services(self) -> None:
+        """Save all service data to the storage backend."""
+        self._persist(dict(self._services))
 
     def add_service(
         self,
@@ -63,77 +249,449 @@ class ServiceStorage:
         auto_restart: bool = True,
         working_dir: str = "",
         env_vars: Optional[Dict[str, str]] = None,
+        ready_check: str = "",
+        ready_timeout: int = 30,
+        live_check: str = "",
+        live_interval: int = 30,
+        notify: bool = False,
+        watchdog_sec: int = 0,
+        restart_on: str = "",
+        success_exit_codes: Iterable[int] = (),
     ) -> ServiceInfo:
-        """Add new service."""
-        service_id = self._generate_service_id()
-
-        # Check name conflict
-        if self.get_service_by_name(name):
-            raise ValueError(f"Service name '{name}' already exists")
-
-        service = ServiceInfo(
-            id=service_id,
-            name=name,
-            command=command,
-            auto_restart=auto_restart,
-            working_dir=working_dir or os.getcwd(),
-            env_vars=env_vars or {},
-            max_restart_attempts=self.config_manager.config.max_restart_attempts,
-            restart_delay=self.config_manager.config.restart_delay,
-        )
-
-        self._services[service_id] = service
-        self.save_services()
-        return service
+        """Add new service; an empty restart_on takes the configured default."""
+        for spec in (ready_check, live_check):
+            if spec:
+                parse_probe_spec(spec)
+        if restart_on and restart_on not in RESTART_MODES:
+            raise ValueError(f"Restart mode must be one of: {', '.join(RESTART_MODES)}")
+
+        with self._locked():
+            self._refresh()
+            service_id = self._generate_service_id()
+
+            # Check name conflict
+            if self.get_service_by_name(name):
+                raise ValueError(f"Service name '{name}' already exists")
+
+            policy_settings = {
+                key: getattr(self.config_manager.config, key) for key in RESTART_POLICY_SETTINGS
+            }
+            if restart_on:
+                policy_settings["restart_on"] = restart_on
+            service = ServiceInfo(
+                id=service_id,
+                name=name,
+                command=command,
+                auto_restart=auto_restart,
+                success_exit_codes=tuple(success_exit_codes),
+                working_dir=working_dir or os.getcwd(),
+                env_vars=env_vars or EMPTY_ENV,
+                max_restart_attempts=self.config_manager.config.max_restart_attempts,
+                restart_delay=self.config_manager.config.restart_delay,
+                **policy_settings,
+                stop_timeout=self.config_manager.config.stop_timeout,
+                ready_check=ready_check,
+                ready_timeout=ready_timeout,
+                live_check=live_check,
+                live_interval=live_interval,
+                notify=notify,
+                watchdog_sec=watchdog_sec,
+            )
+
+            self._services[service_id] = service
+            self._index.add(service)
+            self._persist({service_id: service})
+            return service
+
+    def add_services(self, entries: List[Dict[str, Any]]) -> List[ServiceInfo]:
+        """Add many services given as dicts of ServiceInfo fields, with a single write.
+
+        Every entry is validated and checked for name conflicts first; if any
+        fails, a ValueError listing all problems is raised and nothing is added.
+        """
+        with self._locked():
+            self._refresh()
+            errors: List[str] = []
+            seen: Set[str] = set()
+            for position, entry in enumerate(entries, 1):
+                label = f"#{position} ({entry.get('name', '?')})"
+                errors.extend(f"{label}: {error}" for error in validate_service_entry(entry))
+                name = entry.get("name", "")
+                if name in seen:
+                    errors.append(f"{label}: duplicate service name '{name}'")
+                elif self._index.id_for_name(name) is not None:
+                    errors.append(f"{label}: service name '{name}' already exists")
+                seen.add(name)
+            if errors:
+                raise ValueError("Invalid services:\n" + "\n".join(errors))
+
+            config = self.config_manager.config
+            services = []
+            for entry in entries:
+                service = ServiceInfo.from_dict(
+                    {
+                        "max_restart_attempts": config.max_restart_attempts,
+                        "restart_delay": config.restart_delay,
+                        **{key: getattr(config, key) for key in RESTART_POLICY_SETTINGS},
+                        "stop_timeout": config.stop_timeout,
+                        **entry,
+                        "id": self._generate_service_id(),
+                        "working_dir": entry.get("working_dir") or os.getcwd(),
+                    }
+                )
+                self._services[service.id] = service
+                self._index.add(service)
+                services.append(service)
+
+            self._persist({service.id: service for service in services})
+            return services
 
     def get_service(self, service_id: str) -> Optional[ServiceInfo]:
         """Get service by ID."""
-        return self._services.get(service_id)
+        self._refresh()
+        return self._get_loaded(service_id)
 
     def get_service_by_name(self, name: str) -> Optional[ServiceInfo]:
         """Get service by name."""
-        for service in self._services.values():
-            if service.name == name:
-                return service
-        return None
+        self._refresh()
+        service_id = self._index.id_for_name(name)
+        return self._get_loaded(service_id) if service_id else None
+
+    def get_services_by_prefix(self, prefix: str) -> List[ServiceInfo]:
+        """Get services whose ID starts with prefix."""
+        self._refresh()
+        ids = self._index.ids_with_prefix(prefix)
+        services = [self._get_loaded(service_id) for service_id in ids]
+        return [service for service in services if service]
 
     def get_all_services(self) -> List[ServiceInfo]:
         """Get all services."""
+        self._refresh()
+        self._ensure_loaded()
         return list(self._services.values())
 
     def update_service(self, service: ServiceInfo) -> None:
-        """Update service information."""
-        if service.id in self._services:
+        """Update service information if it still has the stored version.
+
+        Raises ServiceConflictError when the service was changed since it was
+        read. Inside a batch() the write is deferred until the batch is flushed,
+        and updates that turn out stale by then are discarded.
+        """
+        pending = self._pending()
+        if pending is not None:
+            with self._lock:
+                if not self._index.has_id(service.id):
+                    raise ValueError(f"Service {service.id} does not exist")
+                self._check_version(service)
+                self._services[service.id] = service
+                self._index.update(service)
+                pending[service.id] = service
+                self.stats.updates += 1
+            return
+
+        with self._locked():
+            self._refresh()
+            if not self._index.has_id(service.id):
+                raise ValueError(f"Service {service.id} does not exist")
+            self._check_version(service)
+            service.version += 1
             self._services[service.id] = service
-            self.save_services()
-        else:
-            raise ValueError(f"Service {service.id} does not exist")
+            self._index.update(service)
+            self.stats.updates += 1
+            self._persist({service.id: service})
+
+    def has_changed(self) -> bool:
+        """Whether another process changed stored services since we last looked."""
+        with self._lock:
+            return self.backend.has_changed() or (
+                self.runtime is not None and self.runtime.has_changed()
+            )
+
+    def is_current(self, service: ServiceInfo) -> bool:
+        """Whether service still has the latest stored version."""
+        with self._locked():
+            self._refresh()
+            return self._is_current(service)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group service updates made by this thread into a single write.
+
+        Batches nest; the outermost one flushes when it exits, even on error.
+        """
+        depth = getattr(self._batch_state, "depth", 0)
+        if depth == 0:
+            self._batch_state.pending = {}
+        self._batch_state.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._batch_state.depth -= 1
+            if self._batch_state.depth == 0:
+                pending = self._batch_state.pending
+                self._batch_state.pending = None
+                self._flush(pending)
 
     def remove_service(self, service_id: str) -> bool:
         """Remove service."""
-        if service_id in self._services:
-            del self._services[service_id]
-            self.save_services()
+        with self._locked():
+            self._refresh()
+            if not self._index.has_id(service_id):
+                return False
+            self._services.pop(service_id, None)
+            self._index.remove(service_id)
+            pending = self._pending()
+            if pending:
+                pending.pop(service_id, None)
+            self._persist({service_id: None})
             return True
-        return False
 
     def find_service(self, service_id_or_name: str) -> Optional[ServiceInfo]:
-        """Find service by ID or name."""
+        """Find service by ID, name or unambiguous ID prefix."""
         # First try to find by ID
         service = self.get_service(service_id_or_name)
         if service:
             return service
 
         # Then try to find by name
-        return self.get_service_by_name(service_id_or_name)
+        service = self.get_service_by_name(service_id_or_name)
+        if service:
+            return service
+
+        # Finally accept a unique ID prefix
+        matches = self.get_services_by_prefix(service_id_or_name) if service_id_or_name else []
+        return matches[0] if len(matches) == 1 else None
 
     def get_services_by_status(self, status: ServiceStatus) -> List[ServiceInfo]:
         """Get service list by status."""
-        return [service for service in self._services.values() if service.status == status]
+        self._refresh()
+        self._ensure_loaded()
+        service_ids = self._index.ids_with_status(status)
+        services = (self._services[service_id] for service_id in service_ids)
+        # Guard against services mutated in memory but not yet saved
+        return [service for service in services if service.status == status]
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the in-process lock and an exclusive fcntl lock on the data directory.
+
+        Re-entrant within the process; the CLI and the daemon serialize their
+        read-modify-write cycles on the shared lock file.
+        """
+        with self._lock:
+            if self._lock_depth == 0:
+                os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+                self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_fd is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    os.close(self._lock_fd)
+                    self._lock_fd = None
+
+    def _refresh(self) -> None:
+        """Reload service data if another process changed it since we last looked."""
+        with self._lock:
+            if self.backend.has_changed():
+                self.load_services()
+            elif self.runtime is not None and self.runtime.has_changed():
+                # Only runtime state moved: rebuild just the affected services
+                for service_id, record in self.runtime.load_changed().items():
+                    definition = self._definitions.get(service_id)
+                    if definition is None:
+                        if record is not None and service_id not in self._services:
+                            self._unloaded_runtime[service_id] = record
+                        continue
+                    service = self._build_service(definition, record)
+                    self._services[service_id] = service
+                    self._index.update(service)
+            else:
+                return
+
+            # Keep this thread's unflushed batch updates on top of the reloaded data,
+            # unless they were based on a version that has since been replaced
+            pending = self._pending()
+            for service_id, service in (pending or {}).items():
+                current = self._services.get(service_id)
+                if current is not None and current.version == service.version:
+                    self._services[service_id] = service
+                    self._index.update(service)
+
+    def _is_current(self, service: ServiceInfo) -> bool:
+        """Whether service has the version held in memory (caller holds the lock)."""
+        current = self._get_loaded(service.id)
+        return current is None or current is service or current.version == service.version
+
+    def _check_version(self, service: ServiceInfo) -> None:
+        """Compare-and-swap guard: reject updates based on an outdated version."""
+        if not self._is_current(service):
+            self.stats.conflicts += 1
+            raise ServiceConflictError(
+                f"Service {service.id} was modified by another process "
+                f"(version {service.version} is outdated)"
+            )
+
+    def _get_loaded(self, service_id: str) -> Optional[ServiceInfo]:
+        """Get a service, reading it from a lazy backend on first access."""
+        service = self._services.get(service_id)
+        if service is not None or self._fully_loaded or not self._index.has_id(service_id):
+            return service
+
+        with self._lock:
+            record = self.backend.load_one(service_id)
+            if record is None:
+                return None
+            self._add_loaded({service_id: record}, self._unloaded_runtime)
+            service = self._services.get(service_id)
+            if service is not None:
+                self._index.update(service)
+            return service
+
+    def _ensure_loaded(self) -> None:
+        """Read every service not loaded yet from a lazy backend."""
+        if self._fully_loaded:
+            return
+
+        with self._lock:
+            data = self.backend.load()
+            self._add_loaded(
+                {
+                    service_id: record
+                    for service_id, record in data.items()
+                    if service_id not in self._services
+                },
+                self._unloaded_runtime,
+            )
+            self._index.rebuild(self._services.values())
+            self._fully_loaded = True
+
+    def _add_loaded(
+        self, data: Dict[str, Dict[str, Any]], runtime: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Build services from loaded definitions and runtime records."""
+        for service_id, service_data in data.items():
+            try:
+                self._services[service_id] = self._build_service(
+                    service_data, runtime.pop(service_id, None)
+                )
+            except Exception as e:
+                print(f"Warning: Failed to load service {service_id}: {e}")
+
+    def _build_service(
+        self, data: Dict[str, Any], runtime_record: Optional[Dict[str, Any]]
+    ) -> ServiceInfo:
+        """Create a service from its stored definition and runtime record."""
+        if self.runtime is None:
+            return ServiceInfo.from_dict(data)
+
+        definition = {key: value for key, value in data.items() if key not in RUNTIME_FIELDS}
+        if len(definition) == len(data):
+            self._definitions[data["id"]] = definition
+        # Otherwise the stored record predates the split and still needs rewriting
+        if runtime_record is None:
+            # Records written before the split still carry their runtime fields
+            runtime_record = {key: data[key] for key in RUNTIME_FIELDS if key in data}
+        else:
+            self._runtime_records[data["id"]] = runtime_record
+        return ServiceInfo.from_dict({**definition, **runtime_record})
+
+    def _migrate_runtime_state(self) -> None:
+        """Move runtime fields out of definitions written before the split."""
+        if self.runtime is None:
+            return
+        legacy: Dict[str, Optional[ServiceInfo]] = {
+            service_id: service
+            for service_id, service in self._services.items()
+            if service_id not in self._definitions
+        }
+        if legacy:
+            self._persist(legacy)
+
+    def _pending(self) -> Optional[Dict[str, ServiceInfo]]:
+        """Get this thread's pending batch updates, or None outside a batch."""
+        return getattr(self._batch_state, "pending", None)
+
+    def _flush(self, pending: Dict[str, ServiceInfo]) -> None:
+        """Write a batch of updated services in one backend call."""
+        if not pending:
+            return
+
+        with self._locked():
+            self._refresh()
+            changes: Dict[str, Optional[ServiceInfo]] = {}
+            for service_id, service in pending.items():
+                if not self._index.has_id(service_id):
+                    # Removed by another process while the batch was open
+                    continue
+                if not self._is_current(service):
+                    # Changed by another process while the batch was open; theirs wins
+                    self.stats.conflicts += 1
+                    print(f"Warning: Discarded outdated update of service {service_id}")
+                    continue
+                service.version += 1
+                self._services[service_id] = service
+                self._index.update(service)
+                changes[service_id] = service
+            self._persist(changes)
+
+    def _persist(self, changes: Dict[str, Optional[ServiceInfo]]) -> None:
+        """Write changed services; None marks a removed service.
+
+        With split runtime state, definitions reach the backend only when they
+        changed, and pid/status churn goes to small per-service runtime records.
+        """
+        if not changes:
+            return
+        try:
+            if self.runtime is None:
+                self.backend.apply(
+                    {
+                        service_id: service.to_dict() if service else None
+                        for service_id, service in changes.items()
+                    }
+                )
+            else:
+                self._persist_split(changes)
+            self.stats.flushes += 1
+        except Exception as e:
+            print(f"Error: Failed to save service data: {e}")
+
+    def _persist_split(self, changes: Dict[str, Optional[ServiceInfo]]) -> None:
+        """Write definitions to the backend and runtime state to the runtime store."""
+        assert self.runtime is not None
+        definition_changes: Dict[str, Optional[Dict[str, Any]]] = {}
+        runtime_changes: Dict[str, Dict[str, Any]] = {}
+        for service_id, service in changes.items():
+            if service is None:
+                definition_changes[service_id] = None
+                self._definitions.pop(service_id, None)
+                self._runtime_records.pop(service_id, None)
+                self.runtime.remove(service_id)
+                continue
+
+            definition = service.definition_dict()
+            if self._definitions.get(service_id) != definition:
+                definition_changes[service_id] = definition
+                self._definitions[service_id] = definition
+
+            record = service.runtime_dict()
+            if self._runtime_records.get(service_id) != record:
+                runtime_changes[service_id] = record
+                self._runtime_records[service_id] = record
+                self.runtime.save(service_id, record)
+
+        if definition_changes:
+            self.backend.apply(definition_changes)
+        if runtime_changes:
+            self.backend.record_runtime(runtime_changes)
 
     def _generate_service_id(self) -> str:
         """Generate unique service ID."""
         while True:
             service_id = str(uuid.uuid4())[:8]
-            if service_id not in self._services:
+            if not self._index.has_id(service_id):
                 return service_id
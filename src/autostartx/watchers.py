@@ -0,0 +1,258 @@
+"""Process exit watchers that wake the monitor as soon as a service exits."""
+
+import os
+import select
+import signal
+import subprocess
+import threading
+from types import FrameType
+from typing import Dict, List, NamedTuple, Optional, Protocol, Tuple, Union
+
+
+class ProcessExit(NamedTuple):
+    """An exited service process."""
+
+    service_id: str
+    pid: int
+    # Only known for our own children
+    exit_code: Optional[int]
+
+
+class SpawnedChild:
+    """A child started with os.posix_spawn, polled like a Popen handle."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.returncode: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def poll(self) -> Optional[int]:
+        """Reap the child if it exited; returns its exit code, None while it runs."""
+        with self._lock:
+            if self.returncode is not None:
+                return self.returncode
+            try:
+                pid, status = os.waitpid(self.pid, os.WNOHANG)
+            except ChildProcessError:
+                # Reaped elsewhere; Popen reports 0 in that case too
+                self.returncode = 0
+                return self.returncode
+            if pid == 0:
+                return None
+            if os.WIFSIGNALED(status):
+                self.returncode = -os.WTERMSIG(status)
+            else:
+                self.returncode = os.WEXITSTATUS(status)
+            return self.returncode
+
+
+Child = Union[subprocess.Popen, SpawnedChild]
+
+
+class ChildReaper:
+    """Owns the handles (Popen or SpawnedChild) of services started by this process.
+
+    A SIGCHLD handler sets `wake` when any child exits; reap() then collects
+    exit statuses with waitpid (via poll()), so exited children never
+    linger as zombies that still look alive.
+    """
+
+    def __init__(self) -> None:
+        self.wake = threading.Event()
+        self._children: Dict[int, Tuple[str, Child]] = {}
+        self._lock = threading.Lock()
+        self._installed = False
+
+    @property
+    def installed(self) -> bool:
+        """Whether the SIGCHLD handler is active, so exits are signalled."""
+        return self._installed
+
+    def install(self) -> bool:
+        """Install the SIGCHLD handler; only possible from the main thread."""
+        if self._installed:
+            return True
+        try:
+            signal.signal(signal.SIGCHLD, self._on_sigchld)
+        except ValueError:
+            print("Warning: SIGCHLD handler needs the main thread, falling back to polling")
+            return False
+        self._installed = True
+        return True
+
+    def track(self, service_id: str, process: Child) -> None:
+        """Keep a started child so its exit can be reaped."""
+        with self._lock:
+            self._children[process.pid] = (service_id, process)
+
+    def exit_code(self, pid: int) -> Optional[int]:
+        """Reap a tracked child if it exited; returns its exit code, None if alive/unknown."""
+        with self._lock:
+            child = self._children.get(pid)
+        if child is None:
+            return None
+        return child[1].poll()
+
+    def is_tracked(self, pid: int) -> bool:
+        """Whether pid is a child started by this process and not yet collected."""
+        with self._lock:
+            return pid in self._children
+
+    def reap(self) -> List[ProcessExit]:
+        """Collect every tracked child that has exited."""
+        exits = []
+        with self._lock:
+            for pid, (service_id, process) in list(self._children.items()):
+                exit_code = process.poll()
+                if exit_code is not None:
+                    del self._children[pid]
+                    exits.append(ProcessExit(service_id, pid, exit_code))
+        return exits
+
+    def _on_sigchld(self, signum: int, frame: Optional[FrameType]) -> None:
+        """Signal handler: just wake the monitor, reaping happens in its thread."""
+        self.wake.set()
+
+
+class ExitWatcher(Protocol):
+    """What the monitor needs from a watcher of service process exits."""
+
+    def watch(self, service_id: str, pid: int) -> bool: ...
+
+    def is_watched(self, pid: int) -> bool: ...
+
+    def unwatch(self, pid: int) -> None: ...
+
+    def drain(self) -> List[ProcessExit]: ...
+
+    def close(self) -> None: ...
+
+
+class PidfdWatcher:
+    """Waits for any process to exit, children or not, using pidfds and epoll.
+
+    Each watched PID gets a pidfd (Linux 5.3+, Python 3.9+) that becomes
+    readable when the process exits; a background thread sleeps in epoll and
+    sets `wake` on exits, so nothing needs to be polled.
+    """
+
+    def __init__(self, wake: threading.Event):
+        self.wake = wake
+        self._supported = hasattr(os, "pidfd_open") and hasattr(select, "epoll")
+        # pidfd -> (service ID, PID), and PID -> pidfd
+        self._watched: Dict[int, Tuple[str, int]] = {}
+        self._fd_by_pid: Dict[int, int] = {}
+        self._exits: List[ProcessExit] = []
+        self._lock = threading.Lock()
+        self._epoll: Optional[select.epoll] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_fds: Optional[Tuple[int, int]] = None
+
+    @property
+    def supported(self) -> bool:
+        """Whether pidfds are available; if not, watch() always returns False."""
+        return self._supported
+
+    def watch(self, service_id: str, pid: int) -> bool:
+        """Start watching a process; returns False if it cannot be watched."""
+        if not self._supported:
+            return False
+        with self._lock:
+            if pid in self._fd_by_pid:
+                return True
+
+        try:
+            fd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return False
+        except OSError as e:
+            # Kernel without pidfd_open (ENOSYS) or seccomp-filtered
+            print(f"Warning: pidfd unavailable ({e}), falling back to polling")
+            self._supported = False
+            return False
+
+        with self._lock:
+            self._start()
+            assert self._epoll is not None
+            self._watched[fd] = (service_id, pid)
+            self._fd_by_pid[pid] = fd
+            self._epoll.register(fd, select.EPOLLIN)
+        return True
+
+    def is_watched(self, pid: int) -> bool:
+        """Whether the process is being watched."""
+        with self._lock:
+            return pid in self._fd_by_pid
+
+    def unwatch(self, pid: int) -> None:
+        """Stop watching a process."""
+        with self._lock:
+            fd = self._fd_by_pid.pop(pid, None)
+            if fd is not None:
+                self._forget(fd)
+
+    def drain(self) -> List[ProcessExit]:
+        """Return and clear the exits seen since the last call."""
+        with self._lock:
+            exits, self._exits = self._exits, []
+        return exits
+
+    def close(self) -> None:
+        """Stop the watcher thread and close every pidfd."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if self._stop_fds is not None:
+                os.write(self._stop_fds[1], b"x")
+        if thread is not None:
+            thread.join(timeout=5)
+
+        with self._lock:
+            for fd in list(self._watched):
+                self._forget(fd)
+            self._fd_by_pid.clear()
+            if self._epoll is not None:
+                self._epoll.close()
+                self._epoll = None
+            if self._stop_fds is not None:
+                for fd in self._stop_fds:
+                    os.close(fd)
+                self._stop_fds = None
+
+    def _start(self) -> None:
+        """Create the epoll set and its thread on first use (caller holds the lock)."""
+        if self._thread is not None:
+            return
+        self._epoll = select.epoll()
+        self._stop_fds = os.pipe()
+        self._epoll.register(self._stop_fds[0], select.EPOLLIN)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Watcher thread: sleep until watched processes exit."""
+        epoll, stop_fds = self._epoll, self._stop_fds
+        assert epoll is not None and stop_fds is not None
+        stop_fd = stop_fds[0]
+        while True:
+            events = epoll.poll()
+            exited = False
+            with self._lock:
+                for fd, _ in events:
+                    if fd == stop_fd:
+                        return
+                    entry = self._watched.get(fd)
+                    if entry is None:
+                        continue
+                    self._fd_by_pid.pop(entry[1], None)
+                    self._forget(fd)
+                    self._exits.append(ProcessExit(entry[0], entry[1], None))
+                    exited = True
+            if exited:
+                self.wake.set()
+
+    def _forget(self, fd: int) -> None:
+        """Unregister and close a pidfd (caller holds the lock)."""
+        assert self._epoll is not None
+        del self._watched[fd]
+        self._epoll.unregister(fd)
+        os.close(fd)
@@ -1,10 +1,14 @@
 """pytest配置文件。"""
 
+import os
 import shutil
 import tempfile
 
 import pytest
 
+from autostartx.config import ConfigManager
+from autostartx.service_manager import ServiceManager
+
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_environment():
@@ -19,3 +23,25 @@ def temp_dir():
     temp_path = tempfile.mkdtemp()
     yield temp_path
     shutil.rmtree(temp_path, ignore_errors=True)
+
+
+@pytest.fixture
+def config_manager(temp_dir):
+    """创建使用临时目录的配置管理器。"""
+    config_manager = ConfigManager(os.path.join(temp_dir, "test_config.toml"))
+    # 确保使用独立的数据目录
+    config_manager.config.data_dir = os.path.join(temp_dir, "data")
+    config_manager.config.log_dir = os.path.join(temp_dir, "logs")
+    config_manager.config.runtime_dir = os.path.join(temp_dir, "run")
+    return config_manager
+
+
+@pytest.fixture
+def manager(temp_dir, monkeypatch):
+    """创建数据与运行目录都在临时目录中的服务管理器。"""
+    monkeypatch.setenv("HOME", temp_dir)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", os.path.join(temp_dir, "run"))
+    manager = ServiceManager(os.path.join(temp_dir, "config.toml"))
+    yield manager
+    for service in manager.storage.get_all_services():
+        manager.process_manager.stop_service(service, force=True)
@@ -0,0 +1,106 @@
+"""测试基于 asyncio 的服务监控引擎。"""
+
+import json
+import os
+import signal
+import socket
+import time
+
+from autostartx.async_monitor import AsyncServiceMonitor
+from autostartx.config import ConfigManager
+from autostartx.models import ServiceStatus
+from autostartx.monitor import AutoRestartManager, ServiceMonitor
+
+
+def wait_until(condition, timeout=10):
+    """等待条件成立。"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+
+def control(manager, command):
+    """通过控制套接字发送一条命令并返回应答。"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(manager.config_manager.get_control_socket_path())
+        sock.sendall(command.encode() + b"\n")
+        return json.loads(sock.makefile().readline())
+
+
+def test_engine_selected_by_config(temp_dir, monkeypatch):
+    """测试通过配置选择监控引擎。"""
+    monkeypatch.setenv("HOME", temp_dir)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", temp_dir)
+    config_path = os.path.join(temp_dir, "config.toml")
+    assert type(AutoRestartManager(config_path).monitor) is ServiceMonitor
+
+    config_manager = ConfigManager(config_path)
+    config_manager.config.monitor_engine = "asyncio"
+    config_manager.save_config()
+    assert isinstance(AutoRestartManager(config_path).monitor, AsyncServiceMonitor)
+
+
+def test_crashed_services_restart(manager, temp_dir):
+    """测试 asyncio 引擎在服务崩溃后按延迟重启，包括非子进程的服务。"""
+    services = manager.import_services(
+        [
+            {
+                "name": f"svc-{i}",
+                "command": "sleep 600",
+                "working_dir": temp_dir,
+                "restart_delay": 1,
+            }
+            for i in range(10)
+        ],
+        start=True,
+    )
+    old_pids = {service.id: service.pid for service in manager.storage.get_all_services()}
+    # 模拟守护进程重启后接管的服务：只能通过 pidfd 发现退出
+    adopted = services[0]
+    manager.process_manager.reaper.reap()
+    manager.process_manager.reaper._children.pop(old_pids[adopted.id])
+
+    monitor = AsyncServiceMonitor(manager)
+    monitor._check_interval = 0.5
+    monitor.start_monitoring()
+    try:
+        wait_until(lambda: monitor._all_watched)
+        killed_at = time.monotonic()
+        for pid in old_pids.values():
+            os.kill(pid, signal.SIGKILL)
+
+        def restarted():
+            return [
+                s
+                for s in manager.storage.get_all_services()
+                if s.status == ServiceStatus.RUNNING and s.pid not in (None, old_pids[s.id])
+            ]
+
+        # 新 PID 先于重启计数写入存储
+        wait_until(
+            lambda: len(restarted()) == len(services) and all(s.restart_count for s in restarted())
+        )
+        assert time.monotonic() - killed_at < 2.5
+        assert all(s.restart_count == 1 for s in restarted())
+    finally:
+        monitor.stop_monitoring()
+    assert monitor._monitor_thread is not None and not monitor._monitor_thread.is_alive()
+
+
+def test_control_socket(manager, temp_dir):
+    """测试控制套接字的 ping、status、check 和未知命令。"""
+    manager.add_service("svc", "sleep 600", working_dir=temp_dir)
+    monitor = AsyncServiceMonitor(manager)
+    monitor.start_monitoring()
+    try:
+        assert control(manager, "ping") == {"ok": True}
+        status = control(manager, "status")
+        assert status["ok"] and status["engine"] == "asyncio"
+        assert status["services"] == 1 and status["pending_restarts"] == 0
+        assert control(manager, "check") == {"ok": True}
+        assert control(manager, "bogus")["ok"] is False
+    finally:
+        monitor.stop_monitoring()
+    assert not os.path.exists(manager.config_manager.get_control_socket_path())
@@ -3,7 +3,9 @@
 import os
 import tempfile
 
-from autostartx.config import Config, ConfigManager
+import pytest
+
+from autostartx.config import Config, ConfigManager, ensure_private_dir
 
 
 def test_config_defaults():
@@ -16,6 +18,8 @@ def test_config_defaults():
     assert config.auto_restart is True
     assert config.restart_delay == 5
     assert config.max_restart_attempts == 3
+    assert config.max_parallel_operations == 8
+    assert config.monitor_engine == "threaded"
     assert config.interactive_mode is True
     assert config.color_output is True
 
@@ -67,3 +71,47 @@ def test_get_paths():
         log_path = manager.get_service_log_path("test-service")
         assert log_path.endswith("test-service.log")
         assert manager.config.log_dir in log_path
+
+
+def test_runtime_dir_created_private():
+    """测试运行时目录以 0700 权限创建。"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = ConfigManager(os.path.join(temp_dir, "test_config.toml"))
+        manager.config.runtime_dir = os.path.join(temp_dir, "run")
+
+        assert manager.ensure_runtime_dir() == manager.config.runtime_dir
+        assert os.stat(manager.config.runtime_dir).st_mode & 0o777 == 0o700
+
+
+def test_private_dir_refuses_symlink():
+    """测试运行时目录是符号链接时拒绝使用。"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        target = os.path.join(temp_dir, "target")
+        os.mkdir(target, 0o700)
+        link = os.path.join(temp_dir, "run")
+        os.symlink(target, link)
+
+        with pytest.raises(PermissionError):
+            ensure_private_dir(link)
+
+
+def test_private_dir_refuses_shared_mode():
+    """测试其他用户可写的运行时目录被拒绝。"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "run")
+        os.mkdir(path)
+        os.chmod(path, 0o777)
+
+        with pytest.raises(PermissionError):
+            ensure_private_dir(path)
+
+
+def test_private_dir_made_private():
+    """测试旧版本创建的可读运行时目录被改为 0700。"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "run")
+        os.mkdir(path)
+        os.chmod(path, 0o755)
+
+        ensure_private_dir(path)
+        assert os.stat(path).st_mode & 0o777 == 0o700
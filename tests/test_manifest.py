@@ -0,0 +1,60 @@
+"""测试服务清单导入导出。"""
+
+import os
+
+import pytest
+
+from autostartx.manifest import dump_manifest, load_manifest
+from autostartx.storage import ServiceStorage
+
+
+def test_load_toml_manifest(temp_dir):
+    """测试读取 TOML 清单并按清单目录解析工作目录。"""
+    path = os.path.join(temp_dir, "services.toml")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            '[[services]]\nname = "web"\ncommand = "python -m http.server"\n'
+            'working_dir = "site"\nenv_vars = { PORT = "8000" }\n\n'
+            '[[services]]\nname = "worker"\ncommand = "python worker.py"\n'
+            "auto_restart = false\n"
+        )
+
+    entries = load_manifest(path)
+
+    assert [entry["name"] for entry in entries] == ["web", "worker"]
+    assert entries[0]["working_dir"] == os.path.join(temp_dir, "site")
+    assert entries[0]["env_vars"] == {"PORT": "8000"}
+    assert entries[1]["working_dir"] == temp_dir
+    assert entries[1]["auto_restart"] is False
+
+
+@pytest.mark.parametrize("fmt", ["toml", "json"])
+def test_export_import_round_trip(config_manager, temp_dir, fmt):
+    """测试导出的清单可以原样导入。"""
+    storage = ServiceStorage(config_manager)
+    storage.add_services(
+        [
+            {"name": "web", "command": "echo web", "env_vars": {"PORT": "8000"}},
+            {
+                "name": "worker",
+                "command": "echo worker",
+                "restart_delay": 1,
+                "restart_on": "on-failure",
+                "success_exit_codes": [3],
+            },
+        ]
+    )
+    path = os.path.join(temp_dir, f"services.{fmt}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dump_manifest(storage.get_all_services(), fmt))
+
+    for service in storage.get_all_services():
+        storage.remove_service(service.id)
+    storage.add_services(load_manifest(path))
+
+    web = storage.get_service_by_name("web")
+    assert web.env_vars == {"PORT": "8000"}
+    worker = storage.get_service_by_name("worker")
+    assert worker.restart_delay == 1
+    assert worker.restart_on == "on-failure"
+    assert worker.success_exit_codes == (3,)
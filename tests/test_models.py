@@ -1,8 +1,10 @@
 """测试数据模型."""
 
+import json
+import signal
 import time
 
-from autostartx.models import ServiceInfo, ServiceStatus
+from autostartx.models import RestartHistory, RestartPolicy, ServiceInfo, ServiceStatus
 
 
 def test_service_info_creation():
@@ -85,3 +87,115 @@ def test_restart_count_operations():
 
     service.reset_restart_count()
     assert service.restart_count == 0
+
+
+def test_service_info_round_trip():
+    """测试字典往返转换并忽略未知字段。"""
+    service = ServiceInfo(
+        id="test-001", name="test-service", command="echo hello", env_vars={"ENV": "test"}
+    )
+    service.update_status(ServiceStatus.RUNNING)
+
+    data = service.to_dict()
+    data["added_in_future_version"] = True
+    restored = ServiceInfo.from_dict(data)
+
+    assert restored == service
+    assert restored.to_dict() == service.to_dict()
+    assert set(service.definition_dict()) | set(service.runtime_dict()) == set(service.to_dict())
+
+
+def test_service_info_is_compact():
+    """测试服务信息使用 __slots__ 且共享空环境变量。"""
+    service1 = ServiceInfo.from_dict({"id": "a", "name": "a", "command": "true"})
+    service2 = ServiceInfo.from_dict({"id": "b", "name": "b", "command": "true", "env_vars": {}})
+
+    assert not hasattr(service1, "__dict__")
+    assert service1.env_vars is service2.env_vars
+    assert service1.to_dict()["env_vars"] == {}
+
+
+def test_restart_policy():
+    """测试重启策略：指数退避、最大延迟、抖动范围和时间窗口。"""
+    policy = RestartPolicy(initial_delay=1, multiplier=2, max_delay=10, jitter=0)
+    assert [policy.delay(attempt) for attempt in range(5)] == [1, 2, 4, 8, 10]
+    assert policy.delay(10_000) == 10
+
+    jittered = RestartPolicy(initial_delay=10, jitter=0.5)
+    assert all(5 <= jittered.delay(0) <= 15 for _ in range(100))
+
+    windowed = RestartPolicy(max_restarts=2, window=60)
+    now = time.time()
+    assert windowed.recent((now - 120, now - 30), now) == (now - 30,)
+    assert windowed.allows_restart((now - 120, now - 30), now)
+    assert not windowed.allows_restart((now - 50, now - 30), now)
+    # 窗口为 0 时按总次数计算
+    assert not RestartPolicy(max_restarts=2, window=0).allows_restart((0.0, 1.0), now)
+
+
+def test_service_restart_policy_round_trip():
+    """测试服务的重启策略字段与最近重启时间可以持久化。"""
+    service = ServiceInfo(id="svc", name="svc", command="true", restart_delay=2, restart_window=60)
+    service.recent_restarts = (1.0, 2.0)
+    restored = ServiceInfo.from_dict(service.to_dict())
+
+    assert restored.recent_restarts == (1.0, 2.0)
+    assert restored.restart_policy == service.restart_policy
+    assert restored.restart_policy.initial_delay == 2
+    assert restored.restart_policy.window == 60
+
+
+def test_restart_history_ring_buffer():
+    """测试重启历史写满后覆盖最旧的记录，并按时间顺序返回。"""
+    history = RestartHistory(capacity=3)
+    for i in range(5):
+        history.record_exit(float(i), i, 10.0 * i)
+    history.record_restart(0.5)
+
+    assert len(history) == 3
+    assert [record.exited_at for record in history] == [2.0, 3.0, 4.0]
+    assert history.latest().time_to_restart == 0.5
+    assert [record.time_to_restart for record in history][:2] == [None, None]
+    assert history.exits_since(3.0) == 2
+
+
+def test_restart_history_round_trip():
+    """测试重启历史可以持久化，未知退出码和被信号杀死的退出码得以保留。"""
+    service = ServiceInfo(id="svc", name="svc", command="true")
+    assert service.to_dict()["restart_history"] is None
+
+    service.record_exit(None, 1.5)
+    service.record_exit(-9, 2.5)
+    service.restart_history.record_restart(2.0)
+    restored = ServiceInfo.from_dict(service.to_dict())
+
+    assert restored.restart_history == service.restart_history
+    assert [record.exit_code for record in restored.restart_history] == [None, -9]
+    assert restored.restart_history.latest().time_to_restart == 2.0
+
+
+def test_empty_restart_history_serializes():
+    """测试空的重启历史被序列化为空列表，而不是历史对象本身。"""
+    service = ServiceInfo(id="svc", name="svc", command="true")
+    service.restart_history = RestartHistory()
+
+    data = service.to_dict()
+    assert data["restart_history"] == []
+    assert service.definition_dict()["restart_history"] == []
+    json.dumps(data)
+
+
+def test_should_restart_by_exit_status():
+    """测试各重启模式按退出状态决定是否重启，额外的成功退出码视为正常退出。"""
+    exits = [0, 3, 1, -signal.SIGTERM, -signal.SIGKILL, None]
+
+    def restarts(restart_on):
+        service = ServiceInfo(
+            id="svc", name="svc", command="true", restart_on=restart_on, success_exit_codes=(3,)
+        )
+        return [service.should_restart(exit_code) for exit_code in exits]
+
+    assert restarts("always") == [True] * 6
+    assert restarts("on-failure") == [False, False, True, False, True, True]
+    assert restarts("on-abnormal") == [False, False, False, False, True, True]
+    assert restarts("never") == [False] * 6
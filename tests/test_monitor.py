@@ -0,0 +1,351 @@
+"""测试服务监控与自动重启。"""
+
+import os
+import signal
+import threading
+import time
+
+import psutil
+import pytest
+
+from autostartx.models import ServiceStatus
+from autostartx.monitor import AutoRestartManager, ServiceMonitor
+
+RESTART_DELAY = 2
+
+
+def test_crashed_services_restart_concurrently(manager, temp_dir):
+    """测试同时杀死 100 个服务后，全部在约一个重启延迟内恢复。"""
+    services = manager.import_services(
+        [
+            {
+                "name": f"svc-{i}",
+                "command": "sleep 600",
+                "working_dir": temp_dir,
+                "restart_delay": RESTART_DELAY,
+                "restart_jitter": 0.0,
+            }
+            for i in range(100)
+        ]
+    )
+    assert all(result.success for result in manager.start_many([s.id for s in services]).values())
+    old_pids = {service.id: service.pid for service in manager.storage.get_all_services()}
+
+    monitor = ServiceMonitor(manager)
+    monitor._check_interval = 0.5
+    monitor.start_monitoring()
+    try:
+        time.sleep(0.5)
+        killed_at = time.monotonic()
+        for pid in old_pids.values():
+            os.kill(pid, signal.SIGKILL)
+
+        while time.monotonic() - killed_at < RESTART_DELAY * 5:
+            restarted = [
+                s
+                for s in manager.storage.get_all_services()
+                if s.status == ServiceStatus.RUNNING and s.pid not in (None, old_pids[s.id])
+            ]
+            if len(restarted) == len(services):
+                break
+            time.sleep(0.05)
+        elapsed = time.monotonic() - killed_at
+    finally:
+        monitor.stop_monitoring()
+
+    assert len(restarted) == len(services)
+    # 逐个阻塞等待需要 100 个延迟，并发计时只需约一个
+    assert RESTART_DELAY <= elapsed < RESTART_DELAY * 2
+    assert all(s.restart_count == 1 for s in restarted)
+
+
+def test_restart_policy_backoff_and_window(manager, temp_dir):
+    """测试连续崩溃时重启延迟指数增长，运行足够久后重置，窗口内次数用尽则失败。"""
+    service = manager.add_service("svc", "sleep 600", working_dir=temp_dir)
+
+    def configure(s):
+        s.restart_delay = 1
+        s.restart_jitter = 0.0
+        s.restart_max_delay = 3
+        s.max_restart_attempts = 4
+        s.status = ServiceStatus.RUNNING
+
+    manager.update_service(service.id, configure)
+    monitor = ServiceMonitor(manager)
+    service_id = service.id
+
+    def crash(uptime):
+        service = manager.storage.get_service(service_id)
+        service.pid = 1
+        service.pid_create_time = time.time() - uptime
+        monitor._handle_service_crash(service)
+        service = manager.storage.get_service(service_id)
+        if service_id in monitor._pending_restarts:
+            due = monitor._pending_restarts.pop(service_id)[0]
+            # 视为已重启
+            service.recent_restarts = (*service.recent_restarts, time.time())
+            manager.storage.update_service(service)
+            return round(due - time.monotonic())
+        return service.status
+
+    assert [crash(1), crash(1), crash(1)] == [1, 2, 3]
+    # 运行超过 reset_after 后退避重新开始
+    assert crash(3600) == 1
+    # 窗口内已重启 4 次
+    assert crash(1) == ServiceStatus.FAILED
+
+
+def test_crash_loop_stops_restarts(manager, temp_dir):
+    """测试短时间内连续退出的服务被标记为崩溃循环且不再重启，手动启动后重新计数。"""
+    service = manager.add_service("svc", "sleep 600", working_dir=temp_dir)
+
+    def configure(s):
+        s.crash_loop_exits = 3
+        s.crash_loop_interval = 60
+        s.status = ServiceStatus.RUNNING
+
+    manager.update_service(service.id, configure)
+    monitor = ServiceMonitor(manager)
+    service_id = service.id
+
+    def crash():
+        service = manager.storage.get_service(service_id)
+        service.pid = 1
+        service.pid_create_time = time.time() - 1
+        service.status = ServiceStatus.RUNNING
+        monitor._handle_service_crash(service, exit_code=1)
+        monitor._pending_restarts.pop(service_id, None)
+        return manager.storage.get_service(service_id)
+
+    # 前两次退出照常安排重启
+    assert [crash().status for _ in range(2)] == [ServiceStatus.STOPPED] * 2
+    looping = crash()
+    assert looping.status == ServiceStatus.CRASH_LOOP
+    assert [record.exit_code for record in looping.restart_history] == [1, 1, 1]
+    assert service_id not in monitor._pending_restarts
+    # 查询状态不会清除崩溃循环标记
+    assert manager.get_service_status(service_id)["service"].status == ServiceStatus.CRASH_LOOP
+    assert [s.status for s in manager.list_services()] == [ServiceStatus.CRASH_LOOP]
+    assert manager.storage.get_service(service_id).status == ServiceStatus.CRASH_LOOP
+
+    # 手动启动后退避清零，下一次退出不再视为崩溃循环
+    assert manager.start_service(service_id)
+    assert manager.stop_service(service_id, force=True)
+    assert crash().status == ServiceStatus.STOPPED
+
+
+def test_restart_on_exit_status(manager, temp_dir):
+    """测试按收割到的退出码决定是否重启：正常退出停止，失败时重启或标记失败。"""
+    services = {
+        "clean": manager.add_service(
+            "clean",
+            "sh -c 'exit 3'",
+            working_dir=temp_dir,
+            restart_on="on-failure",
+            success_exit_codes=[3],
+        ),
+        "failing": manager.add_service(
+            "failing", "sh -c 'exit 1'", working_dir=temp_dir, restart_on="on-failure"
+        ),
+        "never": manager.add_service(
+            "never", "sh -c 'exit 1'", working_dir=temp_dir, restart_on="never"
+        ),
+    }
+    for service in services.values():
+        assert manager.start_service(service.id)
+
+    monitor = ServiceMonitor(manager)
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        monitor._check_services()
+        current = {name: manager.storage.get_service(s.id) for name, s in services.items()}
+        if all(s.pid is None for s in current.values()):
+            break
+        time.sleep(0.05)
+
+    assert current["clean"].status == ServiceStatus.STOPPED
+    assert current["clean"].last_exit_code == 3
+    assert current["clean"].restart_history is None
+    assert current["never"].status == ServiceStatus.FAILED
+    # 查询服务列表不会把失败退出改为已停止
+    listed = {s.name: s for s in manager.list_services()}
+    assert listed["never"].status == ServiceStatus.FAILED
+    assert listed["never"].last_exit_code == 1
+    assert listed["clean"].status == ServiceStatus.STOPPED
+    # 只有失败退出的服务被安排重启
+    assert set(monitor._pending_restarts) == {services["failing"].id}
+    assert current["failing"].restart_history.latest().exit_code == 1
+
+
+def test_failed_exit_kept_on_read(manager, temp_dir):
+    """测试未被监控收割的失败退出在查询时记录退出码并标记为失败。"""
+    failing = manager.add_service(
+        "failing", "sh -c 'exit 2'", auto_restart=False, working_dir=temp_dir
+    )
+    clean = manager.add_service("clean", "true", auto_restart=False, working_dir=temp_dir)
+    for service in (failing, clean):
+        assert manager.start_service(service.id)
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        listed = {s.name: s for s in manager.list_services()}
+        if all(s.pid is None for s in listed.values()):
+            break
+        time.sleep(0.05)
+
+    assert listed["failing"].status == ServiceStatus.FAILED
+    assert listed["failing"].last_exit_code == 2
+    assert listed["clean"].status == ServiceStatus.STOPPED
+    assert listed["clean"].last_exit_code == 0
+    assert manager.get_service_status(failing.id)["service"].status == ServiceStatus.FAILED
+
+
+def test_slow_operations_do_not_block_loop(manager, temp_dir):
+    """测试等待就绪的重启和卡死服务的停止在线程池中进行，不阻塞其他服务的重启。"""
+    slow = manager.add_service("slow", "sleep 600", working_dir=temp_dir)
+    fast = manager.add_service("fast", "sleep 600", working_dir=temp_dir)
+    # 忽略 SIGTERM，停止时要等到 stop_timeout 后强制杀死
+    stuck = manager.add_service("stuck", "sh -c 'trap \"\" TERM; sleep 600'", working_dir=temp_dir)
+    for service in (slow, fast, stuck):
+        assert manager.start_service(service.id)
+
+    def configure(s):
+        s.restart_delay = 0
+        s.restart_jitter = 0.0
+        s.stop_timeout = 2
+        if s.id == slow.id:
+            # 重启后不会就绪，一直等到 ready_timeout
+            s.ready_check = "exec:false"
+            s.ready_timeout = 10
+
+    for service in (slow, fast, stuck):
+        manager.update_service(service.id, configure)
+    old_pids = {s.id: s.pid for s in manager.storage.get_all_services()}
+
+    def current(service):
+        return manager.storage.get_service(service.id)
+
+    def restarted(service):
+        return current(service).status == ServiceStatus.RUNNING and current(service).pid not in (
+            None,
+            old_pids[service.id],
+        )
+
+    monitor = ServiceMonitor(manager)
+    monitor._check_interval = 0.5
+    monitor.start_monitoring()
+    try:
+        os.kill(old_pids[slow.id], signal.SIGKILL)
+        deadline = time.monotonic() + 5
+        while current(slow).status != ServiceStatus.STARTING and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert current(slow).status == ServiceStatus.STARTING
+
+        started_at = time.monotonic()
+        monitor._restart_stuck(current(stuck))
+        assert time.monotonic() - started_at < 0.5
+        os.kill(old_pids[fast.id], signal.SIGKILL)
+
+        while not restarted(fast) and time.monotonic() - started_at < 1.5:
+            time.sleep(0.02)
+        assert restarted(fast)
+        while not restarted(stuck) and time.monotonic() - started_at < 5:
+            time.sleep(0.02)
+        assert restarted(stuck)
+        assert current(slow).status == ServiceStatus.STARTING
+    finally:
+        monitor.stop_monitoring()
+
+
+@pytest.mark.parametrize("engine", ["threaded", "asyncio"])
+def test_restarted_child_exit_seen_while_main_thread_waits(manager, temp_dir, engine):
+    """测试主线程阻塞在守护进程等待中时，重启后的子进程再次退出也能很快被发现。"""
+    manager.config_manager.config.monitor_engine = engine
+    manager.config_manager.save_config()
+    service = manager.add_service("flaky", "sh -c 'sleep 1; exit 3'", working_dir=temp_dir)
+
+    def configure(s):
+        s.restart_delay = 0
+        s.restart_jitter = 0.0
+        s.crash_loop_exits = 100
+
+    manager.update_service(service.id, configure)
+    auto = AutoRestartManager(os.path.join(temp_dir, "config.toml"))
+    # 由守护进程自己启动，重启后的子进程由监控线程或线程池线程启动
+    assert auto.service_manager.start_service(service.id)
+    restarts = []
+
+    def watch():
+        try:
+            deadline = time.monotonic() + 20
+            while time.monotonic() < deadline:
+                count = manager.storage.get_service(service.id).restart_count
+                if count > len(restarts):
+                    restarts.append(time.monotonic())
+                if count >= 3:
+                    break
+                time.sleep(0.05)
+        finally:
+            auto.stop()
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    started_at = time.monotonic()
+    auto.start()
+    watcher.join()
+
+    # 每轮运行 1 秒，立即重启；若退出要等到空闲检查（60 秒）才被发现则远超此时限
+    assert len(restarts) == 3
+    assert restarts[-1] - started_at < 10
+
+
+def test_children_watched_without_sigchld(manager, temp_dir):
+    """测试即使 SIGCHLD 处理函数从未运行，子进程退出也会被 pidfd 及时发现。"""
+    service = manager.add_service("flaky", "sh -c 'sleep 1; exit 3'", working_dir=temp_dir)
+
+    def configure(s):
+        s.restart_delay = 0
+        s.restart_jitter = 0.0
+        s.crash_loop_exits = 100
+
+    manager.update_service(service.id, configure)
+    assert manager.start_service(service.id)
+    # 视为已安装但信号永远不会到达，例如主线程一直阻塞
+    manager.process_manager.reaper._installed = True
+
+    monitor = ServiceMonitor(manager)
+    monitor.start_monitoring()
+    try:
+        deadline = time.monotonic() + 8
+        while time.monotonic() < deadline:
+            if manager.storage.get_service(service.id).restart_count >= 2:
+                break
+            time.sleep(0.05)
+    finally:
+        monitor.stop_monitoring()
+
+    current = manager.storage.get_service(service.id)
+    assert current.restart_count >= 2
+    assert current.last_exit_code == 3
+
+
+def test_polled_exit_keeps_exit_code(manager, temp_dir, monkeypatch):
+    """测试轮询发现的子进程退出按真实退出码处理：正常退出的一次性任务不会被重启。"""
+    service = manager.add_service(
+        "oneshot", "sh -c 'exit 0'", working_dir=temp_dir, restart_on="on-failure"
+    )
+    assert manager.start_service(service.id)
+    pid = manager.storage.get_service(service.id).pid
+    deadline = time.monotonic() + 5
+    while psutil.Process(pid).status() != psutil.STATUS_ZOMBIE and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    monitor = ServiceMonitor(manager)
+    # 退出发生在处理退出事件之后、轮询之前
+    monkeypatch.setattr(monitor, "_handle_events", lambda: None)
+    monitor._check_services()
+
+    current = manager.storage.get_service(service.id)
+    assert current.status == ServiceStatus.STOPPED
+    assert current.last_exit_code == 0
+    assert not monitor._pending_restarts
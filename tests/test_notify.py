@@ -0,0 +1,100 @@
+"""测试 sd_notify 通知套接字。"""
+
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+from autostartx.models import ServiceStatus
+from autostartx.notify import NotifyServer, parse_notify
+from autostartx.service_manager import ServiceManager
+
+
+def send(path, message):
+    """向通知套接字发送一条消息。"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.sendto(message.encode(), path)
+
+
+@pytest.fixture
+def server(temp_dir):
+    """创建套接字位于临时目录中的通知服务。"""
+    server = NotifyServer(
+        lambda service_id: os.path.join(temp_dir, f"{service_id}.sock"), threading.Event()
+    )
+    yield server
+    server.close()
+
+
+def test_parse_notify():
+    """测试解析通知消息。"""
+    assert parse_notify(b"READY=1\nSTATUS=Serving 3 clients\n\ngarbage") == {
+        "READY": "1",
+        "STATUS": "Serving 3 clients",
+    }
+
+
+def test_ready_and_status(server, temp_dir):
+    """测试 READY=1 与 STATUS= 被记录并唤醒监控。"""
+    assert server.listen("svc")
+    send(server.socket_path("svc"), "STATUS=Loading\nREADY=1")
+
+    assert server.wake.wait(2)
+    state = server.state("svc")
+    assert state.ready and state.status == "Loading"
+    assert [event.kind for event in server.drain_events()] == ["ready", "status"]
+
+    server.reset("svc")
+    assert not server.state("svc").ready
+
+    server.forget("svc")
+    assert not os.path.exists(os.path.join(temp_dir, "svc.sock"))
+
+
+def test_watchdog_timeout(server):
+    """测试心跳按时到达时不触发，超时后上报看门狗事件。"""
+    assert server.listen("svc", watchdog=0.3, running=True)
+    for _ in range(3):
+        assert not server.wake.wait(0.15)
+        send(server.socket_path("svc"), "WATCHDOG=1")
+
+    assert server.wake.wait(1)
+    assert [event.kind for event in server.drain_events()] == ["watchdog"]
+
+
+def test_socket_in_use_and_stale(server, temp_dir):
+    """测试其他进程持有的套接字不会被抢占，残留的套接字文件会被回收。"""
+    path = server.socket_path("svc")
+    holder = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    holder.bind(path)
+    assert not server.listen("svc")
+
+    holder.close()  # 套接字文件残留但已无人监听
+    assert os.path.exists(path)
+    assert server.listen("svc")
+
+
+def test_start_waits_for_ready_notification(temp_dir, monkeypatch):
+    """测试启动 sd_notify 服务时等待 READY=1 后才标记为运行。"""
+    monkeypatch.setenv("HOME", temp_dir)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", os.path.join(temp_dir, "run"))
+    manager = ServiceManager(os.path.join(temp_dir, "config.toml"))
+    script = (
+        "import os, socket, time; time.sleep(0.3); "
+        "s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM); "
+        "s.sendto(b'READY=1\\nSTATUS=Up', os.environ['NOTIFY_SOCKET']); time.sleep(60)"
+    )
+    service = manager.add_service(
+        "notifier", f'{sys.executable} -c "{script}"', working_dir=temp_dir, notify=True
+    )
+    try:
+        assert manager.start_service(service.id)
+        service = manager.get_service(service.id)
+        assert service.status == ServiceStatus.RUNNING
+        assert service.time_to_ready >= 0.2
+        assert service.notify_status == "Up"
+    finally:
+        manager.process_manager.stop_service(service, force=True)
+        manager.notify.close()
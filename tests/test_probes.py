@@ -0,0 +1,211 @@
+"""测试就绪探针。"""
+
+import asyncio
+import http.server
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+from autostartx.models import ServiceInfo, ServiceStatus
+from autostartx.probes import (
+    AsyncProbeScheduler,
+    ExecProbe,
+    HttpProbe,
+    LogProbe,
+    Probe,
+    ProbeScheduler,
+    TcpProbe,
+    build_probe,
+    parse_probe_spec,
+    wait_for,
+)
+
+
+def test_parse_probe_spec():
+    """测试解析探针描述并拒绝无效描述。"""
+    assert parse_probe_spec("tcp:8080") == ("tcp", "8080")
+    assert parse_probe_spec("tcp:db:5432") == ("tcp", "db:5432")
+    assert parse_probe_spec("http://localhost/health") == ("http", "http://localhost/health")
+    assert parse_probe_spec("exec:pg_isready -q") == ("exec", "pg_isready -q")
+    assert parse_probe_spec("log:listening on \\d+") == ("log", "listening on \\d+")
+
+    for spec in ("tcp:http", "tcp:70000", "udp:53", "exec:", "log:(", "8080"):
+        with pytest.raises(ValueError):
+            parse_probe_spec(spec)
+
+    probe = build_probe("tcp:8080", "unused.log")
+    assert isinstance(probe, TcpProbe)
+    assert (probe.host, probe.port) == ("127.0.0.1", 8080)
+
+
+def test_tcp_and_http_probes():
+    """测试 TCP 与 HTTP 探针。"""
+    server = http.server.HTTPServer(("127.0.0.1", 0), http.server.SimpleHTTPRequestHandler)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert TcpProbe("127.0.0.1", port).check(1)
+        assert HttpProbe(f"http://127.0.0.1:{port}/").check(1)
+        assert not HttpProbe(f"http://127.0.0.1:{port}/missing").check(1)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+    assert not TcpProbe("127.0.0.1", closed_port).check(1)
+    assert not HttpProbe(f"http://127.0.0.1:{closed_port}/").check(1)
+
+
+def test_exec_and_log_probes(temp_dir):
+    """测试命令探针与日志探针，日志探针只匹配新写入且非标记的行。"""
+    assert ExecProbe("true").check(1)
+    assert not ExecProbe("false").check(1)
+    assert not ExecProbe("sleep 5").check(0.1)
+
+    log_path = os.path.join(temp_dir, "service.log")
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write("server ready\n")
+    probe = LogProbe(log_path, "ready")
+    assert not probe.check(1)
+
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write("=== Service started: ready ===\nserver re")
+    assert not probe.check(1)
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write("ady\n")
+    assert probe.check(1)
+
+    assert wait_for(ExecProbe("false"), timeout=0.2) is None
+    assert wait_for(ExecProbe("false"), timeout=5, alive=lambda: False) is None
+    assert wait_for(ExecProbe("true"), timeout=1) >= 0
+
+
+def test_start_waits_for_readiness(manager, temp_dir):
+    """测试启动服务会等待就绪探针通过后再标记为运行并记录就绪耗时。"""
+    script = "import time; time.sleep(0.3); print('ready', flush=True); time.sleep(60)"
+    service = manager.add_service(
+        "web", f'{sys.executable} -c "{script}"', working_dir=temp_dir, ready_check="log:^ready$"
+    )
+
+    assert manager.start_service(service.id)
+    service = manager.get_service(service.id)
+    assert service.status == ServiceStatus.RUNNING
+    assert service.time_to_ready >= 0.2
+
+
+def test_start_fails_when_never_ready(manager, temp_dir):
+    """测试探针超时后服务被停止并标记为失败。"""
+    service = manager.add_service(
+        "web",
+        f"{sys.executable} -c 'import time; time.sleep(60)'",
+        working_dir=temp_dir,
+        ready_check="exec:false",
+        ready_timeout=1,
+    )
+
+    assert not manager.start_service(service.id)
+    service = manager.get_service(service.id)
+    assert service.status == ServiceStatus.FAILED
+    assert service.pid is None
+
+
+class FakeProbe(Probe):
+    """按预设结果返回的探针，可模拟缓慢的检查。"""
+
+    def __init__(self, healthy, delay=0.0):
+        self.healthy = healthy
+        self.delay = delay
+        self.checks = 0
+
+    def check(self, timeout):
+        self.checks += 1
+        time.sleep(self.delay)
+        return self.healthy
+
+
+def test_probe_scheduler_reports_failures():
+    """测试调度器并发执行探针，连续失败达到阈值时上报，慢探针不阻塞其他探针。"""
+    wake = threading.Event()
+    scheduler = ProbeScheduler(wake, max_workers=4)
+    probes = {"slow": FakeProbe(True, delay=5), "bad": FakeProbe(False), "good": FakeProbe(True)}
+    services = [
+        ServiceInfo(
+            id=name,
+            name=name,
+            command="sleep",
+            status=ServiceStatus.RUNNING,
+            pid=os.getpid(),
+            live_check="tcp:1",
+            live_interval=1,
+            live_failure_threshold=2,
+        )
+        for name in probes
+    ]
+    try:
+        scheduler.sync(services, lambda service: probes[service.id])
+        assert wake.wait(4)
+        assert scheduler.drain_failures() == ["bad"]
+        assert probes["bad"].checks == 2
+        assert probes["good"].checks >= 1
+        assert not scheduler.is_scheduled("bad")
+        assert scheduler.is_scheduled("good")
+
+        # 停止的服务不再被探测
+        services[2].update_status(ServiceStatus.STOPPED)
+        scheduler.sync(services, lambda service: probes[service.id])
+        assert not scheduler.is_scheduled("good")
+        assert scheduler.is_scheduled("slow")
+    finally:
+        scheduler.close()
+
+
+def test_async_probe_scheduler_reports_failures():
+    """测试事件循环上的探针调度器：连续失败达到阈值时上报并唤醒。"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    wake = threading.Event()
+    scheduler = AsyncProbeScheduler(wake, max_workers=4)
+    scheduler.attach(loop)
+    probes = {"slow": FakeProbe(True, delay=5), "bad": FakeProbe(False), "good": FakeProbe(True)}
+    services = [
+        ServiceInfo(
+            id=name,
+            name=name,
+            command="sleep",
+            status=ServiceStatus.RUNNING,
+            pid=os.getpid(),
+            live_check="tcp:1",
+            live_interval=1,
+            live_failure_threshold=2,
+        )
+        for name in probes
+    ]
+    try:
+        scheduler.sync(services, lambda service: probes[service.id])
+        assert wake.wait(4)
+        assert scheduler.drain_failures() == ["bad"]
+        assert probes["bad"].checks == 2
+        assert probes["good"].checks >= 1
+        assert scheduler.is_scheduled("good") and not scheduler.is_scheduled("bad")
+
+        services[2].update_status(ServiceStatus.STOPPED)
+        scheduler.sync(services, lambda service: probes[service.id])
+        assert not scheduler.is_scheduled("good")
+    finally:
+
+        async def close():
+            scheduler.close()
+            await asyncio.sleep(0)
+
+        asyncio.run_coroutine_threadsafe(close(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
@@ -0,0 +1,215 @@
+"""测试进程管理。"""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from autostartx.config import ConfigManager
+from autostartx.models import ServiceInfo
+from autostartx.process_manager import ProcessManager, ProcessSnapshot
+
+
+def test_snapshot_finds_process_tree():
+    """测试快照包含进程树并能查找子进程。"""
+    parent = subprocess.Popen(["sh", "-c", "sleep 60 & sleep 60 & wait"])
+    try:
+        for _ in range(100):
+            snapshot = ProcessSnapshot.take()
+            if len(snapshot.children(parent.pid)) == 2:
+                break
+        assert snapshot.is_running(parent.pid)
+        assert snapshot.get(parent.pid).ppid == os.getpid()
+        assert parent.pid in snapshot.children(os.getpid())
+        assert set(snapshot.children(os.getpid(), recursive=True)) >= {
+            parent.pid,
+            *snapshot.children(parent.pid),
+        }
+    finally:
+        for pid in ProcessSnapshot.take().children(parent.pid):
+            os.kill(pid, 9)
+        parent.kill()
+        parent.wait()
+
+
+def test_snapshot_status_checks(temp_dir):
+    """测试基于快照判断进程状态并获取进程信息。"""
+    process_manager = ProcessManager(ConfigManager(f"{temp_dir}/config.toml"))
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    try:
+        process_manager.snapshot()
+        snapshot = process_manager.snapshot()
+        service = ServiceInfo(id="svc-1", name="svc", command="sleep", pid=process.pid)
+
+        assert process_manager.is_process_running(process.pid, snapshot)
+        info = process_manager.get_process_info(service, snapshot)
+        assert info["pid"] == process.pid
+        assert info["memory"]["rss"] > 0
+        assert info["cpu_percent"] >= 0.0
+    finally:
+        process.kill()
+        process.wait()
+
+    # 进程退出后，新的快照中不再视为运行
+    snapshot = process_manager.snapshot()
+    assert not process_manager.is_process_running(process.pid, snapshot)
+    assert process_manager.get_process_info(service, snapshot) is None
+
+
+def test_pid_reuse_is_not_our_process(temp_dir):
+    """测试 PID 被其他进程复用时不视为服务进程，也不会被停止。"""
+    process_manager = ProcessManager(ConfigManager(f"{temp_dir}/config.toml"))
+    service = ServiceInfo(
+        id="svc-1",
+        name="svc",
+        command=f"{sys.executable} -c 'import time; time.sleep(60)'",
+        working_dir=temp_dir,
+    )
+    assert process_manager.start_service(service)
+    try:
+        assert service.pid_create_time is not None
+        assert process_manager.is_service_running(service)
+        assert process_manager.is_service_running(service, process_manager.snapshot())
+
+        # 模拟记录的是另一个曾使用同一 PID 的进程
+        stale = ServiceInfo.from_dict(service.to_dict())
+        stale.pid_create_time -= 3600
+        assert not process_manager.is_service_running(stale)
+        assert not process_manager.is_service_running(stale, process_manager.snapshot())
+        assert process_manager.get_process_info(stale) is None
+        assert process_manager.stop_service(stale)
+        assert process_manager.is_service_running(service)
+    finally:
+        assert process_manager.stop_service(service)
+    assert not process_manager.is_service_running(service)
+
+
+def test_process_handles_are_cached(temp_dir):
+    """测试进程句柄被缓存复用，CPU 使用率在两次调用之间计算。"""
+    process_manager = ProcessManager(ConfigManager(f"{temp_dir}/config.toml"))
+    service = ServiceInfo(
+        id="svc-1",
+        name="svc",
+        command=f"{sys.executable} -c 'while True: pass'",
+        working_dir=temp_dir,
+    )
+    assert process_manager.start_service(service)
+    try:
+        handle = process_manager._get_process(service.pid, service.pid_create_time)
+        assert handle is process_manager._get_process(service.pid, service.pid_create_time)
+
+        process_manager.get_process_info(service)
+        time.sleep(0.2)
+        assert process_manager.get_process_info(service)["cpu_percent"] > 0.0
+    finally:
+        process_manager.stop_service(service, force=True)
+    assert (service.pid, service.pid_create_time) not in process_manager._process_cache
+
+
+def test_stop_keeps_exit_code_for_reaper(temp_dir):
+    """测试停止服务时不抢先回收子进程，收割器得到真实的退出状态。"""
+    process_manager = ProcessManager(ConfigManager(f"{temp_dir}/config.toml"))
+    service = ServiceInfo(id="svc-1", name="svc", command="sleep 60", working_dir=temp_dir)
+    assert process_manager.start_service(service)
+    pid = service.pid
+    assert process_manager.stop_service(service)
+
+    assert process_manager.reaper.exit_code(pid) == -signal.SIGTERM
+    assert [(e.pid, e.exit_code) for e in process_manager.reaper.reap()] == [(pid, -signal.SIGTERM)]
+
+
+def test_stop_services_kills_process_groups(temp_dir):
+    """测试同时停止多个服务：整个进程组收到信号，超时未退出的进程被强制杀死。"""
+    process_manager = ProcessManager(ConfigManager(f"{temp_dir}/config.toml"))
+    stubborn = ServiceInfo(
+        id="svc-1",
+        name="stubborn",
+        command="sh -c 'trap \"\" TERM; sleep 60 & sleep 60 & wait'",
+        working_dir=temp_dir,
+        stop_timeout=1,
+    )
+    polite = ServiceInfo(
+        id="svc-2",
+        name="polite",
+        command="sh -c 'sleep 60 & wait'",
+        working_dir=temp_dir,
+        stop_timeout=1,
+    )
+    assert process_manager.start_service(stubborn)
+    assert process_manager.start_service(polite)
+    for _ in range(100):
+        snapshot = process_manager.snapshot()
+        if len(snapshot.children(stubborn.pid)) == 2 and snapshot.children(polite.pid):
+            break
+        time.sleep(0.01)
+    members = [stubborn.pid, *snapshot.children(stubborn.pid), *snapshot.children(polite.pid)]
+
+    started_at = time.monotonic()
+    results = process_manager.stop_services([stubborn, polite], snapshot=snapshot)
+    elapsed = time.monotonic() - started_at
+
+    assert results["svc-1"].success and results["svc-2"].success
+    assert results["svc-2"].elapsed < 1
+    assert 1 <= results["svc-1"].elapsed < 3
+    assert elapsed < 3
+    assert stubborn.pid is None and polite.pid is None
+    snapshot = process_manager.snapshot()
+    assert not any(snapshot.is_running(pid) for pid in members)
+    with open(process_manager.config_manager.get_service_log_path("svc-1")) as f:
+        assert "SIGKILL" in f.read()
+
+
+def test_launch_spec_is_cached_until_definition_changes(temp_dir):
+    """测试启动参数按服务缓存，定义改变后重新生成。"""
+    process_manager = ProcessManager(ConfigManager(f"{temp_dir}/config.toml"))
+    service = ServiceInfo(
+        id="svc-1", name="svc", command="sleep 60", working_dir=temp_dir, env_vars={"A": "1"}
+    )
+
+    spec = process_manager.launch_spec(service)
+    assert spec.argv == ["sleep", "60"]
+    assert os.path.basename(spec.executable) == "sleep"
+    assert spec.env["A"] == "1" and spec.cwd == temp_dir
+    assert process_manager.launch_spec(service) is spec
+
+    service.env_vars = {"A": "2"}
+    changed = process_manager.launch_spec(service)
+    assert changed is not spec and changed.env["A"] == "2"
+    service.command = "sleep 30"
+    assert process_manager.launch_spec(service).argv == ["sleep", "30"]
+
+
+def test_posix_spawn_start_is_reaped(temp_dir, monkeypatch):
+    """测试通过 posix_spawn 启动的服务写入日志并能回收退出码。"""
+    monkeypatch.chdir(temp_dir)
+    process_manager = ProcessManager(ConfigManager(f"{temp_dir}/config.toml"))
+    service = ServiceInfo(
+        id="svc-1", name="svc", command="sh -c 'echo hello; exit 3'", working_dir=temp_dir
+    )
+    spawned = []
+    posix_spawn = os.posix_spawn
+    monkeypatch.setattr(
+        os,
+        "posix_spawn",
+        lambda path, *args, **kwargs: spawned.append(path) or posix_spawn(path, *args, **kwargs),
+    )
+
+    assert process_manager.start_service(service)
+    assert len(spawned) == 1
+    pid = service.pid
+    assert process_manager.reaper.is_tracked(pid)
+    for _ in range(200):
+        exits = process_manager.reaper.reap()
+        if exits:
+            break
+        time.sleep(0.01)
+    assert [(e.pid, e.exit_code) for e in exits] == [(pid, 3)]
+    with open(process_manager.config_manager.get_service_log_path("svc-1")) as f:
+        log = f.read()
+    assert "=== Service started" in log and "hello" in log
+
+    # 找不到程序时启动失败
+    service.command = "no-such-program-xyz"
+    service.pid = None
+    assert not process_manager.start_service(service)
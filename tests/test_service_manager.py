@@ -0,0 +1,39 @@
+"""测试服务管理器。"""
+
+import sys
+
+from autostartx.models import ServiceStatus
+
+
+def test_bulk_start_stop_restart(manager, temp_dir):
+    """测试并行批量启动、重启和停止服务并返回每个服务的耗时。"""
+    command = f"{sys.executable} -c 'import time; time.sleep(60)'"
+    services = [manager.add_service(f"svc-{i}", command, working_dir=temp_dir) for i in range(4)]
+    service_ids = [service.id for service in services]
+
+    results = manager.start_many(service_ids, max_workers=2)
+    assert set(results) == set(service_ids)
+    assert all(result.success and result.elapsed >= 0 for result in results.values())
+    old_pids = {service.id: service.pid for service in manager.list_services()}
+    assert all(service.status == ServiceStatus.RUNNING for service in manager.list_services())
+
+    results = manager.restart_many(service_ids)
+    assert all(result.success for result in results.values())
+    for service in manager.list_services():
+        assert service.status == ServiceStatus.RUNNING
+        assert service.pid != old_pids[service.id]
+        assert service.restart_count == 1
+
+    results = manager.stop_many(service_ids + ["missing"])
+    assert all(results[service_id].success for service_id in service_ids)
+    assert not results["missing"].success
+    assert all(service.status == ServiceStatus.STOPPED for service in manager.list_services())
+
+
+def test_remove_service_drops_launch_spec(manager, temp_dir):
+    """测试删除服务后不再保留其启动参数缓存。"""
+    service = manager.add_service("svc", "sleep 60", working_dir=temp_dir)
+    spec = manager.process_manager.launch_spec(service)
+
+    assert manager.remove_service(service.id)
+    assert manager.process_manager.launch_spec(service) is not spec
@@ -1,25 +1,23 @@
 """测试服务存储。"""
 
+import fcntl
 import os
-import tempfile
 
 import pytest
 
-from autostartx.config import ConfigManager
+from autostartx.backends import JournalBackend, ShardedBackend, SQLiteBackend
 from autostartx.models import ServiceStatus
-from autostartx.storage import ServiceStorage
+from autostartx.runtime_state import RuntimeStateStore
+from autostartx.storage import ServiceConflictError, ServiceStorage
 
 
-@pytest.fixture
-def storage():
-    """创建测试用的存储实例。"""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        config_path = os.path.join(temp_dir, "test_config.toml")
-        config_manager = ConfigManager(config_path)
-        # 确保使用独立的数据目录
-        config_manager.config.data_dir = os.path.join(temp_dir, "data")
-        config_manager.config.log_dir = os.path.join(temp_dir, "logs")
-        yield ServiceStorage(config_manager)
+@pytest.fixture(params=["json", "sqlite", "journal", "sharded"])
+def storage(request, config_manager):
+    """创建测试用的存储实例（每种存储后端各一次）。"""
+    config_manager.config.storage_backend = request.param
+    storage = ServiceStorage(config_manager)
+    yield storage
+    storage.backend.close()
 
 
 def test_add_service(storage):
@@ -182,3 +180,457 @@ def test_persistence(storage):
     assert loaded_service is not None
     assert loaded_service.name == "test-service"
     assert loaded_service.command == "echo hello"
+
+
+def test_sqlite_migrates_json(config_manager):
+    """测试 SQLite 后端首次运行时迁移 services.json。"""
+    json_storage = ServiceStorage(config_manager)
+    service = json_storage.add_service(name="legacy", command="echo legacy")
+
+    config_manager.config.storage_backend = "sqlite"
+    sqlite_storage = ServiceStorage(config_manager)
+
+    migrated = sqlite_storage.get_service(service.id)
+    assert migrated is not None
+    assert migrated.name == "legacy"
+    assert not os.path.exists(config_manager.get_services_db_path())
+    assert os.path.exists(config_manager.get_services_db_path() + ".migrated")
+    sqlite_storage.backend.close()
+
+
+def test_sqlite_query_filters(config_manager):
+    """测试 SQLite 后端按状态和名称过滤查询。"""
+    config_manager.config.storage_backend = "sqlite"
+    storage = ServiceStorage(config_manager)
+    service1 = storage.add_service(name="service-1", command="echo 1")
+    storage.add_service(name="service-2", command="echo 2")
+    service1.update_status(ServiceStatus.RUNNING)
+    storage.update_service(service1)
+
+    assert isinstance(storage.backend, SQLiteBackend)
+    running = storage.backend.query(status="running")
+    assert [record["id"] for record in running] == [service1.id]
+    assert len(storage.backend.query(name="service-2")) == 1
+    assert storage.backend.query(status="running", name="service-2") == []
+    storage.backend.close()
+
+
+def test_sqlite_status_updates_do_not_reload(config_manager):
+    """测试 SQLite 后端只更新状态时，其他进程无需重新加载定义。"""
+    config_manager.config.storage_backend = "sqlite"
+    storage = ServiceStorage(config_manager)
+    service = storage.add_service(name="test-service", command="echo hello")
+    other = ServiceStorage(config_manager)
+
+    service.update_status(ServiceStatus.RUNNING)
+    storage.update_service(service)
+    assert not other.backend.has_changed()
+    assert other.get_service(service.id).status == ServiceStatus.RUNNING
+
+    service.command = "echo changed"
+    storage.update_service(service)
+    assert other.backend.has_changed()
+    storage.backend.close()
+    other.backend.close()
+
+
+def test_sqlite_status_reset_after_reboot(config_manager):
+    """测试重启后 SQLite 状态列不再保留上次启动的状态。"""
+    config_manager.config.storage_backend = "sqlite"
+    storage = ServiceStorage(config_manager)
+    service = storage.add_service(name="test-service", command="echo hello")
+    service.update_status(ServiceStatus.RUNNING)
+    storage.update_service(service)
+    storage.backend.close()
+
+    with open(storage.runtime.boot_id_path, "w", encoding="utf-8") as f:
+        f.write("previous-boot\n")
+
+    rebooted = ServiceStorage(config_manager)
+    assert rebooted.backend.query(status="running") == []
+    assert [record["id"] for record in rebooted.backend.query(status="stopped")] == [service.id]
+    rebooted.backend.close()
+
+
+def test_unknown_backend(config_manager):
+    """测试未知存储后端。"""
+    config_manager.config.storage_backend = "nope"
+    with pytest.raises(ValueError, match="Unknown storage backend"):
+        ServiceStorage(config_manager)
+
+
+def test_concurrent_storages_do_not_lose_updates(storage):
+    """测试两个存储实例（如 CLI 与守护进程）交替写入不会丢失更新。"""
+    other = ServiceStorage(storage.config_manager)
+
+    service1 = storage.add_service(name="service-1", command="echo 1")
+    service2 = other.add_service(name="service-2", command="echo 2")
+
+    # 另一个实例无需手动 reload 即可看到变更
+    assert other.get_service(service1.id) is not None
+    assert storage.get_service(service2.id) is not None
+
+    service1.update_status(ServiceStatus.RUNNING)
+    storage.update_service(service1)
+    assert other.get_service(service1.id).status == ServiceStatus.RUNNING
+
+    reloaded = ServiceStorage(storage.config_manager)
+    assert {s.name for s in reloaded.get_all_services()} == {"service-1", "service-2"}
+    other.backend.close()
+    reloaded.backend.close()
+
+
+def test_add_services_writes_once(storage):
+    """测试批量添加服务只写入一次。"""
+    flushes = storage.stats.flushes
+    services = storage.add_services(
+        [{"name": f"service-{i}", "command": f"echo {i}"} for i in range(50)]
+    )
+
+    assert storage.stats.flushes == flushes + 1
+    assert len({service.id for service in services}) == 50
+    reloaded = ServiceStorage(storage.config_manager)
+    assert len(reloaded.get_all_services()) == 50
+    reloaded.backend.close()
+
+
+def test_add_services_validates_all_entries(storage):
+    """测试批量添加时先校验全部条目，有错误则不添加任何服务。"""
+    storage.add_service(name="existing", command="echo existing")
+
+    with pytest.raises(ValueError) as excinfo:
+        storage.add_services(
+            [
+                {"name": "ok", "command": "echo ok", "restart_backoff": 3},
+                {"name": "existing", "command": "echo again"},
+                {"name": "ok", "command": "echo dup"},
+                {"name": "bad", "command": "", "restart_delay": "soon", "colour": "red"},
+                {"name": "probe", "command": "echo probe", "ready_check": "tcp:http"},
+                {
+                    "name": "mode",
+                    "command": "echo",
+                    "restart_on": "often",
+                    "success_exit_codes": [1],
+                },
+                {"name": "codes", "command": "echo", "success_exit_codes": ["3"]},
+            ]
+        )
+
+    message = str(excinfo.value)
+    assert "'existing' already exists" in message
+    assert "duplicate service name 'ok'" in message
+    assert "'command' must be a non-empty string" in message
+    assert "'restart_delay' must be of type int" in message
+    assert "restart_backoff" not in message
+    assert "unknown field 'colour'" in message
+    assert "Invalid port in probe 'tcp:http'" in message
+    assert "'restart_on' must be one of: always, on-failure, on-abnormal, never" in message
+    assert message.count("'success_exit_codes' must be a list of integers") == 1
+    assert [s.name for s in storage.get_all_services()] == ["existing"]
+
+
+def test_update_rejects_outdated_version(storage):
+    """测试基于过期版本的更新被拒绝（比较并交换）。"""
+    other = ServiceStorage(storage.config_manager)
+    service = storage.add_service(name="service-1", command="echo 1")
+    stale = other.get_service(service.id)
+
+    service.update_status(ServiceStatus.RUNNING)
+    storage.update_service(service)
+    assert service.version == 1
+
+    stale.update_status(ServiceStatus.FAILED)
+    with pytest.raises(ServiceConflictError):
+        other.update_service(stale)
+    assert other.stats.conflicts == 1
+    assert not other.is_current(stale)
+
+    latest = other.get_service(service.id)
+    assert latest.status == ServiceStatus.RUNNING
+    latest.update_status(ServiceStatus.STOPPED)
+    other.update_service(latest)
+    assert storage.get_service(service.id).version == 2
+    other.backend.close()
+
+
+def test_batch_discards_outdated_updates(storage):
+    """测试批量写入时丢弃期间被其他进程修改过的服务更新。"""
+    other = ServiceStorage(storage.config_manager)
+    service1 = storage.add_service(name="service-1", command="echo 1")
+    service2 = storage.add_service(name="service-2", command="echo 2")
+
+    with storage.batch():
+        for service in storage.get_all_services():
+            service.update_status(ServiceStatus.FAILED)
+            storage.update_service(service)
+
+        # 另一进程（如 CLI）在批次期间停止了 service-1
+        user_copy = other.get_service(service1.id)
+        user_copy.update_status(ServiceStatus.PAUSED)
+        other.update_service(user_copy)
+
+    assert storage.stats.conflicts == 1
+    assert storage.get_service(service1.id).status == ServiceStatus.PAUSED
+    assert storage.get_service(service2.id).status == ServiceStatus.FAILED
+    other.backend.close()
+
+
+def test_json_write_is_atomic(config_manager):
+    """测试 JSON 写入通过临时文件原子替换，且未变化时不重新解析。"""
+    storage = ServiceStorage(config_manager)
+    storage.add_service(name="test-service", command="echo hello")
+
+    data_dir = os.path.dirname(storage.db_path)
+    assert not [name for name in os.listdir(data_dir) if name.startswith(".tmp-")]
+    assert not storage.backend.has_changed()
+
+    loads = []
+    original_load = storage.backend.load
+    storage.backend.load = lambda: loads.append(1) or original_load()
+    storage.get_all_services()
+    assert loads == []
+
+
+def test_find_service_by_id_prefix(storage):
+    """测试按唯一 ID 前缀查找服务。"""
+    service1 = storage.add_service(name="service-1", command="echo 1")
+    service2 = storage.add_service(name="service-2", command="echo 2")
+
+    common = os.path.commonprefix([service1.id, service2.id])
+    unique = service1.id[: len(common) + 1]
+
+    assert storage.find_service(unique).id == service1.id
+    assert [s.id for s in storage.get_services_by_prefix(unique)] == [service1.id]
+    if common:
+        # 有歧义的前缀不匹配任何服务
+        assert storage.find_service(common) is None
+    assert storage.find_service("") is None
+
+
+def test_indexes_follow_updates(storage):
+    """测试二级索引在添加、更新、删除后保持一致。"""
+    service = storage.add_service(name="service-1", command="echo 1")
+
+    service.update_status(ServiceStatus.RUNNING)
+    storage.update_service(service)
+    assert [s.id for s in storage.get_services_by_status(ServiceStatus.RUNNING)] == [service.id]
+    assert storage.get_services_by_status(ServiceStatus.STOPPED) == []
+
+    storage.remove_service(service.id)
+    assert storage.get_service_by_name("service-1") is None
+    assert storage.get_services_by_status(ServiceStatus.RUNNING) == []
+    assert storage.get_services_by_prefix(service.id) == []
+
+    # 删除后名称可以重新使用
+    storage.add_service(name="service-1", command="echo again")
+
+
+def test_batch_flushes_once(storage):
+    """测试批处理中的多次更新只写入一次。"""
+    services = [storage.add_service(name=f"service-{i}", command="echo") for i in range(5)]
+    flushes_before = storage.stats.flushes
+    updates_before = storage.stats.updates
+
+    with storage.batch():
+        for service in services:
+            service.update_status(ServiceStatus.RUNNING)
+            storage.update_service(service)
+        # 嵌套批处理不会提前写入
+        with storage.batch():
+            services[0].pid = 4321
+            storage.update_service(services[0])
+        assert storage.stats.flushes == flushes_before
+
+    assert storage.stats.flushes == flushes_before + 1
+    assert storage.stats.updates == updates_before + 6
+
+    reloaded = ServiceStorage(storage.config_manager)
+    assert len(reloaded.get_services_by_status(ServiceStatus.RUNNING)) == 5
+    assert reloaded.get_service(services[0].id).pid == 4321
+    reloaded.backend.close()
+
+
+def test_batch_flushes_on_error(storage):
+    """测试批处理中发生异常时仍会写入已更新的服务。"""
+    service = storage.add_service(name="service-1", command="echo")
+
+    with pytest.raises(RuntimeError):
+        with storage.batch():
+            service.update_status(ServiceStatus.RUNNING)
+            storage.update_service(service)
+            raise RuntimeError("boom")
+
+    reloaded = ServiceStorage(storage.config_manager)
+    assert reloaded.get_service(service.id).status == ServiceStatus.RUNNING
+    reloaded.backend.close()
+
+
+def test_journal_appends_deltas_and_compacts(config_manager):
+    """测试日志后端追加增量记录并定期压缩为快照。"""
+    config_manager.config.storage_backend = "journal"
+    config_manager.config.journal_compact_threshold = 10
+    storage = ServiceStorage(config_manager)
+    assert isinstance(storage.backend, JournalBackend)
+
+    service = storage.add_service(name="test-service", command="echo hello")
+    service.update_status(ServiceStatus.RUNNING)
+    storage.update_service(service)
+
+    with open(storage.backend.journal_path, encoding="utf-8") as f:
+        last_entry = f.readlines()[-1]
+    # 只记录变化的字段
+    assert '"command"' not in last_entry
+    assert '"status": "running"' in last_entry
+
+    for _ in range(10):
+        service.update_status(ServiceStatus.STOPPED)
+        storage.update_service(service)
+
+    assert os.path.exists(storage.db_path)
+    assert storage.backend._journal_entries < 10
+    transitions = [status for _, status in storage.backend.status_history(service.id)]
+    assert transitions[:3] == ["stopped", "running", "stopped"]
+
+    reloaded = ServiceStorage(config_manager)
+    assert reloaded.get_service(service.id).status == ServiceStatus.STOPPED
+
+
+def test_journal_ignores_torn_write(config_manager):
+    """测试日志末尾的不完整记录在加载时被忽略并在下次写入时截断。"""
+    config_manager.config.storage_backend = "journal"
+    storage = ServiceStorage(config_manager)
+    service = storage.add_service(name="test-service", command="echo hello")
+
+    with open(storage.backend.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"ts": 1, "id": "')
+
+    reloaded = ServiceStorage(config_manager)
+    loaded = reloaded.get_service(service.id)
+    assert loaded is not None
+
+    loaded.update_status(ServiceStatus.RUNNING)
+    reloaded.update_service(loaded)
+    assert ServiceStorage(config_manager).get_service(service.id).status == ServiceStatus.RUNNING
+
+
+def test_runtime_state_kept_out_of_definitions(config_manager):
+    """测试运行时状态变化不会重写服务定义。"""
+    storage = ServiceStorage(config_manager)
+    service = storage.add_service(name="test-service", command="echo hello")
+    definition_mtime = os.stat(storage.db_path).st_mtime_ns
+
+    service.update_status(ServiceStatus.RUNNING)
+    service.pid = 1234
+    storage.update_service(service)
+
+    assert os.stat(storage.db_path).st_mtime_ns == definition_mtime
+    with open(storage.db_path, encoding="utf-8") as f:
+        assert '"pid"' not in f.read()
+
+    reloaded = ServiceStorage(config_manager)
+    loaded = reloaded.get_service(service.id)
+    assert loaded.status == ServiceStatus.RUNNING
+    assert loaded.pid == 1234
+    assert reloaded.has_runtime_state(service.id)
+
+
+def test_runtime_state_discarded_after_reboot(config_manager):
+    """测试重启后运行时状态被明确丢弃。"""
+    storage = ServiceStorage(config_manager)
+    service = storage.add_service(name="test-service", command="echo hello")
+    service.update_status(ServiceStatus.RUNNING)
+    service.pid = 1234
+    storage.update_service(service)
+
+    # 模拟另一次启动
+    with open(storage.runtime.boot_id_path, "w", encoding="utf-8") as f:
+        f.write("previous-boot\n")
+
+    rebooted = ServiceStorage(config_manager)
+    assert rebooted.runtime_reset
+    loaded = rebooted.get_service(service.id)
+    assert loaded.status == ServiceStatus.STOPPED
+    assert loaded.pid is None
+    assert not rebooted.has_runtime_state(service.id)
+
+
+def test_restart_history_kept_after_reboot(config_manager):
+    """测试重启历史随服务定义持久保存，重启后仍然保留。"""
+    storage = ServiceStorage(config_manager)
+    service = storage.add_service(name="test-service", command="echo hello")
+    service.record_exit(1, 2.0)
+    service.last_exit_code = 1
+    storage.update_service(service)
+    assert "restart_history" not in service.runtime_dict()
+
+    with open(storage.runtime.boot_id_path, "w", encoding="utf-8") as f:
+        f.write("previous-boot\n")
+
+    loaded = ServiceStorage(config_manager).get_service(service.id)
+    assert loaded.last_exit_code is None
+    assert [record.exit_code for record in loaded.restart_history] == [1]
+
+
+def test_first_run_is_not_a_reboot(config_manager):
+    """测试首次运行（没有记录的启动 ID）不视为重启。"""
+    storage = ServiceStorage(config_manager)
+    assert os.path.exists(storage.runtime.boot_id_path)
+    assert not storage.runtime_reset
+    assert not ServiceStorage(config_manager).runtime_reset
+
+
+def test_boot_check_holds_storage_lock(config_manager, monkeypatch):
+    """测试丢弃上次启动的运行时状态时持有存储锁。"""
+    held = []
+    check_boot = RuntimeStateStore.check_boot
+
+    def checking_boot(self):
+        with open(config_manager.get_services_lock_path(), "a+") as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                held.append(False)
+            except BlockingIOError:
+                held.append(True)
+        check_boot(self)
+
+    monkeypatch.setattr(RuntimeStateStore, "check_boot", checking_boot)
+    ServiceStorage(config_manager)
+    assert held == [True]
+
+
+def test_legacy_runtime_fields_migrated(config_manager):
+    """测试旧版 services.json 中的运行时字段被迁移到运行时目录。"""
+    config_manager.config.split_runtime_state = False
+    legacy = ServiceStorage(config_manager)
+    service = legacy.add_service(name="test-service", command="echo hello")
+    service.update_status(ServiceStatus.RUNNING)
+    service.pid = 1234
+    legacy.update_service(service)
+
+    config_manager.config.split_runtime_state = True
+    storage = ServiceStorage(config_manager)
+    loaded = storage.get_service(service.id)
+    assert loaded.status == ServiceStatus.RUNNING
+    assert loaded.pid == 1234
+    with open(storage.db_path, encoding="utf-8") as f:
+        assert '"pid"' not in f.read()
+
+
+def test_sharded_loads_services_lazily(config_manager):
+    """测试分片后端按需加载单个服务。"""
+    config_manager.config.storage_backend = "sharded"
+    writer = ServiceStorage(config_manager)
+    service1 = writer.add_service(name="service-1", command="echo 1")
+    service2 = writer.add_service(name="service-2", command="echo 2")
+    assert isinstance(writer.backend, ShardedBackend)
+    assert os.path.exists(os.path.join(writer.backend.shard_dir, f"{service1.id}.json"))
+
+    reader = ServiceStorage(config_manager)
+    assert reader._services == {}
+    assert reader.find_service("service-2").id == service2.id
+    assert list(reader._services) == [service2.id]
+
+    assert {s.id for s in reader.get_all_services()} == {service1.id, service2.id}
+    assert reader.remove_service(service1.id)
+    assert not os.path.exists(os.path.join(writer.backend.shard_dir, f"{service1.id}.json"))
+    assert [s.id for s in ServiceStorage(config_manager).get_all_services()] == [service2.id]
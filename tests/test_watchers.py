@@ -0,0 +1,64 @@
+"""测试子进程退出监视。"""
+
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+import pytest
+
+from autostartx.config import ConfigManager
+from autostartx.process_manager import ProcessManager
+from autostartx.watchers import ChildReaper, PidfdWatcher
+
+
+def test_reaper_collects_exit_codes():
+    """测试回收已退出的子进程并记录退出码。"""
+    reaper = ChildReaper()
+    process = subprocess.Popen([sys.executable, "-c", "raise SystemExit(3)"])
+    reaper.track("svc-1", process)
+    process.wait()
+
+    exits = reaper.reap()
+
+    assert [(e.service_id, e.pid, e.exit_code) for e in exits] == [("svc-1", process.pid, 3)]
+    assert not reaper.is_tracked(process.pid)
+    assert reaper.reap() == []
+
+
+def test_exited_child_is_not_running(temp_dir):
+    """测试已退出但尚未回收的子进程（僵尸进程）不被视为运行中。"""
+    process_manager = ProcessManager(ConfigManager(f"{temp_dir}/config.toml"))
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process_manager.reaper.track("svc-1", process)
+
+    deadline = time.time() + 10
+    while psutil.Process(process.pid).status() != psutil.STATUS_ZOMBIE:
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+    assert not process_manager.is_process_running(process.pid)
+    # 检查不会回收子进程，退出码留给收割器
+    assert process.returncode is None
+    assert process_manager.reaper.exit_code(process.pid) == 0
+
+
+@pytest.mark.skipif(not PidfdWatcher(threading.Event()).supported, reason="pidfd 不可用")
+def test_pidfd_watcher_wakes_on_exit():
+    """测试 pidfd 监视器在进程退出时唤醒。"""
+    wake = threading.Event()
+    watcher = PidfdWatcher(wake)
+    process = subprocess.Popen(["sleep", "60"])
+    try:
+        assert watcher.watch("svc-1", process.pid)
+        assert watcher.is_watched(process.pid)
+        assert not wake.wait(0.1)
+
+        process.kill()
+        assert wake.wait(5)
+        assert [(e.service_id, e.pid) for e in watcher.drain()] == [("svc-1", process.pid)]
+        assert not watcher.is_watched(process.pid)
+    finally:
+        process.wait()
+        watcher.close()